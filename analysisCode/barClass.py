@@ -4,14 +4,109 @@
 #Date: April 16, 2018
 #Purpose: Class for handling testbeam bar data
 
-import os,sys, argparse, ROOT
-from ROOT import gROOT, TH1D, TFile, TTree, TChain, TCanvas, TH2D, TLegend, gStyle, TLatex, TProfile, TF1, TGraph, TMath, TPad, TLine, TObjArray
+import os,sys, argparse, errno, multiprocessing, json, time, fnmatch, ROOT
+import numpy as np
+from eventReader import eventReader, returnBranches, testEntries
+from waveformStore import waveformStore
+from histRegistry import histRegistry
+import waveformTools
+import thresholdSolver
+import fitEngine
+import partialFiles
+import traceDumps
+from timingSkim import timingSkim
+from ROOT import gROOT, TH1, TH1D, TFile, TTree, TChain, TCanvas, TH2D, TLegend, gStyle, TLatex, TProfile, TF1, TGraph, TMath, TPad, TLine, TObjArray
+
+def makeDirs(path):
+    """ function to create directory (and parents) if not already existent, safe against other processes creating it at the same time"""
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST or not os.path.isdir(path):
+            raise
+
+# =============================
+
+def fillEntryRange(job):
+    """ function run in worker process: open own file + tree (chain if several files), fill histograms for one entry range and write them to partial files. returns partial file name per vetoOpt"""
+    fileNames, treeName, runType, topDir, vetoOpts, doTiming, test, chunkSize, scan, entryRange, workerName, checkpointOpts = job
+    if len(fileNames) == 1:
+        f = TFile.Open(fileNames[0], 'READ')
+        worker = barClass(f.Get(treeName), runType, topDir, vetoOpts, doTiming, test, True, chunkSize, scan, entryRange=entryRange, workerName=workerName, **checkpointOpts)
+        f.Close()
+    else:
+        chain = TChain(treeName)
+        for fileName in fileNames:
+            chain.Add(fileName)
+        worker = barClass(chain, runType, topDir, vetoOpts, doTiming, test, True, chunkSize, scan, entryRange=entryRange, workerName=workerName, **checkpointOpts)
+
+    return worker.partialFiles
+
+# =============================
+
+renderJob = None # (barClass, plot list) inherited by forked render workers, plots hold ROOT objects and cannot be pickled
+
+def drawPlotSlice(job):
+    """ function run in render worker process: draw every nWorkers-th plot of the plot list on own canvases. returns number of plots drawn"""
+    iWorker, nWorkers = job
+    analysis, plots = renderJob
+    gROOT.SetBatch(True) # workers only print files
+    analysis.makeCanvases('_render{0:03d}'.format(iWorker))
+    for opt, plot in plots[iWorker::nWorkers]:
+        analysis.setVetoOpt(opt)
+        analysis.drawPlot(plot)
+
+    return len(plots[iWorker::nWorkers])
+
+# =============================
 
 class barClass:
-    def __init__(self, tree, runType, topDir, vetoOpt, doTiming=True, test=False, batch=False):
+    def __init__(self, tree, runType, topDir, vetoOpt, doTiming=True, test=False, batch=False, chunkSize=10000, scan=None, nWorkers=1, entryRange=None, workerName='', partialFile=None, mergedFile=None,
+                 checkpointFile=None, checkpointEvents=0, checkpointSeconds=0, resume=False, skimDir=None,
+                 histFile=None, render=True, inputHistFile=None, renderWorkers=1, maxDumps=1000, waveformStoreDir=None, cfdFractions=None, runNow=True):
+        """ vetoOpt can be a single option or a list of options filled in the same event loop. topDir may contain '{0}' to be replaced by vetoOpt.
+            scan = optional thresholdScan, filled from the same fits as the regular timing plots.
+            nWorkers > 1 splits the tree entries into ranges filled by worker processes and merged here; workers (entryRange, workerName set) only fill + write partial files.
+            partialFile (may contain '{0}' for vetoOpt) = also write filled histograms + config there. mergedFile (same) = draw from merged partials instead of reading tree.
+            checkpointFile (.npz) = save histogram state + next entry every checkpointEvents events and/or checkpointSeconds seconds, resume = continue from it.
+            skimDir = directory of per-event timing skims (one per input file + timing config), fits are only redone for entries missing in the skims; chains sharing a file reuse its rows.
+            histFile = fill stage output with all histograms (one directory per vetoOpt), render = False skips drawing. inputHistFile = render only, from such a file.
+            renderWorkers > 1 draws the plot list in that many processes, each with its own canvases.
+            maxDumps = cap on waveform trace dumps per vetoOpt (queued to traceDumps archive, drawn with drawTraceDumps.py).
+            waveformStoreDir = waveform store exported from the same input (exportWaveforms.py), channel + time are read memory-mapped from it instead of the tree.
+            cfdFractions = list of constant fractions for interpolated CFD times (one resolution plot pair each), None = no CFD timing.
+            runNow = False only books + sets up, the caller fills (fillNewEntries) and draws (drawSelected), e.g. liveMonitor.py"""
         # *** 0. Top-level options and objects
         self.tree = tree
+        self.chunkSize = chunkSize
         self.topDir = topDir
+        self.topDirTemplate = topDir
+        self.nWorkers = nWorkers
+        self.entryRange = entryRange # (first, stop) entries of a worker, None = whole tree
+        self.workerName = workerName
+        self.logPrefix = '[{0}] '.format(workerName) if workerName else '' # printouts of workers are prefixed
+        self.dumpTag = '_{0}'.format(workerName) if workerName else '' # trace dumps of workers never share a file name
+        self.partialFiles = {} # partial histogram file per vetoOpt written by a worker
+        self.partialFile = partialFile
+        self.mergedFile = mergedFile
+        self.checkpointFile = checkpointFile
+        if checkpointFile is not None and workerName:
+            self.checkpointFile = '{0}_{2}{1}'.format(os.path.splitext(checkpointFile)[0], os.path.splitext(checkpointFile)[1], workerName) # one checkpoint per worker
+        self.checkpointEvents = checkpointEvents
+        self.checkpointSeconds = checkpointSeconds
+        self.resume = resume
+        self.skimDir = skimDir
+        self.histFile = histFile
+        self.render = render
+        self.inputHistFile = inputHistFile
+        self.renderWorkers = renderWorkers
+        self.maxDumps = maxDumps
+        self.dumpers = {} # trace dump writer per vetoOpt, only while filling
+        self.dumper = None
+        self.dumpStates = {} # [dumps queued, next part archive] per vetoOpt from a checkpoint
+        self.liveProgress = {} # next entry to fill per input file, live monitoring only
+        self.waveformStoreDir = waveformStoreDir
+        self.skim = None
         self.doTiming = doTiming
         self.signalThreshold = 0
         self.vetoThreshold = 0
@@ -20,7 +115,8 @@ class barClass:
         self.yIntegralOffset = 0
         self.setVarsByRunType(runType)
         self.runType = runType
-        self.vetoOpt = vetoOpt
+        self.vetoOpts = vetoOpt if isinstance(vetoOpt, list) else [vetoOpt]
+        self.vetoOpt = self.vetoOpts[0]
         self.isTest = test
         self.runBatch = batch
         self.fitVoltageThreshold = 30 # in mV
@@ -31,7 +127,11 @@ class barClass:
         self.fitTimeWindow = 4
         self.fitMCPTimeWindow = 4
         self.fitFunction = "gaus"
-        self.histArray = TObjArray() 
+        self.histArray = histRegistry()
+        self.histSets = {} # one histArray per vetoOpt
+        self.topDirs = {} # one output directory per vetoOpt
+        self.timingCache = {} # timing results per (entry, barNum), shared between vetoOpts within a chunk
+        self.fitDumps = {} # fit info of every 500th event per (i_evt, drs_channel), queued to the dumper of each vetoOpt the event passes, within a chunk
         self.xSlice = 5 # in mm
         self.slopeSlice = 15 # arb units
         self.peakFitFunction = "landau"
@@ -40,18 +140,76 @@ class barClass:
         self.peakFitVoltageVeto = 875 # in mV
         self.fitPercentThreshold = 0.06
         self.fitPercentForTiming = 0.10
+        self.cfdFractions = list(cfdFractions) if cfdFractions is not None else [] # interpolated constant-fraction times, one column each
+        self.cfdBaselineSamples = 50 # leading samples averaged for CFD baseline
+        self.timingLegacyStep = True # snap threshold solutions to the 1 ps grid of the old stepping loops
+        self.waveformSource = self.returnWaveformSource() # int16 stores round samples, fits differ from tree/float32 ones
+        self.scan = scan
+        # settings stored with partial-result files, partials only merge if all of them agree
+        self.configKeys = ['runType', 'doTiming', 'signalThreshold', 'vetoThreshold', 'fitVoltageThreshold', 'fitVoltageForTiming', 'fitMCPVoltageThreshold', 'fitMCPVoltageForTiming',
+                           'fitSignalThreshold', 'fitTimeWindow', 'fitMCPTimeWindow', 'fitFunction', 'peakFitFunction', 'peakFitRiseThreshold', 'peakFitFallThreshold', 'peakFitVoltageVeto',
+                           'fitPercentThreshold', 'fitPercentForTiming', 'cfdFractions', 'cfdBaselineSamples', 'timingLegacyStep', 'waveformSource', 'xSlice', 'slopeSlice']
+        self.filledRange = [0, 0] # entries actually filled
+        # settings the per-event timing products depend on, skims are keyed by their hash
+        self.timingConfigKeys = ['runType', 'fitVoltageThreshold', 'fitVoltageForTiming', 'fitMCPVoltageThreshold', 'fitMCPVoltageForTiming', 'fitSignalThreshold', 'fitTimeWindow', 'fitMCPTimeWindow',
+                                 'fitFunction', 'peakFitFunction', 'peakFitRiseThreshold', 'peakFitFallThreshold', 'peakFitVoltageVeto', 'fitPercentThreshold', 'fitPercentForTiming',
+                                 'cfdFractions', 'cfdBaselineSamples', 'timingLegacyStep', 'waveformSource']
+        # neighbour channels checked against vetoThreshold for each veto option and bar (signal bar = key)
+        self.vetoChannels = { 'singleAdj' : {1: [3], 2: [5], 3: [10], 4: [5], 5: [10]},
+                              'doubleAdj' : {1: [3, 4], 2: [5, 6], 3: [10, 11], 4: [5, 6], 5: [10, 11]},
+                              'allAdj'    : {1: [3, 4], 2: [5, 6, 1, 2], 3: [10, 11, 3, 4], 4: [5, 6, 12, 13], 5: [10, 11]},
+                              'all'       : {1: [3, 4, 5, 6, 10, 11, 12, 13], 2: [1, 2, 5, 6, 10, 11, 12, 13], 3: [1, 2, 3, 4, 10, 11, 12, 13], 4: [1, 2, 3, 4, 5, 6, 12, 13], 5: [1, 2, 3, 4, 5, 6, 10, 11]} }
+
+        # rendering a fill stage output: take settings from the file so booking matches
+        if inputHistFile is not None:
+            config = partialFiles.readConfig(inputHistFile, self.vetoOpts[0])
+            for key in self.configKeys:
+                if key in config:
+                    setattr(self, key, config[key])
                 
+        # *** 1. Define all histograms, one set per veto option. histograms of the same name for different options --> keep out of gDirectory
+        TH1.AddDirectory(False)
+        for opt in self.vetoOpts:
+            self.histSets[opt] = self.bookHistograms()
+
+        # *** 3. Canvases and style
+        if self.runBatch:
+            ROOT.gROOT.SetBatch(True)
+            
+        self.makeCanvases()
+
+        gStyle.SetOptStat(0000)
+
+        # *** 4. Make some directories if not already existent
+        for opt in self.vetoOpts:
+            self.topDirs[opt] = '{0}/{1}'.format(topDir.format(opt), runType)
+            makeDirs(self.topDirs[opt])
+        self.setVetoOpt(self.vetoOpt)
+  
+        # *** 5. Run analysis
+        if runNow:
+            self.loopEvents()
+
+    # =============================
+
+    def bookHistograms(self):
+        """ function to book and return registry of all histograms for one veto option"""
+
+        arr = histRegistry()
+
         # *** 1. Define all histograms
         # ** A. Leakage histograms and general position info of hits
-        self.histArray = self.addLeakageHistograms(self.histArray)
+        arr = self.addLeakageHistograms(arr)
         # ** B. Add profiles
-        self.histArray = self.addProfiles(self.histArray)
+        arr = self.addProfiles(arr)
         # ** C. Add x-sliced histograms
-        self.histArray = self.addSlicedHistograms(self.histArray)
+        arr = self.addSlicedHistograms(arr)
         # ** D. Add timing histograms --> need more automatic way to incorporate...
         h_allChannel_timing = TH1D("h_allChannel_timing", "h_allChannel_timing", 60, 0, 60)
         h_allChannel_fracFit_timing = TH1D("h_allChannel_fracFit_timing", "h_allChannel_fracFit_timing", 60, 0, 60)
         h_allChannel_timingLogic = TH1D("h_allChannel_timingLogic", "h_allChannel_timingLogic", 4, 0, 4)
+        for iBin, label in enumerate(["Both", "R only", "L only", "None"]):
+            h_allChannel_timingLogic.GetXaxis().SetBinLabel(iBin + 1, label)
         h_allChannel_timingRes = TH1D("h_allChannel_timingRes", "h_allChannel_timingRes", 300, -1500, 1500)
         h_allChannel_fracFit_timingRes = TH1D("h_allChannel_fracFit_timingRes", "h_allChannel_fracFit_timingRes", 300, -1500, 1500)
         #h_allChannel_mcpRef_timingRes = TH1D("h_allChannel_mcpRef_timingRes", "h_allChannel_mcpRef_timingRes", 300, -1500, 1500)
@@ -67,41 +225,41 @@ class barClass:
         h_allChannel_ampFit_percentError = TH1D("h_allChannel_ampFit_percentError", "h_allChannel_ampFit_percentError", 100, -50, 50)
 
         # *** 2. Add non-automated histograms histograms to array
-        self.histArray.AddLast(h_allChannel_timing)
-        self.histArray.AddLast(h_allChannel_timingRes)
-        self.histArray.AddLast(h_allChannel_timingLogic)
-        self.histArray.AddLast(h_allChannel_mcpRef_timingRes)
-        self.histArray.AddLast(h_allChannel_x_vs_timingRes)
-        self.histArray.AddLast(h_allChannel_x_vs_mcpRef_timingRes)
-        self.histArray.AddLast(h_allChannel_fitSlope_vs_mcpRef_timingRes)
-        self.histArray.AddLast(h_allChannel_mcpRef_timingRes_ampWalkCorrected)
-        self.histArray.AddLast(h_allChannel_mcpRef_ampWalkCorrection)
-
-        self.histArray.AddLast(h_allChannel_ampFit_percentError)
-        self.histArray.AddLast(h_allChannel_fracFit_timing)
-        self.histArray.AddLast(h_allChannel_fracFit_timingRes)
-        self.histArray.AddLast(h_allChannel_mcpRef_fracFit_timingRes)
+        arr.book(('allChannel', 'timing'), h_allChannel_timing)
+        arr.book(('allChannel', 'timingRes'), h_allChannel_timingRes)
+        arr.book(('allChannel', 'timingLogic'), h_allChannel_timingLogic)
+        arr.book(('allChannel', 'mcpRef_timingRes'), h_allChannel_mcpRef_timingRes)
+        arr.book(('allChannel', 'x_vs_timingRes'), h_allChannel_x_vs_timingRes)
+        arr.book(('allChannel', 'x_vs_mcpRef_timingRes'), h_allChannel_x_vs_mcpRef_timingRes)
+        arr.book(('allChannel', 'fitSlope_vs_mcpRef_timingRes'), h_allChannel_fitSlope_vs_mcpRef_timingRes)
+        arr.book(('allChannel', 'mcpRef_timingRes_ampWalkCorrected'), h_allChannel_mcpRef_timingRes_ampWalkCorrected)
+        arr.book(('allChannel', 'mcpRef_ampWalkCorrection'), h_allChannel_mcpRef_ampWalkCorrection)
+
+        arr.book(('allChannel', 'ampFit_percentError'), h_allChannel_ampFit_percentError)
+        arr.book(('allChannel', 'fracFit_timing'), h_allChannel_fracFit_timing)
+        arr.book(('allChannel', 'fracFit_timingRes'), h_allChannel_fracFit_timingRes)
+        arr.book(('allChannel', 'mcpRef_fracFit_timingRes'), h_allChannel_mcpRef_fracFit_timingRes)
+
+        # ** E. One set of resolution histograms per CFD fraction
+        for iFrac, fraction in enumerate(self.cfdFractions):
+            cfdName = 'cfd{0:02d}'.format(int(round(100*fraction)))
+            arr.book(('allChannel', 'cfd_timingRes', iFrac), TH1D("h_allChannel_{0}_timingRes".format(cfdName), "h_allChannel_{0}_timingRes".format(cfdName), 300, -1500, 1500))
+            arr.book(('allChannel', 'mcpRef_cfd_timingRes', iFrac), TH1D("h_allChannel_mcpRef_{0}_timingRes".format(cfdName), "h_allChannel_mcpRef_{0}_timingRes".format(cfdName), 350, -3500, 0))
+
+        # ** F. Threshold scan histograms, one per grid point
+        if self.scan is not None:
+            arr = self.scan.bookHistograms(arr)
 
-        # *** 3. Canvases and style
-        if self.runBatch:
-            ROOT.gROOT.SetBatch(True)
-            
-        self.c1 = TCanvas("c1", "c1", 800, 800)
-        self.c2 = TCanvas("c2", "c2", 800, 800)
-        self.c3 = TCanvas("c3", "c3", 800, 800)
-        self.c4 = TCanvas("c4", "c4", 800, 800)
+        return arr
 
-        gStyle.SetOptStat(0000)
+    # =============================
 
-        # *** 4. Make some directories if not already existent
-        if not os.path.isdir(self.topDir):
-            os.system( 'mkdir {0}'.format(self.topDir) )
-        self.topDir = '{0}/{1}'.format(topDir, runType)
-        if not os.path.isdir( '{0}/{1}'.format(topDir, runType) ):
-            os.system( 'mkdir {0}'.format(self.topDir) )
-  
-        # *** 5. Run analysis
-        self.loopEvents()
+    def setVetoOpt(self, vetoOpt):
+        """ function to point histArray, topDir, and vetoOpt at the histogram set + output directory of given veto option"""
+        self.vetoOpt = vetoOpt
+        self.histArray = self.histSets[vetoOpt]
+        self.topDir = self.topDirs[vetoOpt]
+        self.dumper = self.dumpers.get(vetoOpt)
 
     # =============================
 
@@ -112,6 +270,7 @@ class barClass:
         #rightSiPMchannel, leftSiPMchannel, mcpChannel, timeChannel = self.returnChannelNumbers(barNum)
 
         x = -5
+        iSlice = 0
         while x < 35:
             xLow = str(x).replace('-','n')
             xHigh = str(x+self.xSlice).replace('-','n')
@@ -132,24 +291,27 @@ class barClass:
             h_all = TH1D('h_allBar_timingRes_{0}'.format(xBase), 'h_allBar_timingRes_{0}'.format(xBase), 150, -1500, 1500)
             h_all_mcp = TH1D('h_allBar_mcpRef_timingRes_{0}'.format(xBase), 'h_allBar_mcpRef_timingRes_{0}'.format(xBase), 175, -3500, 0)
 
-            arr.AddLast(h_b1)
-            arr.AddLast(h_b2)
-            arr.AddLast(h_b3)
-            arr.AddLast(h_b4)
-            arr.AddLast(h_b5)
-            arr.AddLast(h_b1_mcp)
-            arr.AddLast(h_b2_mcp)
-            arr.AddLast(h_b3_mcp)
-            arr.AddLast(h_b4_mcp)
-            arr.AddLast(h_b5_mcp)
-
-            arr.AddLast(h_all)
-            arr.AddLast(h_all_mcp)
+            # keys: (barNum, quantity, slicedBy, sliceIndex), barNum = 0 for all bars
+            arr.book((1, 'timingRes', 'X', iSlice), h_b1)
+            arr.book((2, 'timingRes', 'X', iSlice), h_b2)
+            arr.book((3, 'timingRes', 'X', iSlice), h_b3)
+            arr.book((4, 'timingRes', 'X', iSlice), h_b4)
+            arr.book((5, 'timingRes', 'X', iSlice), h_b5)
+            arr.book((1, 'mcpRef_timingRes', 'X', iSlice), h_b1_mcp)
+            arr.book((2, 'mcpRef_timingRes', 'X', iSlice), h_b2_mcp)
+            arr.book((3, 'mcpRef_timingRes', 'X', iSlice), h_b3_mcp)
+            arr.book((4, 'mcpRef_timingRes', 'X', iSlice), h_b4_mcp)
+            arr.book((5, 'mcpRef_timingRes', 'X', iSlice), h_b5_mcp)
+
+            arr.book((0, 'timingRes', 'X', iSlice), h_all)
+            arr.book((0, 'mcpRef_timingRes', 'X', iSlice), h_all_mcp)
 
             x += self.xSlice
+            iSlice += 1
 
 
         m = 60
+        iSlice = 0
         while m < 150:
             mLow = str(m)
             mHigh = str(m+self.slopeSlice)
@@ -170,21 +332,22 @@ class barClass:
             h_all_m = TH1D('h_allBar_timingRes_byFitSlope_{0}'.format(mBase), 'h_allBar_timingRes_byFitSlope_{0}'.format(mBase), 150, -1500, 1500)
             h_all_mcp_m = TH1D('h_allBar_mcpRef_timingRes_byFitSlope_{0}'.format(mBase), 'h_allBar_mcpRef_timingRes_byFitSlope_{0}'.format(mBase), 175, -3500, 0)
 
-            arr.AddLast(h_b1_m)
-            arr.AddLast(h_b2_m)
-            arr.AddLast(h_b3_m)
-            arr.AddLast(h_b4_m)
-            arr.AddLast(h_b5_m)
-            arr.AddLast(h_b1_mcp_m)
-            arr.AddLast(h_b2_mcp_m)
-            arr.AddLast(h_b3_mcp_m)
-            arr.AddLast(h_b4_mcp_m)
-            arr.AddLast(h_b5_mcp_m)
+            arr.book((1, 'timingRes', 'Slope', iSlice), h_b1_m)
+            arr.book((2, 'timingRes', 'Slope', iSlice), h_b2_m)
+            arr.book((3, 'timingRes', 'Slope', iSlice), h_b3_m)
+            arr.book((4, 'timingRes', 'Slope', iSlice), h_b4_m)
+            arr.book((5, 'timingRes', 'Slope', iSlice), h_b5_m)
+            arr.book((1, 'mcpRef_timingRes', 'Slope', iSlice), h_b1_mcp_m)
+            arr.book((2, 'mcpRef_timingRes', 'Slope', iSlice), h_b2_mcp_m)
+            arr.book((3, 'mcpRef_timingRes', 'Slope', iSlice), h_b3_mcp_m)
+            arr.book((4, 'mcpRef_timingRes', 'Slope', iSlice), h_b4_mcp_m)
+            arr.book((5, 'mcpRef_timingRes', 'Slope', iSlice), h_b5_mcp_m)
 
-            arr.AddLast(h_all_m)
-            arr.AddLast(h_all_mcp_m)
+            arr.book((0, 'timingRes', 'Slope', iSlice), h_all_m)
+            arr.book((0, 'mcpRef_timingRes', 'Slope', iSlice), h_all_mcp_m)
 
             m += self.slopeSlice
+            iSlice += 1
 
         return arr
 
@@ -225,21 +388,22 @@ class barClass:
 
 
 
-            arr.AddLast(h_b)
-            arr.AddLast(h_b_t)
-            arr.AddLast(h_mcp_chR)
-            arr.AddLast(h_chR_vs_chL)
-            arr.AddLast(h_chR_chL_x_vs_ratio)
-            arr.AddLast(h_b_left)
-            arr.AddLast(h_b_right)
-            arr.AddLast(h_b_sum)
-            arr.AddLast(h_b_diff)
-            arr.AddLast(h_b_chi2)
-            arr.AddLast(h_b_left_out)
-            arr.AddLast(h_b_right_out)
-            arr.AddLast(h_b_sum_out)
-            arr.AddLast(h_b_diff_out)
-            arr.AddLast(h_b_chi2_out)
+            # keys: (barNum, quantity) and (barNum, trackIn/trackOut, quantity)
+            arr.book((barNum, 'b'), h_b)
+            arr.book((barNum, 'b_t'), h_b_t)
+            arr.book((barNum, 'mcpAmp'), h_mcp_chR)
+            arr.book((barNum, 'R_vs_L'), h_chR_vs_chL)
+            arr.book((barNum, 'x_vs_ratio'), h_chR_chL_x_vs_ratio)
+            arr.book((barNum, 'trackIn', 'leftSignalInOtherBars'), h_b_left)
+            arr.book((barNum, 'trackIn', 'rightSignalInOtherBars'), h_b_right)
+            arr.book((barNum, 'trackIn', 'sumSignalInOtherBars'), h_b_sum)
+            arr.book((barNum, 'trackIn', 'diffSignalInOtherBars'), h_b_diff)
+            arr.book((barNum, 'trackIn', 'chi2'), h_b_chi2)
+            arr.book((barNum, 'trackOut', 'leftSignalInOtherBars'), h_b_left_out)
+            arr.book((barNum, 'trackOut', 'rightSignalInOtherBars'), h_b_right_out)
+            arr.book((barNum, 'trackOut', 'sumSignalInOtherBars'), h_b_sum_out)
+            arr.book((barNum, 'trackOut', 'diffSignalInOtherBars'), h_b_diff_out)
+            arr.book((barNum, 'trackOut', 'chi2'), h_b_chi2_out)
 
         return arr
 
@@ -264,16 +428,17 @@ class barClass:
             h_chL_diffRL_vs_time = TProfile('h_ch{0}_diffRL_vs_time'.format(leftSiPMchannel), 'h_ch{0}_diffRL_vs_time'.format(leftSiPMchannel), 60, -1, 1, 35, 45)
             h_chR_chL_over2_diffRL_vs_time = TProfile('h_ch{0}_ch{1}_over2_diffRL_vs_time'.format(rightSiPMchannel, leftSiPMchannel), 'h_ch{0}_ch{1}_over2_diffRL_vs_time'.format(rightSiPMchannel, leftSiPMchannel), 60, -1, 1, 35, 45)
         
-            arr.AddLast(h_chR_x_vs_amp)
-            arr.AddLast(h_chR_x_vs_time)
-            arr.AddLast(h_chR_minusMCP_x_vs_time)
-            arr.AddLast(h_chL_x_vs_amp)
-            arr.AddLast(h_chL_x_vs_time)
-            arr.AddLast(h_chL_minusMCP_x_vs_time)
-
-            arr.AddLast(h_chR_diffRL_vs_time)
-            arr.AddLast(h_chL_diffRL_vs_time)
-            arr.AddLast(h_chR_chL_over2_diffRL_vs_time)
+            # keys: (barNum, quantity), R/L prefix for right/left SiPM
+            arr.book((barNum, 'R_x_vs_amp'), h_chR_x_vs_amp)
+            arr.book((barNum, 'R_x_vs_time'), h_chR_x_vs_time)
+            arr.book((barNum, 'R_minusMCP_x_vs_time'), h_chR_minusMCP_x_vs_time)
+            arr.book((barNum, 'L_x_vs_amp'), h_chL_x_vs_amp)
+            arr.book((barNum, 'L_x_vs_time'), h_chL_x_vs_time)
+            arr.book((barNum, 'L_minusMCP_x_vs_time'), h_chL_minusMCP_x_vs_time)
+
+            arr.book((barNum, 'R_diffRL_vs_time'), h_chR_diffRL_vs_time)
+            arr.book((barNum, 'L_diffRL_vs_time'), h_chL_diffRL_vs_time)
+            arr.book((barNum, 'over2_diffRL_vs_time'), h_chR_chL_over2_diffRL_vs_time)
 
         return arr
 
@@ -310,67 +475,37 @@ class barClass:
 
     # =============================
     
-    def returnVetoDecision(self, event, barNum, vetoOption):
-        """ function to return veto decision given option vetoOption = 'None'/'singleAdj'/'doubleAdj'/'allAdj'/'all'"""
+    def returnVetoBits(self, chunk):
+        """ function to return per-event bitmask of channels not beneath vetoThreshold (bit N <--> amp[N])"""
+
+        vetoBits = np.zeros(chunk.nEvents, dtype=np.int64)
+        channels = set()
+        for option in self.vetoChannels.values():
+            for barChannels in option.values():
+                channels.update(barChannels)
+
+        for ch in channels:
+            vetoBits |= (~(chunk.amp[:, ch] < self.vetoThreshold)).astype(np.int64) << ch
+
+        return vetoBits
+
+    # =============================
+
+    def returnVetoMask(self, chunk, vetoBits, vetoOption):
+        """ function to return (nEvents, 5 bars) boolean mask of vetoed events given vetoOption and bitmask from returnVetoBits"""
 
         if vetoOption == 'none':
-            return False
+            return np.zeros( (chunk.nEvents, 5), dtype=bool)
 
-        # quick veto if >1 track
-        if event.ntracks != 1 or event.chi2 > 10:
-            return True
-        
-        # now go through complete logic
-        if vetoOption == 'singleAdj':
-            if barNum == 1 and event.amp[3] < self.vetoThreshold:
-                return False
-            if barNum == 2 and event.amp[5] < self.vetoThreshold:
-                return False
-            if barNum == 3 and event.amp[10] < self.vetoThreshold:
-                return False
-            if barNum == 4 and event.amp[5] < self.vetoThreshold:
-                return False
-            if barNum == 5 and event.amp[10] < self.vetoThreshold:
-                return False
-        if vetoOption == 'doubleAdj':
-            if barNum == 1 and event.amp[3] < self.vetoThreshold and event.amp[4] < self.vetoThreshold:
-                return False
-            if barNum == 2 and event.amp[5] < self.vetoThreshold and event.amp[6] < self.vetoThreshold:
-                return False
-            if barNum == 3 and event.amp[10] < self.vetoThreshold and event.amp[11] < self.vetoThreshold:
-                return False
-            if barNum == 4 and event.amp[5] < self.vetoThreshold and event.amp[6] < self.vetoThreshold:
-                return False
-            if barNum == 5 and event.amp[10] < self.vetoThreshold and event.amp[11] < self.vetoThreshold:
-                return False
-
-        if vetoOption == 'allAdj':
-            if barNum == 1 and event.amp[3] < self.vetoThreshold and event.amp[4] < self.vetoThreshold:
-                return False
-            if barNum == 2 and event.amp[5] < self.vetoThreshold and event.amp[6] < self.vetoThreshold and event.amp[1] < self.vetoThreshold and event.amp[2] < self.vetoThreshold:
-                return False
-            if barNum == 3 and event.amp[10] < self.vetoThreshold and event.amp[11] < self.vetoThreshold and event.amp[3] < self.vetoThreshold and event.amp[4] < self.vetoThreshold:
-                return False
-            if barNum == 4 and event.amp[5] < self.vetoThreshold and event.amp[6] < self.vetoThreshold and event.amp[12] < self.vetoThreshold and event.amp[13] < self.vetoThreshold:
-                return False
-            if barNum == 5 and event.amp[10] < self.vetoThreshold and event.amp[11] < self.vetoThreshold:
-                return False
-
-        if vetoOption == 'all':
-            if barNum == 1 and event.amp[3] < self.vetoThreshold and event.amp[4] < self.vetoThreshold and event.amp[5] < self.vetoThreshold and event.amp[6] < self.vetoThreshold and event.amp[10] < self.vetoThreshold and event.amp[11] < self.vetoThreshold and event.amp[12] < self.vetoThreshold and event.amp[13] < self.vetoThreshold:
-                return False
-            if barNum == 2 and event.amp[1] < self.vetoThreshold and event.amp[2] < self.vetoThreshold and event.amp[5] < self.vetoThreshold and event.amp[6] < self.vetoThreshold and event.amp[10] < self.vetoThreshold and event.amp[11] < self.vetoThreshold and event.amp[12] < self.vetoThreshold and event.amp[13] < self.vetoThreshold:
-                return False
-            if barNum == 3 and event.amp[1] < self.vetoThreshold and event.amp[2] < self.vetoThreshold and event.amp[3] < self.vetoThreshold and event.amp[4] < self.vetoThreshold and event.amp[10] < self.vetoThreshold and event.amp[11] < self.vetoThreshold and event.amp[12] < self.vetoThreshold and event.amp[13] < self.vetoThreshold:
-                return False
-            if barNum == 4 and event.amp[1] < self.vetoThreshold and event.amp[2] < self.vetoThreshold and event.amp[3] < self.vetoThreshold and event.amp[4] < self.vetoThreshold and event.amp[5] < self.vetoThreshold and event.amp[6] < self.vetoThreshold and event.amp[12] < self.vetoThreshold and event.amp[13] < self.vetoThreshold:
-                return False
-            if barNum == 5 and event.amp[1] < self.vetoThreshold and event.amp[2] < self.vetoThreshold and event.amp[3] < self.vetoThreshold and event.amp[4] < self.vetoThreshold and event.amp[5] < self.vetoThreshold and event.amp[6] < self.vetoThreshold and event.amp[10] < self.vetoThreshold and event.amp[11] < self.vetoThreshold:
-                return False
-
-
-        # if it gets here, means nothing returned, i.e. no logic was settled. veto event
-        return True
+        # if no logic settled for option, veto everything
+        vetoMask = np.ones( (chunk.nEvents, 5), dtype=bool)
+        if vetoOption in self.vetoChannels:
+            badTrack = (chunk.ntracks != 1) | (chunk.chi2 > 10)
+            for barNum, channels in self.vetoChannels[vetoOption].items():
+                barBits = sum(1 << ch for ch in channels)
+                vetoMask[:, barNum-1] = badTrack | ( (vetoBits & barBits) != 0 )
+
+        return vetoMask
 
     
     
@@ -422,13 +557,36 @@ class barClass:
 
     # =============================
 
+    def returnSliceEdges(self, slicedBy):
+        """ function to return slice edges for x-slices (step xSlice from -5 up to 35) or fit-slope slices (step slopeSlice from 60 up to 150)"""
+        s, sMax, sStep = -5, 35, self.xSlice
+        if slicedBy == 'Slope':
+            s, sMax, sStep = 60, 150, self.slopeSlice
+
+        edges = []
+        while s < sMax:
+            edges.append(s)
+            s += sStep
+        edges.append(s) # upper edge of last slice
+
+        return np.array(edges, dtype=np.float64)
+
+    # =============================
+
+    def returnSliceIndex(self, values, slicedBy):
+        """ function to return slice index of each value (-1 if outside of all slices)"""
+        edges = self.returnSliceEdges(slicedBy)
+        sliceIdx = np.digitize(values, edges) - 1
+        sliceIdx[sliceIdx >= len(edges) - 1] = -1 # above last edge or NaN
+
+        return sliceIdx
+
+    # =============================
+
     def inBarZone(self, track_x, track_y, barNum):
-        """ function to return boolean whether hit inside fill bar-specific plots"""
+        """ function to return boolean (or boolean array for array input) whether hit inside fill bar-specific plots"""
         
-        if (abs(track_y - self.yBoundaries[barNum - 1]) <= self.yIntegralOffset) and (track_x >= self.xBoundaries[0]) and (track_x <= self.xBoundaries[ len(self.xBoundaries)-1 ]):
-            return True
-        else:
-            return False
+        return (np.abs(track_y - self.yBoundaries[barNum - 1]) <= self.yIntegralOffset) & (track_x >= self.xBoundaries[0]) & (track_x <= self.xBoundaries[ len(self.xBoundaries)-1 ])
 
     # =============================
 
@@ -451,713 +609,1104 @@ class barClass:
 
     # =============================
 
-    def fillChannelPlots(self, event, barNum, arr):
-        """ function to fill bar-specific plots"""
+    def returnSelectionMask(self, chunk):
+        """ function to return (nEvents, 5 bars) boolean mask of signal window and track cuts for all events in chunk"""
+
+        # =====   pre 08-04-18, asks for signals > signal threshold    =====
+        # =====   08-04-18, asks for signals above vetoThreshold and beneath signal threshold --> remove saturated pulses   =====
+        trackMask = (np.abs(chunk.xSlope) < 0.0004) & (np.abs(chunk.ySlope) < 0.0004) & (chunk.ntracks == 1)
+        selMask = np.zeros( (chunk.nEvents, 5), dtype=bool)
+
+        for barNum in xrange(1, 6):
+            rightSiPMchannel, leftSiPMchannel, mcpChannel, timeChannel = self.returnChannelNumbers(barNum)
+            ampR = chunk.amp[:, rightSiPMchannel]
+            ampL = chunk.amp[:, leftSiPMchannel]
+            selMask[:, barNum-1] = (ampR > self.vetoThreshold) & (ampR < self.signalThreshold) & (ampL > self.vetoThreshold) & (ampL < self.signalThreshold) & trackMask
+
+        return selMask
+
+    # =============================
+
+    def fillChannelPlots(self, chunk, barNum, passMask, arr):
+        """ function to fill bar-specific plots for all events in chunk passing selection (passMask)"""
         
         # calculate channel numbers given bar number --> there is probably a smarter way to automate this with fewer lines
         rightSiPMchannel, leftSiPMchannel, mcpChannel, timeChannel = self.returnChannelNumbers(barNum)
 
-        # logic to see if event should be vetoed based on signals in other bars
-        doVetoEvent = self.returnVetoDecision(event, barNum, self.vetoOpt) # vetoOpt = none, singleAdj, doubleAdj, allAdj, all
-
-        # =====   pre 08-04-18, asks for signals > signal threshold    =====
-        #if (event.amp[rightSiPMchannel] > self.signalThreshold and event.amp[leftSiPMchannel] > self.signalThreshold and not doVetoEvent and abs(event.xSlope) < 0.0004 and abs(event.ySlope) < 0.0004) and event.ntracks == 1:
-        # =====   08-04-18, asks for signals above vetoThreshold and beneath signal threshold --> remove saturated pulses   =====
-        if ( ( (event.amp[rightSiPMchannel] > self.vetoThreshold and event.amp[rightSiPMchannel] < self.signalThreshold and event.amp[leftSiPMchannel] > self.vetoThreshold and event.amp[leftSiPMchannel] < self.signalThreshold) and not doVetoEvent) and abs(event.xSlope) < 0.0004 and abs(event.ySlope) < 0.0004) and event.ntracks == 1:
-            # leakage histograms and profiles
-            arr.FindObject('h_b{0}'.format(barNum)).Fill(event.x_dut[2], event.y_dut[2])
-            arr.FindObject('h_mcp{0}_ch{1}'.format(timeChannel, rightSiPMchannel)).Fill( event.amp[mcpChannel] )
-            arr.FindObject('h_ch{0}_vs_ch{1}'.format(rightSiPMchannel, leftSiPMchannel)).Fill( event.amp[rightSiPMchannel], event.amp[leftSiPMchannel] )
-            arr.FindObject('h_ch{0}_ch{1}_x_vs_ratio'.format(rightSiPMchannel, leftSiPMchannel)).Fill(event.x_dut[2], event.amp[rightSiPMchannel] / event.amp[leftSiPMchannel] )
-            arr.FindObject('h_ch{0}_x_vs_amp'.format(rightSiPMchannel)).Fill(event.x_dut[2], event.amp[rightSiPMchannel] )
-            arr.FindObject('h_ch{0}_x_vs_amp'.format(leftSiPMchannel)).Fill(event.x_dut[2], event.amp[leftSiPMchannel] )
-
-            trackInBar = self.inBarZone(event.x_dut[2], event.y_dut[2], barNum)
-            # test area for hit integral defintion
-            if trackInBar:
-                arr.FindObject('h_b{0}_t'.format(barNum)).Fill(event.x_dut[2], event.y_dut[2])
-
-            # fill leakage breakdown histograms
-            if trackInBar:
-                arr = self.fillLeakageHistograms(arr, event, barNum, 'trackIn')
-            else:
-                arr = self.fillLeakageHistograms(arr, event, barNum, 'trackOut')
-                # fill trace histogram with signal bar waveforms and waveforms from bar with track
+        x_dut = chunk.x_dut[passMask, 2]
+        y_dut = chunk.y_dut[passMask, 2]
+        ampR = chunk.amp[passMask, rightSiPMchannel]
+        ampL = chunk.amp[passMask, leftSiPMchannel]
+
+        # leakage histograms and profiles
+        arr.fill((barNum, 'b'), x_dut, y_dut)
+        arr.fill((barNum, 'mcpAmp'), chunk.amp[passMask, mcpChannel])
+        arr.fill((barNum, 'R_vs_L'), ampR, ampL)
+        arr.fill((barNum, 'x_vs_ratio'), x_dut, ampR / ampL)
+        arr.fill((barNum, 'R_x_vs_amp'), x_dut, ampR)
+        arr.fill((barNum, 'L_x_vs_amp'), x_dut, ampL)
+
+        # test area for hit integral defintion
+        trackInBar = self.inBarZone(x_dut, y_dut, barNum)
+        arr.fill((barNum, 'b_t'), x_dut[trackInBar], y_dut[trackInBar])
+
+        # fill leakage breakdown histograms
+        passIndices = np.flatnonzero(passMask)
+        arr = self.fillLeakageHistograms(arr, chunk, passIndices[trackInBar], barNum, 'trackIn')
+        arr = self.fillLeakageHistograms(arr, chunk, passIndices[~trackInBar], barNum, 'trackOut')
+
+        # queue signal bar waveforms and waveforms from bar with track of every 10th track-out event for the trace dump archive
+        if self.dumper is not None:
+            trackOut = passIndices[~trackInBar]
+            for i in trackOut[chunk.i_evt[trackOut] % 10 == 0]:
+                if self.dumper.isFull():
+                    break
+                event = chunk.event(i)
                 trackBar = self.inWhichBar(event.x_dut[2], event.y_dut[2])
                 if trackBar != 0:
-                    rightSiPMchannel_track, leftSiPMchannel_track, mcpChannel_track, timeChannel_track = self.returnChannelNumbers(trackBar)
-                    if event.i_evt % 10 == 0:
-                        self.drawFourChannelTrace(event.time, event.channel, rightSiPMchannel, leftSiPMchannel, timeChannel, rightSiPMchannel_track, leftSiPMchannel_track, timeChannel_track, event.i_evt) #MIXME --> uncomment for leakage studies
-                        # if signal and track bar separated by one bar, look at intermediate bar too
-                        if abs(trackBar - barNum) == 2:
-                            rightSiPMchannel_mid, leftSiPMchannel_mid, mcpChannel_mid, timeChannel_mid = self.returnChannelNumbers( min(trackBar,barNum)+1 )
-                            self.drawSixChannelTrace(event.time, event.channel, rightSiPMchannel, leftSiPMchannel, timeChannel, rightSiPMchannel_track, leftSiPMchannel_track, timeChannel_track, rightSiPMchannel_mid, leftSiPMchannel_mid, timeChannel_mid, event.i_evt) #MIXME --> uncomment for leakage studies
+                    self.dumpTrackOutTraces(chunk, i, barNum, trackBar)
                             
-            # *** 2. Timing stuff
-            # ** A. Break if no timing analysis requested
-            if not self.doTiming:
-                return arr
-
-            # ** B. Calculate times
-            #mipTime_R, fitSlope_R, mipTime_R_ampWalkCorrected = self.getTimingForChannel(event.time, event.channel, timeChannel, rightSiPMchannel, event.i_evt)
-            #mipTime_L, fitSlope_L, mipTime_L_ampWalkCorrected = self.getTimingForChannel(event.time, event.channel, timeChannel, leftSiPMchannel, event.i_evt)
-            
-            # ====   March TB   =====
-            fitStartTime_R, fitStartVoltage_R, fitSlope_R, ampFitPercentErr_R, mipTime_fracFit_R = self.getTimingForChannel(event.time, event.channel, timeChannel, rightSiPMchannel, event.i_evt)
-            fitStartTime_L, fitStartVoltage_L, fitSlope_L, ampFitPercentErr_L, mipTime_fracFit_L = self.getTimingForChannel(event.time, event.channel, timeChannel, leftSiPMchannel, event.i_evt)
-            mipTime_MCP = event.t_peak[mcpChannel]
-            if fitSlope_R == 0:
-                mipTime_R = 0
-            else:
-                mipTime_R = fitStartTime_R + (self.fitVoltageForTiming - fitStartVoltage_R)/fitSlope_R
-                
-            if fitSlope_L == 0:
-                mipTime_L = 0
-            else:
-                mipTime_L = fitStartTime_L + (self.fitVoltageForTiming - fitStartVoltage_L)/fitSlope_L
+        # *** 2. Timing stuff
+        # ** A. Break if no timing analysis requested
+        if not self.doTiming:
+            return arr
 
-            # ====    May TB    =====
-            mipTime_MCP = event.gaus_mean[mcpChannel]
-            mipTime_L   = event.LP1_5[leftSiPMchannel]
-            mipTime_R   = event.LP1_5[rightSiPMchannel]
+        arr = self.fillTimingPlots(chunk, passIndices, barNum, arr)
 
+        return arr
 
-            if mipTime_R != 0 and mipTime_L != 0:
-                arr.FindObject('h_ch{0}_x_vs_time'.format(rightSiPMchannel)).Fill(event.x_dut[2], mipTime_R)
-                arr.FindObject('h_ch{0}_x_vs_time'.format(leftSiPMchannel)).Fill(event.x_dut[2], mipTime_L)
+    # =============================
 
-                arr.FindObject('h_ch{0}_diffRL_vs_time'.format(rightSiPMchannel)).Fill((mipTime_R - mipTime_L), mipTime_R )
-                arr.FindObject('h_ch{0}_diffRL_vs_time'.format(leftSiPMchannel)).Fill((mipTime_R - mipTime_L), mipTime_L )
-                arr.FindObject('h_ch{0}_ch{1}_over2_diffRL_vs_time'.format(rightSiPMchannel, leftSiPMchannel)).Fill((mipTime_R - mipTime_L), (mipTime_L + mipTime_R)/2 )
-                
-                arr.FindObject('h_allChannel_timingLogic').Fill("Both",1)
-                arr.FindObject('h_allChannel_ampFit_percentError').Fill(100*ampFitPercentErr_L)
-                arr.FindObject('h_allChannel_ampFit_percentError').Fill(100*ampFitPercentErr_R)
-
-                deltaT         = 1000*(mipTime_L - mipTime_R) # multiple by 1000 to transfer from ns to ps
-                deltaT_fracFit = 1000*(mipTime_fracFit_L - mipTime_fracFit_R) # multiple by 1000 to transfer from ns to ps
-                arr.FindObject('h_allChannel_x_vs_timingRes').Fill(event.x_dut[2], deltaT)
-                #if event.x_dut[2] > 5 and event.x_dut[2] < 25 and event.amp[rightSiPMchannel] > self.fitSignalThreshold: # keep it central
-                arr.FindObject('h_allChannel_timingRes').Fill( deltaT ) 
-                arr.FindObject('h_allChannel_timing').Fill(mipTime_L)
-                arr.FindObject('h_allChannel_timing').Fill(mipTime_R)
-
-                arr.FindObject('h_allChannel_fracFit_timingRes').Fill( deltaT_fracFit ) 
-                arr.FindObject('h_allChannel_fracFit_timing').Fill(mipTime_fracFit_L)
-                arr.FindObject('h_allChannel_fracFit_timing').Fill(mipTime_fracFit_R)
-                # *** fill x-slice plots
-                x = -5
-                while x < 35:
-                    xLow = str(x).replace('-','n')
-                    xHigh = str(x+self.xSlice).replace('-','n')
-                    xBase = '{0}_to_{1}'.format(xLow, xHigh)
-                    if event.x_dut[2] >= x and event.x_dut[2] < x+self.xSlice:
-                        #arr.FindObject('h_ch{0}_timingRes_{1}'.format(rightSiPMchannel, xBase)).Fill( deltaT )
-                        arr.FindObject('h_b{0}_timingRes_{1}'.format(barNum, xBase)).Fill( deltaT )
-                        arr.FindObject('h_allBar_timingRes_{0}'.format(xBase)).Fill( deltaT )
-                    x += self.xSlice
-
-                # *** fill slope-slice plots
-                m = 60
-                while m < 150:
-                    mLow = str(m)
-                    mHigh = str(m+self.slopeSlice)
-                    mBase = '{0}_to_{1}'.format(mLow, mHigh)
-
-                    if fitSlope_R >= m and fitSlope_R < m+self.slopeSlice:
-                        arr.FindObject('h_b{0}_timingRes_byFitSlope_{1}'.format(barNum, mBase)).Fill( deltaT )
-                        arr.FindObject('h_allBar_timingRes_byFitSlope_{0}'.format(mBase)).Fill( deltaT )
-                    if fitSlope_L >= m and fitSlope_L < m+self.slopeSlice:
-                        arr.FindObject('h_b{0}_timingRes_byFitSlope_{1}'.format(barNum, mBase)).Fill( deltaT )
-                        arr.FindObject('h_allBar_timingRes_byFitSlope_{0}'.format(mBase)).Fill( deltaT )
-                    # !!!! slopes are usually not in same slice! investigate later
-                    #if fitSlope_R >= m and fitSlope_R < m+self.slopeSlice and fitSlope_L >= m and fitSlope_L < m+self.slopeSlice:
-                    #    arr.FindObject('h_allBar_timingRes_byFitSlope_{0}'.format(mBase)).Fill( deltaT )
-
-                    m += self.slopeSlice
+    def fillTimingPlots(self, chunk, indices, barNum, arr):
+        """ function to calculate timing for selected chunk events (indices) and fill bar-specific timing plots"""
+
+        # calculate channel numbers given bar number --> there is probably a smarter way to automate this with fewer lines
+        rightSiPMchannel, leftSiPMchannel, mcpChannel, timeChannel = self.returnChannelNumbers(barNum)
+
+        if len(indices) == 0:
+            return arr
+
+        # ** B. Calculate times
+        #mipTime_R, fitSlope_R, mipTime_R_ampWalkCorrected = self.getTimingForChannel(event.time, event.channel, timeChannel, rightSiPMchannel, event.i_evt)
+        #mipTime_L, fitSlope_L, mipTime_L_ampWalkCorrected = self.getTimingForChannel(event.time, event.channel, timeChannel, leftSiPMchannel, event.i_evt)
+        
+        # ====   March TB   =====
+        # fits only depend on event + bar --> compute once and reuse for all veto options
+        # fit windows of all not yet cached events found in one scan per channel
+        # all not yet cached events of a channel go through the fits together
+        todo = np.array([i for i in indices if (chunk.firstEntry + i, barNum) not in self.timingCache], dtype=np.int64)
+        if self.skim is not None:
+            # results of earlier runs with same timing config
+            found, skim_R, skim_L = self.skim.returnBarTiming(chunk.firstEntry + todo, barNum)
+            for k in np.nonzero(found)[0]:
+                self.timingCache[(chunk.firstEntry + todo[k], barNum)] = (skim_R[k], skim_L[k])
+            todo = todo[~found]
+        newTiming_R = self.getTimingForChannels(chunk.time[todo, timeChannel], chunk.channel[todo, rightSiPMchannel], rightSiPMchannel, chunk.i_evt[todo])
+        newTiming_L = self.getTimingForChannels(chunk.time[todo, timeChannel], chunk.channel[todo, leftSiPMchannel], leftSiPMchannel, chunk.i_evt[todo])
+        for k, i in enumerate(todo):
+            self.timingCache[(chunk.firstEntry + i, barNum)] = (newTiming_R[k], newTiming_L[k])
+        self.dumpFitInfo(chunk.i_evt[indices], rightSiPMchannel)
+        self.dumpFitInfo(chunk.i_evt[indices], leftSiPMchannel)
+        # columns: fitStartTime, fitStartVoltage, fitSlope, ampFitPercentErr, mipTime_fracFit, then one CFD time per cfdFractions entry
+        timing_R = np.array([self.timingCache[(chunk.firstEntry + i, barNum)][0] for i in indices], dtype=np.float64)
+        timing_L = np.array([self.timingCache[(chunk.firstEntry + i, barNum)][1] for i in indices], dtype=np.float64)
+        fitStartTime_R, fitStartVoltage_R, fitSlope_R, ampFitPercentErr_R, mipTime_fracFit_R = timing_R[:, :5].T
+        fitStartTime_L, fitStartVoltage_L, fitSlope_L, ampFitPercentErr_L, mipTime_fracFit_L = timing_L[:, :5].T
+        mipTime_cfd_R = timing_R[:, 5:5 + len(self.cfdFractions)]
+        mipTime_cfd_L = timing_L[:, 5:5 + len(self.cfdFractions)]
+        mipTime_MCP = chunk.t_peak[indices, mcpChannel]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mipTime_R = np.where(fitSlope_R == 0, 0, fitStartTime_R + (self.fitVoltageForTiming - fitStartVoltage_R)/fitSlope_R)
+            mipTime_L = np.where(fitSlope_L == 0, 0, fitStartTime_L + (self.fitVoltageForTiming - fitStartVoltage_L)/fitSlope_L)
+
+        # ====    May TB    =====
+        mipTime_MCP = chunk.gaus_mean[indices, mcpChannel].astype(np.float64)
+        mipTime_L   = chunk.LP1_5[indices, leftSiPMchannel].astype(np.float64)
+        mipTime_R   = chunk.LP1_5[indices, rightSiPMchannel].astype(np.float64)
+        x_dut = chunk.x_dut[indices, 2]
+        ampMCP = chunk.amp[indices, mcpChannel]
+
+        # *** C. Events with both times
+        both = (mipTime_R != 0) & (mipTime_L != 0)
+        x_both = x_dut[both]
+        tR = mipTime_R[both]
+        tL = mipTime_L[both]
+        arr.fill((barNum, 'R_x_vs_time'), x_both, tR)
+        arr.fill((barNum, 'L_x_vs_time'), x_both, tL)
+
+        arr.fill((barNum, 'R_diffRL_vs_time'), (tR - tL), tR )
+        arr.fill((barNum, 'L_diffRL_vs_time'), (tR - tL), tL )
+        arr.fill((barNum, 'over2_diffRL_vs_time'), (tR - tL), (tL + tR)/2 )
+            
+        arr.fill(('allChannel', 'ampFit_percentError'), 100*ampFitPercentErr_L[both])
+        arr.fill(('allChannel', 'ampFit_percentError'), 100*ampFitPercentErr_R[both])
+
+        deltaT         = 1000*(tL - tR) # multiple by 1000 to transfer from ns to ps
+        deltaT_fracFit = 1000*(mipTime_fracFit_L[both] - mipTime_fracFit_R[both]) # multiple by 1000 to transfer from ns to ps
+        arr.fill(('allChannel', 'x_vs_timingRes'), x_both, deltaT)
+        arr.fill(('allChannel', 'timingRes'), deltaT ) 
+        arr.fill(('allChannel', 'timing'), tL)
+        arr.fill(('allChannel', 'timing'), tR)
+
+        arr.fill(('allChannel', 'fracFit_timingRes'), deltaT_fracFit ) 
+        arr.fill(('allChannel', 'fracFit_timing'), mipTime_fracFit_L[both])
+        arr.fill(('allChannel', 'fracFit_timing'), mipTime_fracFit_R[both])
+
+        # *** fill CFD plots, all fractions from the same fits
+        self.fillCFDPlots(arr, mipTime_cfd_R, mipTime_cfd_L, mipTime_MCP, both & (mipTime_MCP != 0) & (ampMCP > 80) & (ampMCP < 160))
+
+        # *** fill threshold scan plots, MCP waveforms fitted only when scanning
+        if self.scan is not None:
+            self.fillScanPlots(arr, chunk, indices, barNum, timing_R[:, 5 + len(self.cfdFractions):], timing_L[:, 5 + len(self.cfdFractions):], (ampMCP > 80) & (ampMCP < 160))
+
+        # *** fill x-slice and slope-slice plots
+        xSliceIdx = self.returnSliceIndex(x_both, 'X')
+        slopeSliceIdx_R = self.returnSliceIndex(fitSlope_R[both], 'Slope')
+        slopeSliceIdx_L = self.returnSliceIndex(fitSlope_L[both], 'Slope')
+        arr = self.fillSlices(arr, barNum, 'timingRes', 'X', xSliceIdx, deltaT)
+        arr = self.fillSlices(arr, barNum, 'timingRes', 'Slope', slopeSliceIdx_R, deltaT)
+        arr = self.fillSlices(arr, barNum, 'timingRes', 'Slope', slopeSliceIdx_L, deltaT)
+        # !!!! slopes are usually not in same slice! investigate later
+            
+        # *** D. Do timing resolution with MCP info ***
+        mcpOK = both & (mipTime_MCP != 0) & (ampMCP > 80) & (ampMCP < 160)
+        if self.skim is not None:
+            isNew = np.in1d(indices, todo)
+            with np.errstate(invalid='ignore'):
+                self.skim.add(chunk.firstEntry + todo, barNum, newTiming_R, newTiming_L,
+                              np.where(both, 1000*(mipTime_L - mipTime_R), np.nan)[isNew], np.where(mcpOK, 1000*(((mipTime_R + mipTime_L)/2) - mipTime_MCP), np.nan)[isNew])
+        if np.any(mcpOK):
+            x_mcp = x_dut[mcpOK]
+            tR = mipTime_R[mcpOK]
+            tL = mipTime_L[mcpOK]
+            tMCP = mipTime_MCP[mcpOK]
+            slopeAvg = (fitSlope_L[mcpOK] + fitSlope_R[mcpOK])/2
+            deltaT_mcp = 1000*(((tR + tL)/2) - tMCP) # multiple by 1000 to transfer from ns to ps
+            deltaT_mcp_fracFit = 1000*(((mipTime_fracFit_R[mcpOK] + mipTime_fracFit_L[mcpOK])/2) - tMCP) # multiple by 1000 to transfer from ns to ps
+            arr.fill(('allChannel', 'x_vs_mcpRef_timingRes'), x_mcp, deltaT_mcp)
+            arr.fill(('allChannel', 'mcpRef_timingRes'), deltaT_mcp )
+            arr.fill(('allChannel', 'mcpRef_fracFit_timingRes'), deltaT_mcp_fracFit )
+            arr.fill(('allChannel', 'timing'), tMCP)
+            arr.fill(('allChannel', 'fitSlope_vs_mcpRef_timingRes'), slopeAvg, deltaT_mcp)
                 
-                # *** Do timing resolution with MCP info ***
-                if mipTime_MCP != 0 and event.amp[mcpChannel] > 80 and event.amp[mcpChannel] < 160:
-                    deltaT_mcp = 1000*(((mipTime_R + mipTime_L)/2) - mipTime_MCP) # multiple by 1000 to transfer from ns to ps
-                    deltaT_mcp_fracFit = 1000*(((mipTime_fracFit_R + mipTime_fracFit_L)/2) - mipTime_MCP) # multiple by 1000 to transfer from ns to ps
-                    arr.FindObject('h_allChannel_x_vs_mcpRef_timingRes').Fill(event.x_dut[2], deltaT_mcp)
-                    #if event.x_dut[2] > 5 and event.x_dut[2] < 25 and event.amp[rightSiPMchannel] > self.fitSignalThreshold: # keep it central
-                    arr.FindObject('h_allChannel_mcpRef_timingRes').Fill( deltaT_mcp )
-                    arr.FindObject('h_allChannel_mcpRef_fracFit_timingRes').Fill( deltaT_mcp_fracFit )
-                    arr.FindObject('h_allChannel_timing').Fill(mipTime_MCP)
-                    #arr.FindObject('h_allChannel_fitSlope_vs_mcpRef_timingRes').Fill(fitSlope_R, deltaT_mcp)
-                    #arr.FindObject('h_allChannel_fitSlope_vs_mcpRef_timingRes').Fill(fitSlope_L, deltaT_mcp)
-                    arr.FindObject('h_allChannel_fitSlope_vs_mcpRef_timingRes').Fill( (fitSlope_L+fitSlope_R)/2, deltaT_mcp)
-                    
-                    arr.FindObject('h_ch{0}_minusMCP_x_vs_time'.format(rightSiPMchannel)).Fill(event.x_dut[2], mipTime_R - mipTime_MCP)
-                    arr.FindObject('h_ch{0}_minusMCP_x_vs_time'.format(leftSiPMchannel)).Fill(event.x_dut[2], mipTime_L - mipTime_MCP)
-
-                    # *** fill x-slice plots w/ mcp data
-                    x = -5
-                    while x < 35:
-                        xLow = str(x).replace('-','n')
-                        xHigh = str(x+self.xSlice).replace('-','n')
-                        xBase = '{0}_to_{1}'.format(xLow, xHigh)
-                        if event.x_dut[2] >= x and event.x_dut[2] < x+self.xSlice:
-                            arr.FindObject('h_b{0}_mcpRef_timingRes_{1}'.format(barNum, xBase)).Fill( deltaT_mcp )
-                            arr.FindObject('h_allBar_mcpRef_timingRes_{0}'.format(xBase)).Fill( deltaT_mcp )
-                        x += self.xSlice
-                    
-                    # *** fill slope-slice plots
-                    m = 60
-                    while m < 150:
-                        mLow = str(m)
-                        mHigh = str(m+self.slopeSlice)
-                        mBase = '{0}_to_{1}'.format(mLow, mHigh)
-
-                        if fitSlope_R >= m and fitSlope_R < m+self.slopeSlice:
-                            arr.FindObject('h_b{0}_mcpRef_timingRes_byFitSlope_{1}'.format(barNum, mBase)).Fill( deltaT_mcp )
-                            arr.FindObject('h_allBar_mcpRef_timingRes_byFitSlope_{0}'.format(mBase)).Fill( deltaT_mcp )
-                        if fitSlope_L >= m and fitSlope_L < m+self.slopeSlice:
-                            arr.FindObject('h_b{0}_mcpRef_timingRes_byFitSlope_{1}'.format(barNum, mBase)).Fill( deltaT_mcp )
-                            arr.FindObject('h_allBar_mcpRef_timingRes_byFitSlope_{0}'.format(mBase)).Fill( deltaT_mcp )
-                        # !!!! slopes are usually not in same slice! investigate later
-                        #if fitSlope_R >= m and fitSlope_R < m+self.slopeSlice and fitSlope_L >= m and fitSlope_L < m+self.slopeSlice:
-                        #    arr.FindObject('h_allBar_mcpRef_timingRes_byFitSlope_{0}'.format(mBase)).Fill( deltaT_mcp )
-
-                        m += self.slopeSlice
-                        
-                    # ****   amp-walk corrected plots   ****
-                    f_ampWalkCorrection = TF1()
-                    if self.vetoOpt == 'singleAdj':
-                        f_ampWalkCorrection = TF1("slope_ampWalkCorrected", "(-0.004)*x*x*x + (0.357)*x*x + (-13.681)*x + (-2077.244)") # from 50k run using singleAdj veto
-                    if self.vetoOpt == 'doubleAdj' or self.vetoOpt == 'allAdj' or self.vetoOpt == 'all': #FIXME --> should only be doubleAdj but need fix atm
-                        #f_ampWalkCorrection = TF1("slope_ampWalkCorrected", "(-2.3285)*x + (-2053.81)") # from 10k run using doubleAdj veto (using R and L independently)
-                        #f_ampWalkCorrection = TF1("slope_ampWalkCorrected", "(-5.5129)*x + (-1731.97)") # from 10k run using doubleAdj veto (using R+L/2 )
-                        f_ampWalkCorrection = TF1("slope_ampWalkCorrected", "(-4.871)*x + (-1801.585)") # from full run using doubleAdj veto (using R+L/2 )
-
-                    # old approach
-                    """mipTime_R_ampWalkCorrected = fitStartTime_R + (self.fitVoltageForTiming - fitStartVoltage_R)/f_ampWalkCorrected.Eval(deltaT_mcp)
-                    mipTime_L_ampWalkCorrected = fitStartTime_L + (self.fitVoltageForTiming - fitStartVoltage_L)/f_ampWalkCorrected.Eval(deltaT_mcp)
-                    deltaT_mcp_ampWalkCorrected = 1000*(((mipTime_R_ampWalkCorrected + mipTime_L_ampWalkCorrected)/2) - mipTime_MCP) # multiple by 1000 to transfer from ns to ps
-                    #print "fitSlope_R: {0}, walkSlope: {1}".format(fitSlope_R, f_ampWalkCorrected.Eval(deltaT_mcp))
-                    #print "fitSlope_L: {0}, walkSlope: {1}".format(fitSlope_L, f_ampWalkCorrected.Eval(deltaT_mcp))
-                    arr.FindObject('h_allChannel_mcpRef_ampWalkCorrection').Fill( 1000*(mipTime_R - mipTime_R_ampWalkCorrected) )
-                    arr.FindObject('h_allChannel_mcpRef_ampWalkCorrection').Fill( 1000*(mipTime_L - mipTime_L_ampWalkCorrected) )
-                    """
+            arr.fill((barNum, 'R_minusMCP_x_vs_time'), x_mcp, tR - tMCP)
+            arr.fill((barNum, 'L_minusMCP_x_vs_time'), x_mcp, tL - tMCP)
+
+            # *** fill x-slice and slope-slice plots w/ mcp data
+            arr = self.fillSlices(arr, barNum, 'mcpRef_timingRes', 'X', self.returnSliceIndex(x_mcp, 'X'), deltaT_mcp)
+            arr = self.fillSlices(arr, barNum, 'mcpRef_timingRes', 'Slope', self.returnSliceIndex(fitSlope_R[mcpOK], 'Slope'), deltaT_mcp)
+            arr = self.fillSlices(arr, barNum, 'mcpRef_timingRes', 'Slope', self.returnSliceIndex(fitSlope_L[mcpOK], 'Slope'), deltaT_mcp)
                     
-                    # new approach
-                    deltaT_mcp_ampWalkCorrection = f_ampWalkCorrection(110) - f_ampWalkCorrection( (fitSlope_R + fitSlope_L)/2 ) # in ns
-                    arr.FindObject('h_allChannel_mcpRef_ampWalkCorrection').Fill( deltaT_mcp_ampWalkCorrection )
-                    deltaT_mcp_ampWalkCorrected = deltaT_mcp + deltaT_mcp_ampWalkCorrection # multiple by 1000 to transfer from ns to ps
-                    arr.FindObject('h_allChannel_mcpRef_timingRes_ampWalkCorrected').Fill( deltaT_mcp_ampWalkCorrected )
-                    #print "deltaT_mcp: {0}, m~: {1}, correction: {2}, deltaT_mcp_corrected: {3}".format(deltaT_mcp, (fitSlope_R + fitSlope_L)/2, deltaT_mcp_ampWalkCorrection, deltaT_mcp_ampWalkCorrected)
-
-                if mipTime_R == mipTime_L and mipTime_MCP != 0 and event.amp[mcpChannel] > 80 and event.amp[mcpChannel] < 160:
-                    print 'mipTime_R = {0}, mipTime_L = {1}, event: {2}'.format(mipTime_R, mipTime_L, event.i_evt)
-
-            if mipTime_R != 0 and mipTime_L == 0:
-                arr.FindObject('h_allChannel_timingLogic').Fill("R only",1)
-            if mipTime_R == 0 and mipTime_L != 0:
-                arr.FindObject('h_allChannel_timingLogic').Fill("L only",1)
-            if mipTime_R == 0 and mipTime_L == 0:
-                arr.FindObject('h_allChannel_timingLogic').Fill("None",1)
+            # ****   amp-walk corrected plots   ****
+            f_ampWalkCorrection = TF1()
+            if self.vetoOpt == 'singleAdj':
+                f_ampWalkCorrection = TF1("slope_ampWalkCorrected", "(-0.004)*x*x*x + (0.357)*x*x + (-13.681)*x + (-2077.244)") # from 50k run using singleAdj veto
+            if self.vetoOpt == 'doubleAdj' or self.vetoOpt == 'allAdj' or self.vetoOpt == 'all': #FIXME --> should only be doubleAdj but need fix atm
+                #f_ampWalkCorrection = TF1("slope_ampWalkCorrected", "(-2.3285)*x + (-2053.81)") # from 10k run using doubleAdj veto (using R and L independently)
+                #f_ampWalkCorrection = TF1("slope_ampWalkCorrected", "(-5.5129)*x + (-1731.97)") # from 10k run using doubleAdj veto (using R+L/2 )
+                f_ampWalkCorrection = TF1("slope_ampWalkCorrected", "(-4.871)*x + (-1801.585)") # from full run using doubleAdj veto (using R+L/2 )
+
+            # new approach
+            deltaT_mcp_ampWalkCorrection = f_ampWalkCorrection(110) - np.array([f_ampWalkCorrection(m) for m in slopeAvg]) # in ns
+            arr.fill(('allChannel', 'mcpRef_ampWalkCorrection'), deltaT_mcp_ampWalkCorrection )
+            deltaT_mcp_ampWalkCorrected = deltaT_mcp + deltaT_mcp_ampWalkCorrection # multiple by 1000 to transfer from ns to ps
+            arr.fill(('allChannel', 'mcpRef_timingRes_ampWalkCorrected'), deltaT_mcp_ampWalkCorrected )
+
+        for i in np.flatnonzero(mcpOK & (mipTime_R == mipTime_L)):
+            print self.logPrefix + 'mipTime_R = {0}, mipTime_L = {1}, event: {2}'.format(mipTime_R[i], mipTime_L[i], chunk.i_evt[indices[i]])
+
+        # *** E. Bookkeeping of which channels had a time, bins labelled at booking: Both, R only, L only, None
+        arr.fill(('allChannel', 'timingLogic'), 0.5 + (mipTime_L == 0) + 2*(mipTime_R == 0))
+
+        return arr
+
+    # =============================
+
+    def fillCFDPlots(self, arr, mipTime_cfd_R, mipTime_cfd_L, mipTime_MCP, mcpOK):
+        """ function to fill R-L and MCP-referenced resolution histograms for every CFD fraction (columns of mipTime_cfd_R/L, 0 = no time)"""
+        for iFrac in range(len(self.cfdFractions)):
+            tR = mipTime_cfd_R[:, iFrac]
+            tL = mipTime_cfd_L[:, iFrac]
+            bothCFD = (tR != 0) & (tL != 0)
+            arr.fill(('allChannel', 'cfd_timingRes', iFrac), 1000*(tL[bothCFD] - tR[bothCFD])) # multiple by 1000 to transfer from ns to ps
+            mcpCFD = bothCFD & mcpOK
+            arr.fill(('allChannel', 'mcpRef_cfd_timingRes', iFrac), 1000*(((tR[mcpCFD] + tL[mcpCFD])/2) - mipTime_MCP[mcpCFD]))
+
+        return arr
+
+    # =============================
+
+    def fillScanPlots(self, arr, chunk, indices, barNum, scan_R, scan_L, mcpOK):
+        """ function to fit MCP waveforms of selected chunk events (cached per entry + MCP channel) and fill threshold scan plots"""
+        rightSiPMchannel, leftSiPMchannel, mcpChannel, timeChannel = self.returnChannelNumbers(barNum)
+
+        todo = np.array([i for i in indices if (chunk.firstEntry + i, 'MCP', mcpChannel) not in self.timingCache], dtype=np.int64)
+        if self.skim is not None:
+            found, skim_MCP = self.skim.returnMCPTiming(chunk.firstEntry + todo, mcpChannel)
+            for k in np.nonzero(found)[0]:
+                self.timingCache[(chunk.firstEntry + todo[k], 'MCP', mcpChannel)] = skim_MCP[k]
+            todo = todo[~found]
+        newTiming_MCP = self.getTimingForChannels(chunk.time[todo, timeChannel], chunk.channel[todo, mcpChannel], mcpChannel, chunk.i_evt[todo])
+        for k, i in enumerate(todo):
+            self.timingCache[(chunk.firstEntry + i, 'MCP', mcpChannel)] = newTiming_MCP[k]
+        self.dumpFitInfo(chunk.i_evt[indices], mcpChannel)
+        if self.skim is not None:
+            self.skim.addMCP(chunk.firstEntry + todo, mcpChannel, newTiming_MCP)
+        scan_MCP = np.array([self.timingCache[(chunk.firstEntry + i, 'MCP', mcpChannel)] for i in indices], dtype=np.float64)[:, 5 + len(self.cfdFractions):]
+
+        return self.scan.fill(arr, scan_R, scan_L, scan_MCP, mcpOK)
+
+    # =============================
+
+    def fillSlices(self, arr, barNum, quantity, slicedBy, sliceIdx, values):
+        """ function to fill values into bar-specific and all-bar slice histograms given slice index per value (-1 = no slice)"""
+        for iSlice in np.unique(sliceIdx[sliceIdx >= 0]):
+            inSlice = (sliceIdx == iSlice)
+            arr.fill((barNum, quantity, slicedBy, iSlice), values[inSlice])
+            arr.fill((0, quantity, slicedBy, iSlice), values[inSlice])
 
         return arr
 
     # =============================
 
+    def fillChunk(self, chunk):
+        """ function to fill bar-specific plots of all veto options for all events in a chunk"""
+
+        selMask = self.returnSelectionMask(chunk)
+        vetoBits = self.returnVetoBits(chunk)
+        self.timingCache = {}
+        self.fitDumps = {}
+
+        for opt in self.vetoOpts:
+            self.setVetoOpt(opt)
+
+            # logic to see if event should be vetoed based on signals in other bars
+            passMask = selMask & ~self.returnVetoMask(chunk, vetoBits, self.vetoOpt) # vetoOpt = none, singleAdj, doubleAdj, allAdj, all
+
+            barNum = 0
+            while barNum < 5:
+                barNum +=1
+
+                # fill bar information
+                self.histArray = self.fillChannelPlots(chunk, barNum, passMask[:, barNum-1], self.histArray)
+
+    # =============================
+
     def getTimingForChannel(self, time, channel, drs_time, drs_channel, i_evt):
-        """ function to calculate and return information about waveform for fitting"""
-        voltageFromFunction = 0
-        timeStep = 0
-        evalFit = 0
-        fitSlope = 0
-        fitRes = 0
-        slopeRes = 0
-        peakFit_percentError = 0
-        fracTime = 0
-        i = 0
-        l_time = []
-        l_channel = []
-
-        # *** 1. Make arrays of trace information
-        while i < 1024:
-            l_time.append(time[drs_time*1024 + i])
-            l_channel.append(-1*channel[drs_channel*1024 + i])
-            i+=1            
+        """ function to calculate and return information about waveform for fitting. time = (nGroups, 1024) and channel = (nChannels, 1024) views of one event"""
+        return tuple(self.getTimingForChannels(time[drs_time][np.newaxis], channel[drs_channel][np.newaxis], drs_channel, [i_evt])[0])
 
-        
-        # *** 2. Then store a TGraph --> why not in same step? because it doesn't work for unknown reasons
-        g, g_peakFit = self.returnWaveformGraph(time, channel, drs_time, drs_channel, vetoClipping=True)
-        
-        # *** 3. Set up fitting function
-        fn1 = TF1("fn1", self.fitFunction) # get function from user config
-        startFit = self.getWaveformInfo_TOFPET(l_time, l_channel)
+    # =============================
+
+    def getTimingForChannels(self, time, channel, drs_channel, i_evt):
+        """ function to calculate timing info for n waveforms of one DRS channel at once. time + channel = (n, 1024) rows (channel as read),
+            returns (n, 5 + nCFD + nScan) array of (fitStartTime, fitStartVoltage, fitSlope, peakFit_percentError, fracFitRes, CFD times at cfdFractions, threshold scan times), all zero if not good"""
+        isMCP = (drs_channel == 0 or drs_channel == 9)
+        nScan = self.scan.nColumns(isMCP) if self.scan is not None else 0
+        result = np.zeros((len(channel), 5 + len(self.cfdFractions) + nScan))
+
+        # *** 1. Traces (channel flipped to positive pulses) and fit windows
+        l_time = np.atleast_2d(time).astype(np.float64)
+        l_channel = -1*np.atleast_2d(channel).astype(np.float64)
+        startFit, startPeakFit, endPeakFit = self.returnWaveformInfo(time, channel, drs_channel)
         timeWindow = self.fitTimeWindow
-        if drs_channel == 0 or drs_channel == 9:
-            startFit = self.getWaveformInfo_MCP(l_time, l_channel)
+        fitStop = self.fitVoltageForTiming
+        if isMCP:
             timeWindow = self.fitMCPTimeWindow
-        
-
-        # *** 4. Perform fit and extract timing if 'good' waveform
-        if startFit > 1 and (startFit + timeWindow) < 1024: # protection against weird waveforms
-            fn1.SetRange(l_time[startFit], l_time[startFit + timeWindow])
-            g.Fit("fn1", "QR")
-
-            # ** A. Get extrapolated peak amplitude and perform fit
+            fitStop = self.fitMCPVoltageForTiming
+
+        # only 'good' waveforms from here on
+        good = np.flatnonzero((startFit > 1) & (startFit + timeWindow < 1024)) # protection against weird waveforms
+        if len(good) == 0:
+            return result
+        l_time = l_time[good]
+        l_channel = l_channel[good]
+        startFit = startFit[good]
+        startPeakFit = startPeakFit[good]
+        endPeakFit = endPeakFit[good]
+        i_evt = np.asarray(i_evt)[good]
+        rows = np.arange(len(good))
+
+        # *** 2. Leading-edge fits of all waveforms at once
+        params, chi2, ndf = self.fitLeadingEdges(l_time, l_channel, startFit, timeWindow)
+
+        # *** 3. Get extrapolated peak amplitude, peak fit stays per waveform
+        peakAmp = np.zeros(len(good))
+        peakFits = {}
+        for k in rows:
+            g_peakFit = self.returnTraceGraph(l_time[k], l_channel[k], vetoClipping=True)[1]
             fnPeak = TF1("fnPeak", self.peakFitFunction)
-            startPeakFit, endPeakFit = self.getWaveformInfo_peakFit(l_time, l_channel, isLowBias=True)
-            fnPeak.SetRange(l_time[startPeakFit], l_time[endPeakFit])
+            fnPeak.SetRange(l_time[k, startPeakFit[k]], l_time[k, endPeakFit[k]])
             g_peakFit.Fit("fnPeak", "QR")
-            peakAmp = fnPeak.Eval(fnPeak.GetParameter(1))
-            peakFit_percentError = ( max(l_channel)-peakAmp ) / max(l_channel) 
-            fnR = g.GetFunction("fn1")
-
-            # ** B. Numerical solution for timing info
-            fitStop = self.fitVoltageForTiming
-            timeStep = l_time[startFit] # timestamp to start at (use startFit cuz... duh)
-
-            if fnR.Eval(timeStep) > self.fitVoltageThreshold: # sometimes we need to push back start when first point of fit is waay beyond fitThresholdVoltage due to steep risetime
-                while fnR.Eval(timeStep) > self.fitVoltageThreshold: 
-                    timeStep = timeStep - 0.001 
-                    if timeStep < 0:
-                        break
-                        
-            evalFit = timeStep
-
-            if drs_channel == 0 or drs_channel == 9:
-                fitStop = self.fitMCPVoltageForTiming
-                
-            fitRes, fitSlope = self.numericalSolve(fnR, evalFit, 0.001, fitStop)
-            fitVoltage = fnR.Eval(evalFit)
-            if fitSlope != 0:
-                timeDiff = (50.000 - fitVoltage)/fitSlope
-                slopeRes = evalFit + timeDiff
-
-            # ** C. Dump waveform + fit info for visual inspections    
-            if i_evt%500 == 0:
-                self.dumpFitInfo(g, fnR, l_time, l_channel, timeStep, drs_channel, i_evt, g_peakFit, fnPeak, fitRes, fitSlope, slopeRes)
-                
-            if (fitRes - evalFit) < 0.002:
-                print "only one step, evt {0}, startFit: ({1:0.3f}, {2:0.3f}), fitted: ({3:0.3f}, {4:0.3f})".format(i_evt, evalFit, fitVoltage, fitRes, fnR.Eval(fitRes))
-
-            # ** D. START CONST FRAC FIT
-            if peakAmp != 0: # protection against no peak found
-                startFit_constFrac = self.getWaveformInfo_constFrac(l_time, l_channel, peakAmp)
-                fnFrac = TF1("fnFrac", self.fitFunction) # get function from user config
-                fnFrac.SetRange(l_time[startFit_constFrac], l_time[startFit_constFrac + timeWindow])
-                g.Fit("fnFrac", "QR")
-                fnFrac = g.GetFunction("fnFrac")
-                # * i. Numerical solution for timing info
-                fitStop = self.fitPercentForTiming
-                timeStep = l_time[startFit_constFrac] # timestamp to start at (use startFit cuz... duh)
-                
-                # * ii. Get appropriate starting point
-                if fnFrac.Eval(timeStep)/peakAmp > self.fitPercentThreshold: # sometimes we need to push back start when first point of fit is waay beyond fitPercentThreshold due to steep risetime
-                    while fnFrac.Eval(timeStep)/peakAmp > self.fitPercentThreshold: 
-                        timeStep = timeStep - 0.001 
-                        if timeStep < 0:
-                            break
-                evalFracFit = timeStep
+            peakAmp[k] = fnPeak.Eval(fnPeak.GetParameter(1))
+            if i_evt[k]%500 == 0 and any(not dumper.isFull() for dumper in self.dumpers.values()):
+                peakFits[k] = [fnPeak.GetParameter(i) for i in range(fnPeak.GetNpar())]
+        maxAmp = l_channel.max(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            peakFit_percentError = ( maxAmp-peakAmp ) / maxAmp
+
+        # *** 4. Numerical solution for timing info
+        # sometimes we need to push back start when first point of fit is waay beyond fitThresholdVoltage due to steep risetime
+        evalFit = self.pushBackStarts(params, l_time[rows, startFit], self.fitVoltageThreshold)
+        fitRes, fitSlope = self.solveCrossings(params, evalFit, fitStop)
+        fitVoltage = self.evalFits(params, evalFit)
+        slopeRes = np.zeros(len(good))
+        hasSlope = fitSlope != 0
+        slopeRes[hasSlope] = evalFit[hasSlope] + (50.000 - fitVoltage[hasSlope])/fitSlope[hasSlope]
+
+        # ** A. Keep waveform + fit info for visual inspections, queued per vetoOpt by dumpFitInfo
+        for k in sorted(peakFits):
+            self.keepFitInfo(l_time[k], l_channel[k], drs_channel, i_evt[k], params[k], (l_time[k, startFit[k]], l_time[k, startFit[k] + timeWindow]), chi2[k], ndf[k], evalFit[k],
+                             peakFits[k], (l_time[k, startPeakFit[k]], l_time[k, endPeakFit[k]]), fitRes[k], fitSlope[k], slopeRes[k])
+
+        for k in np.flatnonzero((fitRes - evalFit) < 0.002):
+            print self.logPrefix + "only one step, evt {0}, startFit: ({1:0.3f}, {2:0.3f}), fitted: ({3:0.3f}, {4:0.3f})".format(i_evt[k], evalFit[k], fitVoltage[k], fitRes[k], self.evalFits(params[k:k+1], fitRes[k:k+1])[0])
+
+        # *** 5. START CONST FRAC FIT
+        fracFitRes = np.zeros(len(good))
+        fracParams = evalFracFit = np.zeros(0)
+        hasPeak = np.flatnonzero(peakAmp != 0) # protection against no peak found
+        if len(hasPeak) > 0:
+            startFit_constFrac = waveformTools.firstFractionCrossing(l_channel[hasPeak], peakAmp[hasPeak], self.fitPercentThreshold)
+            fracParams = self.fitLeadingEdges(l_time[hasPeak], l_channel[hasPeak], startFit_constFrac, timeWindow)[0]
+            # sometimes we need to push back start when first point of fit is waay beyond fitPercentThreshold due to steep risetime
+            evalFracFit = self.pushBackStarts(fracParams, l_time[hasPeak, startFit_constFrac], self.fitPercentThreshold, peakAmp[hasPeak])
+            fracFitRes[hasPeak] = self.solveCrossings(fracParams, evalFracFit, self.fitPercentForTiming*peakAmp[hasPeak])[0]
+
+        # *** 6. Interpolated constant-fraction times at all cfdFractions in one pass, baseline-corrected pulses + peak fit amplitude
+        cfdTimes = np.zeros((len(good), 0))
+        if len(self.cfdFractions) > 0:
+            cfdChannel = waveformTools.subtractBaseline(l_channel, self.cfdBaselineSamples)
+            cfdAmp = peakAmp - (l_channel - cfdChannel)[:, 0]
+            cfdTimes = np.nan_to_num(waveformTools.cfdTimes(l_time, cfdChannel, np.where(peakAmp != 0, cfdAmp, 0), self.cfdFractions)) # 0 = no time
+
+        # *** 7. Keep good timing results only
+        isGood = (fitRes > evalFit) & (fitRes < evalFit + 35) # something wonky otherwise
+        result[good[isGood], :5 + len(self.cfdFractions)] = np.column_stack([evalFit, fitVoltage, fitSlope, peakFit_percentError, fracFitRes, cfdTimes])[isGood]
+
+        # *** 8. Threshold scan: same fits, solved again for every grid point (own validity check per grid point)
+        if nScan > 0:
+            result[good, 5 + len(self.cfdFractions):] = self.scan.solveGrid(self.solveCrossings, params, evalFit, fitVoltage, fracParams, evalFracFit, hasPeak, peakAmp[hasPeak], isMCP)
+
+        return result
 
-                # * iii. Get numerical solution
-                fracStop = self.fitPercentForTiming
-                fracFitRes, fracFitSlope = self.numericalFracSolve(fnFrac, evalFracFit, 0.001, peakAmp, self.fitPercentForTiming)
+    # =============================
 
-        if fitRes <= evalFit or fitRes >= evalFit + 35: # something wonky --> not good
-            return 0, 0, 0, 0, 0
-        else: # good timing result!
-            return evalFit, fitVoltage, fitSlope, peakFit_percentError, fracFitRes
+    def fitLeadingEdges(self, l_time, l_channel, startFit, timeWindow):
+        """ function to fit fitFunction over samples startFit to startFit+timeWindow of every waveform (rows) in one go,
+            ROOT fit only for windows outside the trace or fits that did not converge. returns params, chi2, ndf"""
+        n, nSamples = l_channel.shape
+        rows = np.arange(n)
+        inTrace = (startFit >= 0) & (startFit + timeWindow < nSamples)
+        cols = np.clip(startFit[:, np.newaxis] + np.arange(timeWindow + 1), 0, nSamples - 1)
 
-    # =============================
+        params, chi2, status = fitEngine.fitWindows(self.fitFunction, l_time[rows[:, np.newaxis], cols], l_channel[rows[:, np.newaxis], cols])
+        nPar = TF1("fn1", self.fitFunction).GetNpar()
+        if params.shape[1] != nPar:
+            params = np.zeros((n, nPar))
+        ndf = np.full(n, timeWindow + 1 - nPar)
 
-    def dumpFitInfo(self, graph, fit, time, channel, timeStep, drs_channel, i_evt, graphPeak, fitPeak, fitRes, fitSlope, slopeRes):
-        """ function to print canvas with lots of fit stuff """
+        for k in np.flatnonzero(~inTrace | (status != 0)):
+            params[k], chi2[k], ndf[k] = self.fitWindowROOT(l_time[k], l_channel[k], l_time[k, startFit[k]], l_time[k, min(startFit[k] + timeWindow, nSamples - 1)])
+
+        return params, chi2, ndf
 
-        c5 = TCanvas("c5", "c5", 800, 800)
-        p1 = TPad("p1", "p1", 0.0, 0.0, 1.0, 1.0)
-        p1.Draw()
-        p1.cd()
-        graph.Draw()
-        
-        # Make inset for leading edge
-        ltxIn = TLatex()
-        ltxIn.SetTextAlign(9)
-        ltxIn.SetTextFont(62)
-        ltxIn.SetTextSize(0.021)
-        ltxIn.SetNDC()
-        ltxIn.DrawLatex(0.66, 0.81, "Leading Edge Inset")
-        p2 =  TPad("p1", "p1", 0.6, 0.5, 0.9, 0.8)
-        p2.Draw()
-        p2.cd()
-        # produce inset graph directly from data
-        inset = TGraph()       
-        n_inset = 0
-        i = 0
-        while i < 1024:
-            if time[i] > timeStep - 2 and time[i] < timeStep + 0.3:
-                inset.SetPoint(n_inset, time[i], channel[i])        
-                n_inset += 1
-            i=i+1
-
-        inset.Draw()
-        #fit.Draw("same")
-        fit.DrawF1(timeStep - 2.3, timeStep + 0.2, "same")
-        
-        l1= TLine(inset.GetXaxis().GetXmin(),0,inset.GetXaxis().GetXmax(),0);
-        l1.SetLineStyle(2);
-        l1.SetLineWidth(3);
-        l1.SetLineColor(600+2);
-        l1.Draw("same");
-        
-        c5.Update()
-        c5.Print( "{0}/waveformPlusPol1Fit_Ch{1}_Evt{2}.png".format(self.topDir, drs_channel, i_evt) )
-        
-        # draw graph without saturated peak
-        c5.cd()
-        graphPeak.Draw()
-        graphPeak.GetYaxis().SetRangeUser(1.4*min(channel), 1.2*fitPeak.Eval(fitPeak.GetParameter(1)))
-        fitPeak.Draw("same")
-        ltxIn = TLatex()
-        ltxIn.SetTextAlign(9)
-        ltxIn.SetTextFont(62)
-        ltxIn.SetTextSize(0.021)
-        ltxIn.SetNDC()
-        ltxIn.DrawLatex(0.66, 0.81, "t(max): {0:0.3f} [Fit]".format(fitPeak.GetParameter(1)))
-        ltxIn.DrawLatex(0.66, 0.785, "A(max): {0:0.1f} [Fit]".format(fitPeak.Eval(fitPeak.GetParameter(1))))
-        ltxIn.DrawLatex(0.66, 0.76, "A(max): {0:0.1f} [Real]".format(max(channel)))
-        
-        c5.Print( "{0}/waveformWithoutSaturation_Ch{1}_Evt{2}.png".format(self.topDir, drs_channel, i_evt) )
-        
-        print 'Fit Result = {0}, Fit Slope = {1}'.format(fitRes, fitSlope)
-        print 'Lin Result = {0}'.format(slopeRes)
-        print 'Lin Amp = {0}, Fit Amp = {1}'.format(fit.Eval(slopeRes), fit.Eval(fitRes))
-        print 'Chi2 / NDF = {0:0.1f} / {1:0.1f} = {2:0.1f}'.format(fit.GetChisquare(), fit.GetNDF(), fit.GetChisquare()/fit.GetNDF() ) 
-        
-        
     # =============================
 
-    def getWaveformInfo(self, time, channel):
-        """ function to calculate and return information about waveform for fitting"""
+    def fitWindowROOT(self, l_time, l_channel, xMin, xMax):
+        """ function to fit fitFunction to one trace between xMin and xMax with ROOT, returns params, chi2, ndf"""
+        g = TGraph(len(l_time), l_time, l_channel)
+        fn1 = TF1("fn1", self.fitFunction) # get function from user config
+        fn1.SetRange(xMin, xMax)
+        g.Fit("fn1", "QR")
+        fnR = g.GetFunction("fn1")
+        if not fnR: # no points in range
+            fnR = fn1
 
-        # there are probably better ways to do all of this in python...
-        maxADC = maxADC_stamp = threshold_stamp = -1
-        i = 0
+        return [fnR.GetParameter(i) for i in range(fnR.GetNpar())], fnR.GetChisquare(), fnR.GetNDF()
 
-        # first find max
-        for reading in channel:
-            if reading > maxADC:
-                maxADC = reading
-                maxADC_stamp = i
-            i += 1
+    # =============================
 
-        print maxADC, 'at', maxADC_stamp
-        
-        i=0
-        # second find first reading above percent threshold i.e. place to start fit
-        for reading in channel:
-            if reading/maxADC > self.fitPercentThreshold and threshold_stamp == -1:
-                threshold_stamp = i
-            i += 1
+    def returnFitFunction(self, name, params, xMin, xMax, chi2=0, ndf=0):
+        """ function to return TF1 of fitFunction with fitted parameters, e.g. for drawing"""
+        fn = TF1(name, self.fitFunction, xMin, xMax)
+        fn.SetParameters(np.asarray(params, dtype=np.float64))
+        fn.SetChisquare(chi2)
+        fn.SetNDF(int(ndf))
+
+        return fn
+
+    # =============================
 
-        #print 'thresh met at', threshold_stamp, 'with', channel[threshold_stamp]
+    def evalFits(self, params, x):
+        """ function to evaluate fitFunction with parameters params (n, nPar) at x (n)"""
+        if self.fitFunction in thresholdSolver.analyticFunctions:
+            return thresholdSolver.evalFunction(self.fitFunction, params, x)
 
-        return threshold_stamp
+        return np.array([self.returnFitFunction("fnEval", p, 0, 1).Eval(xi) for p, xi in zip(params, x)])
 
     # =============================
 
-    def getWaveformInfo_constFrac(self, time, channel, maxAmp):
-        """ function to calculate and return information about waveform for fitting"""
+    def solveCrossings(self, params, xStart, yEnd, x_step=0.001):
+        """ function to return where fitted functions (params) first reach yEnd going forward from xStart + fit slopes (thresholdSolver)"""
+        if self.fitFunction in thresholdSolver.analyticFunctions:
+            return thresholdSolver.solveCrossing(self.fitFunction, params, xStart, yEnd, x_step, legacyStep=self.timingLegacyStep)
+
+        yEnd = np.broadcast_to(yEnd, (len(params),))
+        solutions = [thresholdSolver.solveCrossingGeneric(self.returnFitFunction("fnEval", p, 0, 1).Eval, x, y, x_step, legacyStep=self.timingLegacyStep) for p, x, y in zip(params, xStart, yEnd)]
 
-        # there are probably better ways to do all of this in python...
-        threshold_stamp = -1
-        i = 0
+        return np.array([s[0] for s in solutions]), np.array([s[1] for s in solutions])
 
-        # find first reading above voltage threshold i.e. place to start fit
-        for reading in channel:
-            if abs(reading)/maxAmp > self.fitPercentThreshold and threshold_stamp == -1:
-                threshold_stamp = i
-            i = i + 1
+    # =============================
 
-        #print 'thresh met at', threshold_stamp, 'with', channel[threshold_stamp]
+    def pushBackStarts(self, params, timeStart, threshold, fracDenom=1, x_step=0.001):
+        """ function to move fit starts back (in x_step steps) until fitted function/fracDenom drops below threshold or time gets negative"""
+        fracDenom = np.broadcast_to(np.asarray(fracDenom, dtype=np.float64), (len(params),))
+        timeStart = np.array(timeStart, dtype=np.float64)
 
-        return threshold_stamp
+        vectorized = np.zeros(len(params), dtype=bool)
+        if self.fitFunction in thresholdSolver.analyticFunctions:
+            vectorized = fracDenom > 0
+            timeStart[vectorized] = thresholdSolver.pushBackStart(self.fitFunction, params[vectorized], timeStart[vectorized], threshold*fracDenom[vectorized], x_step)
+
+        for k in np.flatnonzero(~vectorized):
+            fn = self.returnFitFunction("fnEval", params[k], 0, 1)
+            timeStart[k] = thresholdSolver.pushBackStartGeneric(lambda x: fn.Eval(x)/fracDenom[k], timeStart[k], threshold, x_step)
+
+        return timeStart
 
     # =============================
 
-    def getWaveformInfo_TOFPET(self, time, channel):
-        """ function to calculate and return information about waveform for fitting"""
+    def keepFitInfo(self, l_time, l_channel, drs_channel, i_evt, params, fitRange, chi2, ndf, timeStep, peakParams, peakFitRange, fitRes, fitSlope, slopeRes):
+        """ function to keep trace (pulse positive) with leading-edge fit + peak fit of a fitted waveform until dumpFitInfo queues it for every vetoOpt"""
+        info = {'kind': 'fitInfo', 'drs_channel': int(drs_channel), 'i_evt': int(i_evt),
+                'fitFunction': self.fitFunction, 'params': [float(p) for p in params], 'fitRange': [float(x) for x in fitRange], 'chi2': float(chi2), 'ndf': float(ndf),
+                'peakFitFunction': self.peakFitFunction, 'peakParams': [float(p) for p in peakParams], 'peakFitRange': [float(x) for x in peakFitRange],
+                'voltageVeto': float(self.returnVoltageVeto(l_channel)), 'timeStep': float(timeStep), 'fitRes': float(fitRes), 'fitSlope': float(fitSlope), 'slopeRes': float(slopeRes)}
+        self.fitDumps[(int(i_evt), int(drs_channel))] = (info, l_time, l_channel)
 
-        # there are probably better ways to do all of this in python...
-        threshold_stamp = -1
-        i = 0
+    # =============================
+
+    def dumpFitInfo(self, i_evt, drs_channel):
+        """ function to queue kept fit info of events i_evt (passing the current vetoOpt) for drawing by drawTraceDumps.py, fits may have been done for an earlier vetoOpt"""
+        if self.dumper is None:
+            return
+        for evt in i_evt[i_evt%500 == 0]:
+            if self.dumper.isFull():
+                return
+            if (int(evt), int(drs_channel)) in self.fitDumps:
+                info, l_time, l_channel = self.fitDumps[(int(evt), int(drs_channel))]
+                self.dumper.dump(dict(info, vetoOpt=self.vetoOpt), time=l_time, channel=l_channel)
+        
+    # =============================
 
-        # find first reading above voltage threshold i.e. place to start fit
-        for reading in channel:
-            if abs(reading) > self.fitVoltageThreshold and threshold_stamp == -1:
-                threshold_stamp = i
-            i = i + 1
+    def dumpTrackOutTraces(self, chunk, i, barNum, trackBar):
+        """ function to queue signal bar + track bar waveforms (+ bar in between if separated by one) of a track-out event for drawing by drawTraceDumps.py"""
+        rightSiPMchannel, leftSiPMchannel, mcpChannel, timeChannel = self.returnChannelNumbers(barNum)
+        rightSiPMchannel_track, leftSiPMchannel_track, mcpChannel_track, timeChannel_track = self.returnChannelNumbers(trackBar)
+        channels = [rightSiPMchannel, leftSiPMchannel, rightSiPMchannel_track, leftSiPMchannel_track]
+        timeChannels = [timeChannel, timeChannel, timeChannel_track, timeChannel_track]
+        # if signal and track bar separated by one bar, look at intermediate bar too
+        if abs(trackBar - barNum) == 2:
+            rightSiPMchannel_mid, leftSiPMchannel_mid, mcpChannel_mid, timeChannel_mid = self.returnChannelNumbers( min(trackBar,barNum)+1 )
+            channels += [rightSiPMchannel_mid, leftSiPMchannel_mid]
+            timeChannels += [timeChannel_mid, timeChannel_mid]
+
+        time, channel = chunk.waveforms(i) # read for this event alone if waveforms are not loaded (no timing)
+        info = {'kind': 'trackOut', 'vetoOpt': self.vetoOpt, 'i_evt': int(chunk.i_evt[i]), 'barNum': barNum, 'trackBar': trackBar, 'channels': channels, 'timeChannels': timeChannels}
+        self.dumper.dump(info, time=time[timeChannels], channel=-1*channel[channels])
 
-        #print 'thresh met at', threshold_stamp, 'with', channel[threshold_stamp]
+    # =============================
 
-        return threshold_stamp
+    def openDumpers(self):
+        """ function to create trace dump writer of every vetoOpt, archive next to its plots. with checkpoints: one part archive per checkpoint interval, continued after a resume"""
+        if self.maxDumps <= 0:
+            return
+        for opt in self.vetoOpts:
+            nQueued, iPart = self.dumpStates.get(opt, [0, 0 if self.checkpointFile is not None else None])
+            self.dumpers[opt] = traceDumps.traceDumper('{0}/traceDumps{1}.npz'.format(self.topDirs[opt], self.dumpTag), self.maxDumps, nQueued=nQueued, iPart=iPart)
+        self.setVetoOpt(self.vetoOpt)
 
     # =============================
 
-    def getWaveformInfo_peakFit(self, time, channel, isLowBias=False):
-        """ function to calculate and return information about waveform for fitting"""
+    def closeDumpers(self):
+        """ function to finish trace dump archives (waits for queued dumps)"""
+        for opt in self.vetoOpts:
+            if opt in self.dumpers:
+                self.dumpers[opt].close(self.logPrefix)
+        self.dumpers = {}
+        self.setVetoOpt(self.vetoOpt)
 
-        # there are probably better ways to do all of this in python...
-        rise_timestamp = -1
-        fall_timestamp = -1
-        previousPoint = 0
-        i = 0
-        
+    # =============================
+
+    def returnPeakFitWindows(self, time, channel, isLowBias=False):
+        """ function to return rise and fall sample per waveform of 2D (waveforms x samples) time + channel arrays"""
         if isLowBias:
-            maxVal = max(channel)
+            maxVal = channel.max(axis=1)
             riseThreshold = 0.4*maxVal
             fallThreshold = 0.85*maxVal
         else:
             riseThreshold = self.peakFitRiseThreshold
             fallThreshold = self.peakFitFallThreshold
 
-        # find first reading above voltage threshold i.e. place to start fit
-        for reading in channel:
-            if abs(reading) > riseThreshold and rise_timestamp == -1:
-                rise_timestamp = i
-                fall_timestamp = 0 # start to look for falling
-            #if fall_timestamp == 0 and abs(reading) < fallThreshold and abs(reading) < abs(previousPoint):
-            if fall_timestamp == 0 and abs(reading) < fallThreshold and time[i] > time[channel.index(max(channel))]:
-                fall_timestamp = i
-        
-            previousPoint = reading
+        return waveformTools.riseAndFall(time, channel, riseThreshold, fallThreshold)
+
+    # =============================
 
-            i = i + 1
+    def returnWaveformInfo(self, time, channel, drs_channel):
+        """ function to return fit start, peak-fit rise, and peak-fit fall samples for 2D (events x samples) time + raw channel arrays of one DRS channel in one go"""
+        time = np.atleast_2d(time)
+        channel = -1*np.atleast_2d(channel).astype(np.float64)
 
-        #print 'rise at', rise_timestamp, 'with', channel[rise_timestamp]
-        #print 'fall at', fall_timestamp, 'with', channel[fall_timestamp]
+        if drs_channel == 0 or drs_channel == 9:
+            startFit = waveformTools.firstCrossing(channel, self.fitMCPVoltageThreshold)
+        else:
+            startFit = waveformTools.firstCrossing(channel, self.fitVoltageThreshold)
+        startPeakFit, endPeakFit = self.returnPeakFitWindows(time, channel, isLowBias=True)
 
-        return rise_timestamp, fall_timestamp
+        return startFit, startPeakFit, endPeakFit
 
     # =============================
+    
+    def loopEvents(self):
+        """ function looping over all events in file, reading chunkSize entries at a time"""
+
+        # ** A. Histograms already filled by other jobs or an earlier fill stage, draw only
+        if self.mergedFile is not None or self.inputHistFile is not None:
+            self.readHistograms()
+            self.drawAll()
+            return
 
-    def getWaveformInfo_MCP(self, time, channel):
-        """ function to calculate and return information about waveform for fitting"""
+        print self.logPrefix + str(self.tree.GetEntries())
+        nTotal=0
+        nStart = 0
+        nStop = -1
+        if self.isTest:
+            nStop = testEntries
+        if self.entryRange is not None:
+            nStart, nStop = self.entryRange
+        self.filledRange = [nStart, self.tree.GetEntries() if nStop < 0 else min(nStop, self.tree.GetEntries())]
+        if self.skimDir is not None and self.doTiming:
+            self.skim = timingSkim(self.skimDir, self.returnTimingConfig(), self.returnInputFiles(), self.returnFileEntries(), self.workerName)
+
+        if self.nWorkers > 1 and self.entryRange is None:
+            self.fillParallel(nStop)
+        else:
+            # ** B. Continue after last checkpoint, chunks keep the same boundaries as an uninterrupted run
+            nNext = nStart
+            if self.resume:
+                nNext = self.readCheckpoint()
+                nTotal = nNext - nStart
+            lastCheckpoint = (nNext, time.time())
+
+            self.openDumpers()
+            reader = self.returnReader(self.tree, nNext, self.filledRange[1])
+            for chunk in reader.iterChunks(nNext, nStop):
+                self.fillChunk(chunk)
+
+                if (nTotal + chunk.nEvents)/10000 > nTotal/10000:
+                    print self.logPrefix + str(nTotal + chunk.nEvents), "processed"
+                nTotal += chunk.nEvents
+
+                nNext = chunk.firstEntry + chunk.nEvents
+                if self.isCheckpointDue(nNext - lastCheckpoint[0], time.time() - lastCheckpoint[1]):
+                    self.writeCheckpoint(nNext)
+                    if self.skim is not None:
+                        self.skim.saveNew()
+                    lastCheckpoint = (nNext, time.time())
+
+            if self.skim is not None:
+                self.skim.save()
+            self.closeDumpers()
 
-        # there are probably better ways to do all of this in python...
-        threshold_stamp = -1
-        i = 0
+       # end filling loop     
 
-        # find first reading above voltage threshold i.e. place to start fit
-        for reading in channel:
-            if abs(reading) > self.fitMCPVoltageThreshold and threshold_stamp == -1:
-                threshold_stamp = i
-            i = i + 1
+        # write numpy-accumulated bin contents into ROOT histograms before drawing
+        for opt in self.vetoOpts:
+            self.histSets[opt].flush()
 
-        #print 'thresh met at', threshold_stamp, 'with', channel[threshold_stamp]
+        # workers hand their histograms to the parent, drawing happens after merging
+        if self.entryRange is not None or self.partialFile is not None:
+            self.writePartials()
+        if self.entryRange is not None:
+            return
 
-        return threshold_stamp
+        # fill stage output, plots can be redrawn from it with renderPlots.py
+        if self.histFile is not None:
+            partialFiles.writeHistFile(self.histFile, [ (opt, self.histSets[opt], self.returnConfig(opt)) for opt in self.vetoOpts ])
+            print '-- Wrote histograms of {0} to {1}'.format(', '.join(self.vetoOpts), self.histFile)
+        if not self.render:
+            return
+
+        self.drawAll()
 
     # =============================
-    
-    def loopEvents(self):
-        """ function looping over all events in file"""
 
-        print self.tree.GetEntries()
-        nTotal=0
+    def drawAll(self):
+        """ function to draw plots (+ threshold scan summary) of every veto option"""
+        if self.renderWorkers > 1:
+            self.drawParallel()
+        else:
+            for opt in self.vetoOpts:
+                self.setVetoOpt(opt)
+                self.drawPlots()
 
-        for event in self.tree:        
-            if nTotal > 10000 and self.isTest:
-                break
+        if self.scan is not None:
+            for opt in self.vetoOpts:
+                self.setVetoOpt(opt)
+                self.scan.writeSummary(self.histArray, self.topDir, self.c4)
 
-            nTotal += 1
-            if (nTotal % 10000 == 0):
-                print nTotal, "processed"
+    # =============================
 
-            
-            # fill bar information
-            self.histArray = self.fillChannelPlots(event, 1, self.histArray) # bar 1
-            self.histArray = self.fillChannelPlots(event, 2, self.histArray) # bar 2
-            self.histArray = self.fillChannelPlots(event, 3, self.histArray) # bar 3
-            self.histArray = self.fillChannelPlots(event, 4, self.histArray) # bar 4
-            self.histArray = self.fillChannelPlots(event, 5, self.histArray) # bar 5
+    def drawSelected(self, patterns):
+        """ function to draw only plots whose name (returnPlotName) matches one of the shell-style patterns, e.g. ['h_b[1-5]', 'mcp_amplitudes']"""
+        for opt in self.vetoOpts:
+            self.setVetoOpt(opt)
+            for plot in self.returnPlotList():
+                if any( fnmatch.fnmatch(self.returnPlotName(plot), pattern) for pattern in patterns ):
+                    self.drawPlot(plot)
 
-       # end filling loop     
+    # =============================
 
-        self.draw2Dbar(self.c1, self.histArray.FindObject('h_b1'), 1)
-        self.draw2Dbar(self.c1, self.histArray.FindObject('h_b2'), 2)
-        self.draw2Dbar(self.c1, self.histArray.FindObject('h_b3'), 3)
-        self.draw2Dbar(self.c1, self.histArray.FindObject('h_b4'), 4)
-        self.draw2Dbar(self.c1, self.histArray.FindObject('h_b5'), 5)
-        self.draw2Dbar(self.c1, self.histArray.FindObject('h_b1_t'), 1, "test")
-        self.draw2Dbar(self.c1, self.histArray.FindObject('h_b2_t'), 2, "test")
-        self.draw2Dbar(self.c1, self.histArray.FindObject('h_b3_t'), 3, "test")
-        self.draw2Dbar(self.c1, self.histArray.FindObject('h_b4_t'), 4, "test")
-        self.draw2Dbar(self.c1, self.histArray.FindObject('h_b5_t'), 5, "test")
-        
-        self.c2.cd()
-        self.c2.SetLeftMargin(0.15)
-        self.c2.SetRightMargin(0.05)
-        self.c2.SetBottomMargin(0.10)
-        self.c2.SetTopMargin(0.05)
+    def returnPlotName(self, plot):
+        """ function to return name of plot list entry for selecting it: name of the histogram drawn, or of the output file for plots combining several"""
+        methodName, canvasName, plotArgs = plot
+        if methodName == 'drawMCPAmplitudes':
+            return 'mcp_amplitudes'
+        if methodName == 'drawAmpFitError':
+            return 'h_allChannel_ampFit_percentError'
+        if methodName == 'drawTripleProfile':
+            return 'bar{0}_tripleProfile_timing_vs_x'.format(plotArgs[0])
+        if methodName == 'drawTimingResSlices':
+            barNum, slicedBy, usingMCP = plotArgs[1:]
+            return 'h_{0}_{1}timingRes_by{2}Slice'.format('b{0}'.format(barNum) if barNum != 0 else 'allBar', 'mcpRef_' if usingMCP else '', slicedBy)
+        if isinstance(plotArgs[0], str):
+            return plotArgs[0]
+
+        return plotArgs[0].GetName()
+
+    # =============================
+
+    def drawParallel(self):
+        """ function to draw plot lists of all veto options with renderWorkers forked processes, plots dealt out round-robin so the expensive fits spread evenly"""
+        global renderJob
+        plots = []
+        for opt in self.vetoOpts:
+            self.setVetoOpt(opt)
+            plots += [ (opt, plot) for plot in self.returnPlotList() ]
+
+        nWorkers = min(self.renderWorkers, len(plots))
+        print '-- Drawing {0} plots with {1} worker processes'.format(len(plots), nWorkers)
+        renderJob = (self, plots)
+        pool = multiprocessing.Pool(nWorkers)
+        try:
+            pool.map(drawPlotSlice, [ (k, nWorkers) for k in range(nWorkers) ])
+        finally:
+            pool.close()
+            pool.join()
+            renderJob = None
+
+    # =============================
+
+    def makeCanvases(self, tag=''):
+        """ function to create canvases c1-c4, tag keeps names unique per render worker"""
+        self.c1 = TCanvas("c1"+tag, "c1"+tag, 800, 800)
+        self.c2 = TCanvas("c2"+tag, "c2"+tag, 800, 800)
+        self.c3 = TCanvas("c3"+tag, "c3"+tag, 800, 800)
+        self.c4 = TCanvas("c4"+tag, "c4"+tag, 800, 800)
+        # plots on c4 that set no margins rely on the ones left by the profile/resolution plots drawn before them
+        self.c4.SetLeftMargin(0.15)
+        self.c4.SetRightMargin(0.05)
+        self.c4.SetBottomMargin(0.10)
+        self.c4.SetTopMargin(0.10)
+
+    # =============================
+
+    def fillParallel(self, nStop=-1):
+        """ function to fill histograms with nWorkers processes, each reading its own contiguous entry range, and merge their partial files bin by bin"""
+        nEntries = self.tree.GetEntries()
+        if nStop >= 0:
+            nEntries = min(nEntries, nStop)
+        edges = [nEntries*k/self.nWorkers for k in range(self.nWorkers + 1)]
+        self.returnWaveformStore(self.tree, 0, nEntries) # refuse before starting workers
+
+        # ** A. Workers need file(s) + tree name, everything else as configured here
+        fileNames = self.returnInputFiles()
+        checkpointOpts = {'checkpointFile': self.checkpointFile, 'checkpointEvents': self.checkpointEvents, 'checkpointSeconds': self.checkpointSeconds, 'resume': self.resume, 'skimDir': self.skimDir,
+                          'waveformStoreDir': self.waveformStoreDir, 'cfdFractions': self.cfdFractions, 'maxDumps': max(1, self.maxDumps/self.nWorkers) if self.maxDumps > 0 else 0}
+        jobs = [ (fileNames, self.tree.GetName(), self.runType, self.topDirTemplate, self.vetoOpts, self.doTiming, self.isTest, self.chunkSize, self.scan,
+                  (edges[k], edges[k+1]), 'worker{0:03d}'.format(k), checkpointOpts) for k in range(self.nWorkers) if edges[k+1] > edges[k] ]
+        print '-- Filling {0} entries with {1} worker processes'.format(nEntries, len(jobs))
+        pool = multiprocessing.Pool(len(jobs))
+        partials = pool.map(fillEntryRange, jobs)
+        pool.close()
+        pool.join()
+        if self.skim is not None:
+            self.skim.mergeParts()
+
+        # ** B. Merge in entry order
+        for opt in self.vetoOpts:
+            for partial in partials:
+                f = TFile(partial[opt], 'READ')
+                self.histSets[opt].merge(f)
+                f.Close()
+
+    # =============================
+
+    def returnWaveformSource(self):
+        """ function to return where waveforms are read from: 'tree', or sample type + scale of the waveform store"""
+        if self.waveformStoreDir is None:
+            return 'tree'
+        info = waveformStore(self.waveformStoreDir).info
+
+        return {'dtype': info['dtype'], 'scale': info['scale']}
+
+    # =============================
+
+    def returnWaveformStore(self, tree, firstEntry, lastEntry):
+        """ function to return waveform store of waveformStoreDir (None if not set), refused unless exported from this input and holding every entry of [firstEntry, lastEntry)"""
+        if self.waveformStoreDir is None:
+            return None
+        store = waveformStore(self.waveformStoreDir)
+        store.checkInput(self.returnInputFiles(), tree.GetEntries())
+        store.checkRange(firstEntry, lastEntry)
+
+        return store
+
+    # =============================
+
+    def returnReader(self, tree, firstEntry, lastEntry):
+        """ function to return chunk reader of tree reading only the branches of enabled analysis stages (no waveforms without timing), waveforms from waveformStoreDir if set"""
+        store = self.returnWaveformStore(tree, firstEntry, lastEntry)
+        reader = eventReader(tree, returnBranches(self.doTiming), self.chunkSize, store)
+        print self.logPrefix + '-- Reading branches {0}, cache {1:0.1f} MB'.format(', '.join(reader.branches), reader.cacheSize/1e6)
+        if store is not None:
+            print self.logPrefix + '-- Reading waveforms from {0} ({1} samples)'.format(self.waveformStoreDir, store.info['dtype'])
+
+        return reader
+
+    # =============================
+
+    def fillNewEntries(self, tree, fileName):
+        """ function to fill entries of tree appended since the last call for fileName (liveProgress), histograms flushed after. returns number of entries filled"""
+        nStart = self.liveProgress.get(fileName, 0)
+        nEntries = tree.GetEntries()
+        if nEntries <= nStart:
+            return 0
+
+        reader = self.returnReader(tree, nStart, nEntries)
+        for chunk in reader.iterChunks(nStart, nEntries):
+            self.fillChunk(chunk)
+            self.liveProgress[fileName] = chunk.firstEntry + chunk.nEvents
+        for opt in self.vetoOpts:
+            self.histSets[opt].flush()
+
+        return nEntries - nStart
+
+    # =============================
+
+    def isCheckpointDue(self, nSince, secondsSince):
+        """ function to decide if a checkpoint is written after nSince events / secondsSince seconds since the last one"""
+        if self.checkpointFile is None:
+            return False
+
+        return (self.checkpointEvents > 0 and nSince >= self.checkpointEvents) or (self.checkpointSeconds > 0 and secondsSince >= self.checkpointSeconds)
+
+    # =============================
+
+    def returnCheckpointTag(self):
+        """ function to return string identifying settings + entry range of this loop, a checkpoint is only used if it matches"""
+        configs = [ dict( (key, value) for key, value in self.returnConfig(opt).items() if key not in partialFiles.jobKeys ) for opt in self.vetoOpts ]
+
+        return json.dumps({'configs': configs, 'filledRange': self.filledRange, 'chunkSize': self.chunkSize}, sort_keys=True)
+
+    # =============================
+
+    def writeCheckpoint(self, nNext):
+        """ function to save histogram state of all vetoOpts + next entry to checkpointFile. written to a temporary file + renamed, a crash never leaves a broken checkpoint"""
+        # finished part archives hold all dumps up to here, a resumed job continues with the next part
+        for opt in self.dumpers:
+            self.dumpers[opt].rollover(self.logPrefix)
+        dumpStates = dict( (opt, dumper.returnState()) for opt, dumper in self.dumpers.items() )
+        state = { 'nextEntry' : np.array([nNext], dtype=np.int64), 'tag' : np.array(self.returnCheckpointTag()), 'liveProgress' : np.array(json.dumps(self.liveProgress)),
+                  'dumpStates' : np.array(json.dumps(dumpStates)) }
+        for iOpt, opt in enumerate(self.vetoOpts):
+            state.update(self.histSets[opt].getState('opt{0}'.format(iOpt)))
+
+        checkpointDir = os.path.dirname(self.checkpointFile)
+        if checkpointDir != '':
+            makeDirs(checkpointDir)
+        tmpFile = '{0}.tmp'.format(self.checkpointFile)
+        with open(tmpFile, 'wb') as f:
+            np.savez(f, **state)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmpFile, self.checkpointFile)
+        print self.logPrefix + '-- Checkpoint at entry {0} written to {1}'.format(nNext, self.checkpointFile)
+
+    # =============================
+
+    def readCheckpoint(self):
+        """ function to restore histogram state from checkpointFile and return entry to continue from (start of range if there is no checkpoint yet)"""
+        if self.checkpointFile is None or not os.path.isfile(self.checkpointFile):
+            print self.logPrefix + '#### No checkpoint to resume from, starting at entry {0} ####'.format(self.filledRange[0])
+            return self.filledRange[0]
+
+        state = np.load(self.checkpointFile)
+        if str(state['tag']) != self.returnCheckpointTag():
+            raise ValueError('checkpoint {0} was written with different settings or entry range, refusing to resume'.format(self.checkpointFile))
+        for iOpt, opt in enumerate(self.vetoOpts):
+            self.histSets[opt].setState(state, 'opt{0}'.format(iOpt))
+        nNext = int(state['nextEntry'][0])
+        if 'liveProgress' in state.files:
+            self.liveProgress = json.loads(str(state['liveProgress']))
+        if 'dumpStates' in state.files:
+            self.dumpStates = json.loads(str(state['dumpStates']))
+        state.close()
+        print self.logPrefix + '-- Resuming from checkpoint {0} at entry {1}'.format(self.checkpointFile, nNext)
+
+        return nNext
+
+    # =============================
+
+    def writePartials(self):
+        """ function to write histograms + config of every vetoOpt to a partial-result file (partialFile, or one named after this worker)"""
+        for opt in self.vetoOpts:
+            if self.partialFile is not None and self.entryRange is None:
+                self.partialFiles[opt] = self.partialFile.format(opt)
+            else:
+                self.partialFiles[opt] = '{0}/partials/{1}.root'.format(self.topDirs[opt], self.workerName)
+            partialDir = os.path.dirname(self.partialFiles[opt])
+            if partialDir != '':
+                makeDirs(partialDir)
+            partialFiles.writePartial(self.partialFiles[opt], self.histSets[opt], self.returnConfig(opt))
+            print self.logPrefix + '-- Wrote {0} histograms to {1}'.format(opt, self.partialFiles[opt])
+
+    # =============================
+
+    def returnConfig(self, opt):
+        """ function to return settings of this job for vetoOpt (opt) as stored in partial-result files"""
+        config = dict( (key, getattr(self, key)) for key in self.configKeys )
+        config['vetoOpt'] = opt
+        config['scan'] = None
+        if self.scan is not None:
+            config['scan'] = {'voltages': self.scan.voltages, 'mcpVoltages': self.scan.mcpVoltages, 'fractions': self.scan.fractions}
+        # job bookkeeping, combined when merging
+        config['entryRanges'] = [self.filledRange]
+        config['inputFiles'] = self.returnInputFiles()
+        config['jobNames'] = [self.workerName]
+
+        return config
+
+    # =============================
+
+    def returnTimingConfig(self):
+        """ function to return settings the per-event timing products depend on, hashed with each input file to name its timing skim"""
+        config = dict( (key, getattr(self, key)) for key in self.timingConfigKeys )
+        config['scan'] = None
+        if self.scan is not None:
+            config['scan'] = {'voltages': self.scan.voltages, 'mcpVoltages': self.scan.mcpVoltages, 'fractions': self.scan.fractions}
+
+        return config
+
+    # =============================
+
+    def returnFileEntries(self):
+        """ function to return number of entries of each input file (order of returnInputFiles), chain entries run through them one after the other"""
+        if not isinstance(self.tree, TChain):
+            return [self.tree.GetEntries()]
+        fileEntries = []
+        for fileName in self.returnInputFiles():
+            f = TFile.Open(fileName, 'READ')
+            fileEntries.append(f.Get(self.tree.GetName()).GetEntries())
+            f.Close()
+
+        return fileEntries
+
+    # =============================
+
+    def returnInputFiles(self):
+        """ function to return names of input files: all files of a TChain, the file of a TTree, files followed so far in live monitoring"""
+        if self.tree is None:
+            return sorted(self.liveProgress)
+        if isinstance(self.tree, TChain):
+            return [element.GetTitle() for element in self.tree.GetListOfFiles()]
+
+        return [self.tree.GetCurrentFile().GetName()]
+
+    # =============================
+
+    def readHistograms(self):
+        """ function to fill histogram sets from merged partial-result files (mergedFile) or a fill stage histogram file (inputHistFile), refused if their settings differ from this job"""
+        for opt in self.vetoOpts:
+            fileName = self.mergedFile.format(opt) if self.mergedFile is not None else self.inputHistFile
+            dirName = opt if self.mergedFile is None else ''
+            differences = partialFiles.returnIncompatibilities(partialFiles.readConfig(fileName, dirName), self.returnConfig(opt))
+            if len(differences) > 0:
+                raise ValueError( 'config of {0} does not match this job:\n{1}'.format(fileName, '\n'.join('  {0}: {1} vs {2}'.format(*d) for d in differences)) )
+
+            f = TFile(fileName, 'READ')
+            self.histSets[opt].merge(f.GetDirectory(dirName) if dirName else f)
+            f.Close()
+            print '-- Read {0} histograms from {1}'.format(opt, fileName)
+
+    # =============================
+
+    def drawPlots(self):
+        """ function to draw and print all plots of current veto option"""
+        for plot in self.returnPlotList():
+            self.drawPlot(plot)
+
+    # =============================
+
+    def drawPlot(self, plot):
+        """ function to draw one entry (method name, canvas name, arguments) of the plot list"""
+        methodName, canvasName, plotArgs = plot
+        getattr(self, methodName)(getattr(self, canvasName), *plotArgs)
+
+    # =============================
+
+    def returnPlotList(self):
+        """ function to return all plots of current veto option as (method name, canvas name, arguments), in drawing order. every entry prints its own file"""
+        plots = []
+
+        # ** A. Hit maps, MCP amplitudes, R vs L
+        for test in ["", "test"]:
+            for barNum in range(1, 6):
+                plots.append( ('draw2Dbar', 'c1', (self.histArray.get((barNum, 'b_t' if test else 'b')), barNum, test)) )
+        plots.append( ('drawMCPAmplitudes', 'c2', ()) )
+        for barNum in range(1, 6):
+            plots.append( ('drawLvsRinBar', 'c3', (self.histArray.get((barNum, 'R_vs_L')), barNum)) )
+
+        # ** B. Amplitude profiles + leakage into other bars
+        for barNum in range(1, 6):
+            plots.append( ('drawSingleProfile', 'c4', (self.histArray.get((barNum, 'x_vs_ratio')), barNum, 'Right/Left')) )
+        for barNum in range(1, 6):
+            plots.append( ('drawSingleProfile', 'c4', (self.histArray.get((barNum, 'R_x_vs_amp')), barNum, 'Bar {0} Amplitude (Right SiPM)'.format(barNum))) )
+            plots.append( ('drawSingleProfile', 'c4', (self.histArray.get((barNum, 'L_x_vs_amp')), barNum, 'Bar {0} Amplitude (Left SiPM)'.format(barNum))) )
+        for barNum in range(1, 6):
+            plots.append( ('drawTripleProfile', 'c4', (barNum,)) )
+        for trackIn in ['trackIn', 'trackOut']:
+            for quantity in ['right', 'left', 'sum', 'diff']:
+                plots.append( ('drawBarSplits', 'c2', ('h_{0}_b_{1}SignalInOtherBars'.format(trackIn, quantity),)) )
+        for trackIn in ['trackIn', 'trackOut']:
+            plots.append( ('drawBarSplits', 'c2', ('h_{0}_b_chi2'.format(trackIn),)) )
+
+        if not self.doTiming:
+            return plots
+
+        # ** C. Timing
+        for barNum in range(1, 6):
+            plots.append( ('drawSingleProfile', 'c4', (self.histArray.get((barNum, 'R_x_vs_time')), barNum, 'Bar {0} Time (Right SiPM)'.format(barNum))) )
+            plots.append( ('drawSingleProfile', 'c4', (self.histArray.get((barNum, 'L_x_vs_time')), barNum, 'Bar {0} Time (Left SiPM)'.format(barNum))) )
+        plots.append( ('drawAllChannelHist', 'c4', (self.histArray.get(('allChannel', 'timing')), 'h_allChannel_timing')) )
+        plots.append( ('drawAllChannelHist', 'c4', (self.histArray.get(('allChannel', 'fracFit_timing')), 'h_allChannel_fracFit_timing')) )
+
+        plots.append( ('drawResolutionPlot', 'c4', (self.histArray.get(('allChannel', 'timingRes')), False)) )
+        plots.append( ('drawResolutionPlot', 'c4', (self.histArray.get(('allChannel', 'mcpRef_timingRes')), True)) )
+        plots.append( ('drawResolutionPlot', 'c4', (self.histArray.get(('allChannel', 'mcpRef_timingRes_ampWalkCorrected')), True, True)) )
+        plots.append( ('drawResolutionPlot', 'c4', (self.histArray.get(('allChannel', 'fracFit_timingRes')), False, False, True)) )
+        plots.append( ('drawResolutionPlot', 'c4', (self.histArray.get(('allChannel', 'mcpRef_fracFit_timingRes')), True, False, True)) )
+
+        for iFrac in range(len(self.cfdFractions)):
+            plots.append( ('drawCFDResolutionPlot', 'c4', (self.histArray.get(('allChannel', 'cfd_timingRes', iFrac)), iFrac, False)) )
+            plots.append( ('drawCFDResolutionPlot', 'c4', (self.histArray.get(('allChannel', 'mcpRef_cfd_timingRes', iFrac)), iFrac, True)) )
+
+        plots.append( ('drawAmpFitError', 'c4', ()) )
+        plots.append( ('drawAllChannelHist', 'c4', (self.histArray.get(('allChannel', 'mcpRef_ampWalkCorrection')), 'h_allChannel_mcpRef_ampWalkCorrection', '', "Amp Walk Correction [ps]", "Entries / 1 ps")) )
+
+        plots.append( ('drawSingleProfile', 'c4', (self.histArray.get(('allChannel', 'x_vs_timingRes')), 0, 't_{right SiPM} - t_{left SiPM}')) )
+        plots.append( ('drawSingleProfile', 'c4', (self.histArray.get(('allChannel', 'x_vs_mcpRef_timingRes')), 0, '(t_{right SiPM} + t_{left SiPM})/2 - t_{MCP}')) )
+        #plots.append( ('drawSingleProfile', 'c4', (self.histArray.FindObject('h_allChannel_fitSlope_vs_mcpRef_timingRes'), 0, '(t_{right SiPM} + t_{left SiPM})/2 - t_{MCP}', 'slope')) )
+
+        plots.append( ('drawAllChannelHist', 'c4', (self.histArray.get(('allChannel', 'timingLogic')), 'h_allChannel_timingLogic', "TEXT")) )
+
+        for slicedBy in ['X', 'Slope']:
+            for barNum in [1, 2, 3, 4, 5, 0]:
+                plots.append( ('drawTimingResSlices', 'c4', (self.histArray, barNum, slicedBy, False)) )
+                plots.append( ('drawTimingResSlices', 'c4', (self.histArray, barNum, slicedBy, True)) )
+
+        # === function graveyard. keep for reference"
+        #self.drawXquadrants(self.c4, self.histArray.FindObject('h_ch1_ch2_ratio_x1, self.histArray.FindObject('h_ch1_ch2_ratio_x2, self.histArray.FindObject('h_ch1_ch2_ratio_x3, self.histArray.FindObject('h_ch1_ch2_ratio_x4, 1, 'Right/Left')
+        #self.drawXquadrants(self.c4, self.histArray.FindObject('h_ch1_x1, self.histArray.FindObject('h_ch1_x2, self.histArray.FindObject('h_ch1_x3, self.histArray.FindObject('h_ch1_x4, 1, 'Bar 1 [Right SiPM]')
+
+        return plots
+
+    # =============================
+
+    def drawMCPAmplitudes(self, c0):
+        """ function to overlay normalized MCP amplitudes of all bars"""
+        c0.cd()
+        c0.SetLeftMargin(0.15)
+        c0.SetRightMargin(0.05)
+        c0.SetBottomMargin(0.10)
+        c0.SetTopMargin(0.05)
         # kBlack == 1, kRed == 632, kBlue == 600, kGreen == 416, kMagenta == 616
-        self.histArray.FindObject('h_mcp0_ch1').SetLineColor(1) # kBlack
-        self.histArray.FindObject('h_mcp0_ch3').SetLineColor(600) # kBlue
-        self.histArray.FindObject('h_mcp0_ch5').SetLineColor(632) # kRed
-        self.histArray.FindObject('h_mcp1_ch10').SetLineColor(416+2) # kGreen+2
-        self.histArray.FindObject('h_mcp1_ch12').SetLineColor(616-3) # kMagenta-3
+        self.histArray.get((1, 'mcpAmp')).SetLineColor(1) # kBlack
+        self.histArray.get((2, 'mcpAmp')).SetLineColor(600) # kBlue
+        self.histArray.get((3, 'mcpAmp')).SetLineColor(632) # kRed
+        self.histArray.get((4, 'mcpAmp')).SetLineColor(416+2) # kGreen+2
+        self.histArray.get((5, 'mcpAmp')).SetLineColor(616-3) # kMagenta-3
         
-        self.histArray.FindObject('h_mcp0_ch1').SetLineWidth(3) 
-        self.histArray.FindObject('h_mcp0_ch3').SetLineWidth(3) 
-        self.histArray.FindObject('h_mcp0_ch5').SetLineWidth(3) 
-        self.histArray.FindObject('h_mcp1_ch10').SetLineWidth(3) 
-        self.histArray.FindObject('h_mcp1_ch12').SetLineWidth(3) 
+        self.histArray.get((1, 'mcpAmp')).SetLineWidth(3) 
+        self.histArray.get((2, 'mcpAmp')).SetLineWidth(3) 
+        self.histArray.get((3, 'mcpAmp')).SetLineWidth(3) 
+        self.histArray.get((4, 'mcpAmp')).SetLineWidth(3) 
+        self.histArray.get((5, 'mcpAmp')).SetLineWidth(3) 
         
-        self.histArray.FindObject('h_mcp1_ch12').SetYTitle("Noramlized Entries / 20 mV")
-        self.histArray.FindObject('h_mcp1_ch12').SetXTitle("MCP Amplitude [mV]")
-        self.histArray.FindObject('h_mcp1_ch12').SetTitle("")
-        self.histArray.FindObject('h_mcp1_ch12').DrawNormalized()
-        self.histArray.FindObject('h_mcp1_ch12').GetYaxis().SetRangeUser(0,1.6)
+        self.histArray.get((5, 'mcpAmp')).SetYTitle("Noramlized Entries / 20 mV")
+        self.histArray.get((5, 'mcpAmp')).SetXTitle("MCP Amplitude [mV]")
+        self.histArray.get((5, 'mcpAmp')).SetTitle("")
+        self.histArray.get((5, 'mcpAmp')).DrawNormalized()
+        self.histArray.get((5, 'mcpAmp')).GetYaxis().SetRangeUser(0,1.6)
         
-        self.histArray.FindObject('h_mcp0_ch3').DrawNormalized("same")
-        self.histArray.FindObject('h_mcp0_ch5').DrawNormalized("same")
-        self.histArray.FindObject('h_mcp1_ch10').DrawNormalized("same")
-        self.histArray.FindObject('h_mcp0_ch1').DrawNormalized("same")
+        self.histArray.get((2, 'mcpAmp')).DrawNormalized("same")
+        self.histArray.get((3, 'mcpAmp')).DrawNormalized("same")
+        self.histArray.get((4, 'mcpAmp')).DrawNormalized("same")
+        self.histArray.get((1, 'mcpAmp')).DrawNormalized("same")
         
         leg = TLegend(0.5, 0.4, .85, .7);
-        leg.AddEntry(self.histArray.FindObject('h_mcp0_ch1'), "MCP Amplitude: Bar 1 Signal", "l");
-        leg.AddEntry(self.histArray.FindObject('h_mcp0_ch3'), "MCP Amplitude: Bar 2 Signal", "l");
-        leg.AddEntry(self.histArray.FindObject('h_mcp0_ch5'), "MCP Amplitude: Bar 3 Signal", "l");
-        leg.AddEntry(self.histArray.FindObject('h_mcp1_ch10'), "MCP Amplitude: Bar 4 Signal", "l");
-        leg.AddEntry(self.histArray.FindObject('h_mcp1_ch12'), "MCP Amplitude: Bar 5 Signal", "l");
+        leg.AddEntry(self.histArray.get((1, 'mcpAmp')), "MCP Amplitude: Bar 1 Signal", "l");
+        leg.AddEntry(self.histArray.get((2, 'mcpAmp')), "MCP Amplitude: Bar 2 Signal", "l");
+        leg.AddEntry(self.histArray.get((3, 'mcpAmp')), "MCP Amplitude: Bar 3 Signal", "l");
+        leg.AddEntry(self.histArray.get((4, 'mcpAmp')), "MCP Amplitude: Bar 4 Signal", "l");
+        leg.AddEntry(self.histArray.get((5, 'mcpAmp')), "MCP Amplitude: Bar 5 Signal", "l");
         leg.Draw("same");
         
-        self.c2.Print("{0}/mcp_amplitudes.png".format(self.topDir) )
+        c0.Print("{0}/mcp_amplitudes.png".format(self.topDir) )
 
-        self.drawLvsRinBar(self.c3, self.histArray.FindObject('h_ch1_vs_ch2'), 1)
-        self.drawLvsRinBar(self.c3, self.histArray.FindObject('h_ch3_vs_ch4'), 2)
-        self.drawLvsRinBar(self.c3, self.histArray.FindObject('h_ch5_vs_ch6'), 3)
-        self.drawLvsRinBar(self.c3, self.histArray.FindObject('h_ch10_vs_ch11'), 4)
-        self.drawLvsRinBar(self.c3, self.histArray.FindObject('h_ch12_vs_ch13'), 5)
-        
-        
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch1_ch2_x_vs_ratio'), 1, 'Right/Left')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch3_ch4_x_vs_ratio'), 2, 'Right/Left')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch5_ch6_x_vs_ratio'), 3, 'Right/Left')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch10_ch11_x_vs_ratio'), 4, 'Right/Left')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch12_ch13_x_vs_ratio'), 5, 'Right/Left')
-
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch1_x_vs_amp'), 1, 'Bar 1 Amplitude (Right SiPM)')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch2_x_vs_amp'), 1, 'Bar 1 Amplitude (Left SiPM)')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch3_x_vs_amp'), 2, 'Bar 2 Amplitude (Right SiPM)')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch4_x_vs_amp'), 2, 'Bar 2 Amplitude (Left SiPM)')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch5_x_vs_amp'), 3, 'Bar 3 Amplitude (Right SiPM)')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch6_x_vs_amp'), 3, 'Bar 3 Amplitude (Left SiPM)')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch10_x_vs_amp'), 4, 'Bar 4 Amplitude (Right SiPM)')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch11_x_vs_amp'), 4, 'Bar 4 Amplitude (Left SiPM)')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch12_x_vs_amp'), 5, 'Bar 5 Amplitude (Right SiPM)')
-        self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch13_x_vs_amp'), 5, 'Bar 5 Amplitude (Left SiPM)')
-
-        self.drawTripleProfile(self.c4, 1)
-        self.drawTripleProfile(self.c4, 2)
-        self.drawTripleProfile(self.c4, 3)
-        self.drawTripleProfile(self.c4, 4)
-        self.drawTripleProfile(self.c4, 5)
-
-        self.drawBarSplits(self.c2, 'h_trackIn_b_rightSignalInOtherBars')
-        self.drawBarSplits(self.c2, 'h_trackIn_b_leftSignalInOtherBars')
-        self.drawBarSplits(self.c2, 'h_trackIn_b_sumSignalInOtherBars')
-        self.drawBarSplits(self.c2, 'h_trackIn_b_diffSignalInOtherBars')
-        self.drawBarSplits(self.c2, 'h_trackOut_b_rightSignalInOtherBars')
-        self.drawBarSplits(self.c2, 'h_trackOut_b_leftSignalInOtherBars')
-        self.drawBarSplits(self.c2, 'h_trackOut_b_sumSignalInOtherBars')
-        self.drawBarSplits(self.c2, 'h_trackOut_b_diffSignalInOtherBars')
-        self.drawBarSplits(self.c2, 'h_trackIn_b_chi2')
-        self.drawBarSplits(self.c2, 'h_trackOut_b_chi2')
-
-        if self.doTiming:
-            self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch1_x_vs_time'), 1, 'Bar 1 Time (Right SiPM)')
-            self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch2_x_vs_time'), 1, 'Bar 1 Time (Left SiPM)')
-            self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch3_x_vs_time'), 2, 'Bar 2 Time (Right SiPM)')
-            self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch4_x_vs_time'), 2, 'Bar 2 Time (Left SiPM)')
-            self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch5_x_vs_time'), 3, 'Bar 3 Time (Right SiPM)')
-            self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch6_x_vs_time'), 3, 'Bar 3 Time (Left SiPM)')
-            self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch10_x_vs_time'), 4, 'Bar 4 Time (Right SiPM)')
-            self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch11_x_vs_time'), 4, 'Bar 4 Time (Left SiPM)')
-            self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch12_x_vs_time'), 5, 'Bar 5 Time (Right SiPM)')
-            self.drawSingleProfile(self.c4, self.histArray.FindObject('h_ch13_x_vs_time'), 5, 'Bar 5 Time (Left SiPM)')
-            
-            self.c4.cd()
-            self.histArray.FindObject('h_allChannel_timing').Draw()
-            self.c4.Print( "{0}/h_allChannel_timing.png".format(self.topDir) )
-            
-            self.c4.cd()
-            self.histArray.FindObject('h_allChannel_fracFit_timing').Draw()
-            self.c4.Print( "{0}/h_allChannel_fracFit_timing.png".format(self.topDir) )
-            
-            self.drawResolutionPlot(self.c4, self.histArray.FindObject('h_allChannel_timingRes'), False)
-            self.drawResolutionPlot(self.c4, self.histArray.FindObject('h_allChannel_mcpRef_timingRes'), True)
-            self.drawResolutionPlot(self.c4, self.histArray.FindObject('h_allChannel_mcpRef_timingRes_ampWalkCorrected'), True, isCorrected=True)
-
-            self.drawResolutionPlot(self.c4, self.histArray.FindObject('h_allChannel_fracFit_timingRes'), False, False, isFracFit=True)
-            self.drawResolutionPlot(self.c4, self.histArray.FindObject('h_allChannel_mcpRef_fracFit_timingRes'), True, False, isFracFit=True)
-
-            self.c4.cd()
-            self.histArray.FindObject('h_allChannel_ampFit_percentError').SetXTitle("(Fit Amp - Real Amp) / Real Amp")
-            self.histArray.FindObject('h_allChannel_ampFit_percentError').SetYTitle("Entries / 1%")
-            self.histArray.FindObject('h_allChannel_ampFit_percentError').SetTitle("")
-            f_err = TF1("f_err", "gaus", -20, 10) # gaussian
-            self.histArray.FindObject('h_allChannel_ampFit_percentError').Fit("f_err", "QR") # should be "R" to impose range
-            self.histArray.FindObject('h_allChannel_ampFit_percentError').Draw()
-            ltxE = TLatex()
-            ltxE.SetTextAlign(9)
-            ltxE.SetTextFont(62)
-            ltxE.SetTextSize(0.021)
-            ltxE.SetNDC()
-            ltxE.DrawLatex(0.75, 0.81, "Mean: {0:0.2}".format(f_err.GetParameter(1)))
-            ltxE.DrawLatex(0.75, 0.785, "Sigma: {0:0.2}".format(f_err.GetParameter(2)))
-            self.c4.Print( "{0}/h_allChannel_ampFit_percentError.png".format(self.topDir) )
-            
-            self.c4.cd()
-            self.histArray.FindObject('h_allChannel_mcpRef_ampWalkCorrection').SetXTitle("Amp Walk Correction [ps]")
-            self.histArray.FindObject('h_allChannel_mcpRef_ampWalkCorrection').SetYTitle("Entries / 1 ps")
-            self.histArray.FindObject('h_allChannel_mcpRef_ampWalkCorrection').Draw()
-            self.c4.Print( "{0}/h_allChannel_mcpRef_ampWalkCorrection.png".format(self.topDir) )
-            
-            self.drawSingleProfile(self.c4, self.histArray.FindObject('h_allChannel_x_vs_timingRes'), 0, 't_{right SiPM} - t_{left SiPM}')
-            self.drawSingleProfile(self.c4, self.histArray.FindObject('h_allChannel_x_vs_mcpRef_timingRes'), 0, '(t_{right SiPM} + t_{left SiPM})/2 - t_{MCP}')
-            #self.drawSingleProfile(self.c4, self.histArray.FindObject('h_allChannel_fitSlope_vs_mcpRef_timingRes'), 0, '(t_{right SiPM} + t_{left SiPM})/2 - t_{MCP}', opt='slope')
-            
-            self.c4.cd()
-            self.histArray.FindObject('h_allChannel_timingLogic').Draw("TEXT")
-            self.c4.Print( "{0}/h_allChannel_timingLogic.png".format(self.topDir) )
-
-            self.drawTimingResSlices(self.c4, self.histArray, 1, slicedBy='X', usingMCP=False)
-            self.drawTimingResSlices(self.c4, self.histArray, 1, slicedBy='X', usingMCP=True)
-            self.drawTimingResSlices(self.c4, self.histArray, 2, slicedBy='X', usingMCP=False)
-            self.drawTimingResSlices(self.c4, self.histArray, 2, slicedBy='X', usingMCP=True)
-            self.drawTimingResSlices(self.c4, self.histArray, 3, slicedBy='X', usingMCP=False)
-            self.drawTimingResSlices(self.c4, self.histArray, 3, slicedBy='X', usingMCP=True)
-            self.drawTimingResSlices(self.c4, self.histArray, 4, slicedBy='X', usingMCP=False)
-            self.drawTimingResSlices(self.c4, self.histArray, 4, slicedBy='X', usingMCP=True)
-            self.drawTimingResSlices(self.c4, self.histArray, 5, slicedBy='X', usingMCP=False)
-            self.drawTimingResSlices(self.c4, self.histArray, 5, slicedBy='X', usingMCP=True)
-            self.drawTimingResSlices(self.c4, self.histArray, 0, slicedBy='X', usingMCP=False)
-            self.drawTimingResSlices(self.c4, self.histArray, 0, slicedBy='X', usingMCP=True)
-            
-            self.drawTimingResSlices(self.c4, self.histArray, 1, slicedBy='Slope', usingMCP=False)
-            self.drawTimingResSlices(self.c4, self.histArray, 1, slicedBy='Slope', usingMCP=True)
-            self.drawTimingResSlices(self.c4, self.histArray, 2, slicedBy='Slope', usingMCP=False)
-            self.drawTimingResSlices(self.c4, self.histArray, 2, slicedBy='Slope', usingMCP=True)
-            self.drawTimingResSlices(self.c4, self.histArray, 3, slicedBy='Slope', usingMCP=False)
-            self.drawTimingResSlices(self.c4, self.histArray, 3, slicedBy='Slope', usingMCP=True)
-            self.drawTimingResSlices(self.c4, self.histArray, 4, slicedBy='Slope', usingMCP=False)
-            self.drawTimingResSlices(self.c4, self.histArray, 4, slicedBy='Slope', usingMCP=True)
-            self.drawTimingResSlices(self.c4, self.histArray, 5, slicedBy='Slope', usingMCP=False)
-            self.drawTimingResSlices(self.c4, self.histArray, 5, slicedBy='Slope', usingMCP=True)
-
-            self.drawTimingResSlices(self.c4, self.histArray, 0, slicedBy='Slope', usingMCP=False)
-            self.drawTimingResSlices(self.c4, self.histArray, 0, slicedBy='Slope', usingMCP=True)
+    # =============================
 
-        # === function graveyard. keep for reference"
-        #self.drawXquadrants(self.c4, self.histArray.FindObject('h_ch1_ch2_ratio_x1, self.histArray.FindObject('h_ch1_ch2_ratio_x2, self.histArray.FindObject('h_ch1_ch2_ratio_x3, self.histArray.FindObject('h_ch1_ch2_ratio_x4, 1, 'Right/Left')
-        #self.drawXquadrants(self.c4, self.histArray.FindObject('h_ch1_x1, self.histArray.FindObject('h_ch1_x2, self.histArray.FindObject('h_ch1_x3, self.histArray.FindObject('h_ch1_x4, 1, 'Bar 1 [Right SiPM]')
+    def drawAllChannelHist(self, c0, h0, plotName, drawOpt='', xTitle=None, yTitle=None):
+        """ function to draw single histogram as is and print it to plotName.png"""
+        c0.cd()
+        if xTitle is not None:
+            h0.SetXTitle(xTitle)
+        if yTitle is not None:
+            h0.SetYTitle(yTitle)
+        h0.Draw(drawOpt)
+        c0.Print( "{0}/{1}.png".format(self.topDir, plotName) )
+
+    # =============================
+
+    def drawAmpFitError(self, c0):
+        """ function to fit and draw relative error of fitted peak amplitude"""
+        c0.cd()
+        h0 = self.histArray.get(('allChannel', 'ampFit_percentError'))
+        h0.SetXTitle("(Fit Amp - Real Amp) / Real Amp")
+        h0.SetYTitle("Entries / 1%")
+        h0.SetTitle("")
+        f_err = TF1("f_err", "gaus", -20, 10) # gaussian
+        h0.Fit("f_err", "QR") # should be "R" to impose range
+        h0.Draw()
+        ltxE = TLatex()
+        ltxE.SetTextAlign(9)
+        ltxE.SetTextFont(62)
+        ltxE.SetTextSize(0.021)
+        ltxE.SetNDC()
+        ltxE.DrawLatex(0.75, 0.81, "Mean: {0:0.2}".format(f_err.GetParameter(1)))
+        ltxE.DrawLatex(0.75, 0.785, "Sigma: {0:0.2}".format(f_err.GetParameter(2)))
+        c0.Print( "{0}/h_allChannel_ampFit_percentError.png".format(self.topDir) )
         
     # =============================
 
@@ -1215,6 +1764,35 @@ class barClass:
 
     # =============================
 
+    def drawCFDResolutionPlot(self, c0, h0, iFrac, isMCPref):
+        """function to fit CFD resolution plot with gaussian around its peak and print results, returns sigma"""
+        xTitle = 't_{right SiPM} - t_{left SiPM} [ps]'
+        if isMCPref:
+            xTitle = '(t_{right SiPM} + t_{left SiPM})/2 - t_{MCP} [ps]'
+        xTitle = 'CFD {0:0.0f}% '.format(100*self.cfdFractions[iFrac]) + xTitle
+        xPeak = h0.GetBinCenter(h0.GetMaximumBin())
+
+        c0.cd()
+        h0.SetTitle("")
+        h0.SetXTitle(xTitle)
+        h0.SetYTitle("Entries / 10 ps")
+        h0.Draw()
+        f_res = TF1("f_res", "gaus") # gaussian
+        f_res.SetRange(xPeak - 200, xPeak + 200)
+        h0.Fit("f_res", "QR") # should be "R" to impose range
+
+        ltx1 = TLatex()
+        ltx1.SetTextAlign(9)
+        ltx1.SetTextFont(62)
+        ltx1.SetTextSize(0.035)
+        ltx1.SetNDC()
+        ltx1.DrawLatex(0.70, 0.55, '#sigma_{{t}} = {0:0.1f} ps'.format(f_res.GetParameter(2)))
+        c0.Print( "{0}/{1}.png".format(self.topDir, h0.GetName()) )
+
+        return f_res.GetParameter(2)
+
+    # =============================
+
     def draw2Dbar(self, c0, h0, barNum, test=""):
         """ function to recieve canvas (c0), histogram (h0), and name for 2D bar plot"""
         c0.cd()
@@ -1448,9 +2026,9 @@ class barClass:
         
         rightSiPMchannel, leftSiPMchannel, mcpChannel, timeChannel = self.returnChannelNumbers(barNum)
 
-        pR = self.histArray.FindObject('h_ch{0}_diffRL_vs_time'.format(rightSiPMchannel))
-        pL = self.histArray.FindObject('h_ch{0}_diffRL_vs_time'.format(leftSiPMchannel))
-        pAvg = self.histArray.FindObject('h_ch{0}_ch{1}_over2_diffRL_vs_time'.format(rightSiPMchannel, leftSiPMchannel))
+        pR = self.histArray.get((barNum, 'R_diffRL_vs_time'))
+        pL = self.histArray.get((barNum, 'L_diffRL_vs_time'))
+        pAvg = self.histArray.get((barNum, 'over2_diffRL_vs_time'))
 
         
         ytitle = '{0} [ns]'.format("#Delta t")
@@ -1491,8 +2069,10 @@ class barClass:
 
         # ** 1. Histogram naming stuff
         hname = 'h_b{0}_timingRes'.format(barNum)
+        quantity = 'timingRes'
         if usingMCP:
             hname = 'h_b{0}_mcpRef_timingRes'.format(barNum)
+            quantity = 'mcpRef_timingRes'
         if slicedBy == 'Slope':
             hname += '_byFitSlope'
         if barNum == 0:
@@ -1526,7 +2106,7 @@ class barClass:
             sBase = '{0}_to_{1}'.format(sLow, sHigh)
 
             #h_b = TH1D('{0}_{1}'.format(hname, xBase), '{0}_{1}'.format(hname, xBase), 300, -1500, 1500)
-            h_b = arr.FindObject('{0}_{1}'.format(hname, sBase))
+            h_b = arr.get((barNum, quantity, slicedBy, nSlices))
             h_b.SetLineColor(legendCol[nSlices])
             leg.AddEntry(h_b, sBase.replace('n','-').replace('_',' '), "l")
             if nSlices == 0:
@@ -1550,51 +2130,10 @@ class barClass:
 
     # =============================
 
-    def numericalSolve(self, func, x_eval, x_step, y_end):
-        """ function to recieve TF1, find + return numerical solution by incrementing x_eval by x_step to point where function equals y_end"""
-        y_calc = 0
-        x_start = x_eval
-
-        while abs(y_calc) < abs(y_end):
-            store = y_calc
-            y_calc = func.Eval(x_eval)
-            x_eval += x_step
-            if x_eval > x_start + 35: # scan over window of 35 ps
-                break
-                
-                
-        f1 = func.Eval(x_start)
-        f2 = func.Eval(x_eval)
-        fitSlope = (f2 - f1)/(x_eval - x_start)
-
-        return x_eval, fitSlope
-
-    # =============================
-
-    def numericalFracSolve(self, func, x_eval, x_step, fracDenom, y_end):
-        """ function to recieve TF1, find + return numerical solution by incrementing x_eval by x_step to point where function equals y_end"""
-        y_calc = 0
-        x_start = x_eval
-
-        while abs(y_calc) < abs(y_end):
-            store = y_calc
-            y_calc = func.Eval(x_eval)/fracDenom
-            x_eval += x_step
-            if x_eval > x_start + 35: # scan over window of 35 ps
-                break
-                
-                
-        f1 = func.Eval(x_start)
-        f2 = func.Eval(x_eval)
-        fitSlope = (f2 - f1)/(x_eval - x_start)
-
-        return x_eval, fitSlope
-    
-    # =============================
-
     def drawTwoChannelTrace(self, time, channel, ch1, ch2, chTime, i_evt, altColor=False):
         """ function to draw 2-channel traces --> probably just for leakage studies"""
 
+        makeDirs('{0}/trackOutWaveforms'.format(self.topDir))
         c0 = TCanvas("c0", "c0", 800, 800)
         c0.cd()
         c0.SetLeftMargin(0.15);
@@ -1610,117 +2149,59 @@ class barClass:
         c0.cd()
         g1.Draw()
         g2.Draw("same")
-        c0.Print( "{0}/trackOutWaveforms/waveformTrackOut_ch{1}_ch{2}_Evt{3}.png".format(self.topDir, ch1, ch2, i_evt) )
+        c0.Print( "{0}/trackOutWaveforms/waveformTrackOut_ch{1}_ch{2}_Evt{3}{4}.png".format(self.topDir, ch1, ch2, i_evt, self.dumpTag) )
 
     # =============================
 
-    def drawFourChannelTrace(self, time, channel, ch1, ch2, chTime, chA, chB, chTime2, i_evt):
-        """ function to draw 2-channel traces --> probably just for leakage studies"""
-
-        c0 = TCanvas("c0", "c0", 800, 800)
-        c0.cd()
-        c0.SetLeftMargin(0.15);
-        c0.SetRightMargin(0.05);
-        c0.SetBottomMargin(0.10);
-        c0.SetTopMargin(0.05);
-        
-        g1 = self.returnWaveformGraph(time, channel, chTime, ch1)
-        g2 = self.returnWaveformGraph(time, channel, chTime, ch2)
-        gA = self.returnWaveformGraph(time, channel, chTime2, chA)
-        gB = self.returnWaveformGraph(time, channel, chTime2, chB)
-        g1.SetLineColor(1) #kBlack
-        g2.SetLineColor(416+2) #kGreen+2
-        gA.SetLineColor(600) #kBlue
-        gB.SetLineColor(632) #kRed
-
-        c0.cd()
-        g1.Draw()
-        g2.Draw("same")
-        gA.Draw("same")
-        gB.Draw("same")
-        c0.Print( "{0}/trackOutWaveforms/waveformTrackOut_4channel_sig_ch{1}_ch{2}_track_ch{3}_ch{4}_Evt{5}.png".format(self.topDir, ch1, ch2, chA, chB, i_evt) )
-
-    # =============================
-
-    def drawSixChannelTrace(self, time, channel, ch1, ch2, chTime, chA, chB, chTime2, chI, chII, chTime3, i_evt):
-        """ function to draw 2-channel traces --> probably just for leakage studies"""
-
-        c0 = TCanvas("c0", "c0", 800, 800)
-        c0.cd()
-        c0.SetLeftMargin(0.15);
-        c0.SetRightMargin(0.05);
-        c0.SetBottomMargin(0.10);
-        c0.SetTopMargin(0.05);
+    def fillLeakageHistograms(self, arr, chunk, indices, barNum, trackIn):
+        """ function to fill histograms breaking down information about leakage for chunk events at indices"""
         
-        g1  = self.returnWaveformGraph(time, channel, chTime, ch1)
-        g2  = self.returnWaveformGraph(time, channel, chTime, ch2)
-        gA  = self.returnWaveformGraph(time, channel, chTime2, chA)
-        gB  = self.returnWaveformGraph(time, channel, chTime2, chB)
-        gI  = self.returnWaveformGraph(time, channel, chTime3, chI)
-        gII = self.returnWaveformGraph(time, channel, chTime3, chII)
-        g1.SetLineColor(1) #kBlack
-        g2.SetLineColor(416+2) #kGreen+2
-        gA.SetLineColor(600) #kBlue
-        gB.SetLineColor(632) #kRed
-        gI.SetLineColor(616-3) #kMagenta-3
-        gII.SetLineColor(432-3) #kCyan-3
-        #legendCol = [1, 600, 632, 416+2, 616-3, 800+7, 432-3, 900-3] # kBlack, kBlue, kRed, kGreen+2, kMagenta-3, kOrange+7, kCyan-3, kPink-3
+        amp = chunk.amp[indices]
+        chi2 = chunk.chi2[indices]
+        h_right = arr.accumulator((barNum, trackIn, 'rightSignalInOtherBars'))
+        h_left = arr.accumulator((barNum, trackIn, 'leftSignalInOtherBars'))
+        h_sum = arr.accumulator((barNum, trackIn, 'sumSignalInOtherBars'))
+        h_diff = arr.accumulator((barNum, trackIn, 'diffSignalInOtherBars'))
+        h_chi2 = arr.accumulator((barNum, trackIn, 'chi2'))
 
-        c0.cd()
-        g1.Draw()
-        g2.Draw("same")
-        gA.Draw("same")
-        gB.Draw("same")
-        gI.Draw("same")
-        gII.Draw("same")
-        c0.Print( "{0}/trackOutWaveforms/waveformTrackOut_6channel_sig_ch{1}_ch{2}_track_ch{3}_ch{4}_middle_ch{5}_ch{6}_Evt{7}.png".format(self.topDir, ch1, ch2, chA, chB, chI, chII, i_evt) )
-
-    # =============================
-
-    def fillLeakageHistograms(self, arr, event, barNum, trackIn):
-        """ function to fill histograms breaking down information about leakage"""
-        
-        if not os.path.isdir( '{0}/trackOutWaveforms'.format(self.topDir) ):
-            os.system( 'mkdir {0}/trackOutWaveforms'.format(self.topDir) )
-  
         if barNum != 1:
-            arr.FindObject('h_{0}_b{1}_rightSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[1])
-            arr.FindObject('h_{0}_b{1}_leftSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[2])
-            arr.FindObject('h_{0}_b{1}_sumSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[1] + event.amp[2])
-            arr.FindObject('h_{0}_b{1}_diffSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[1] - event.amp[2])
-            arr.FindObject('h_{0}_b{1}_chi2'.format(trackIn, barNum)).Fill(event.chi2)
+            h_right.fill(amp[:, 1])
+            h_left.fill(amp[:, 2])
+            h_sum.fill(amp[:, 1] + amp[:, 2])
+            h_diff.fill(amp[:, 1] - amp[:, 2])
+            h_chi2.fill(chi2)
             #if event.i_evt % 500 == 0:
             #self.drawTwoChannelTrace(event.time, event.channel, 1, 2, 0, event.i_evt)
         if barNum != 2:
-            arr.FindObject('h_{0}_b{1}_rightSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[3])
-            arr.FindObject('h_{0}_b{1}_leftSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[4])
-            arr.FindObject('h_{0}_b{1}_sumSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[3] + event.amp[4])
-            arr.FindObject('h_{0}_b{1}_diffSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[3] - event.amp[4])
-            arr.FindObject('h_{0}_b{1}_chi2'.format(trackIn, barNum)).Fill(event.chi2)
+            h_right.fill(amp[:, 3])
+            h_left.fill(amp[:, 4])
+            h_sum.fill(amp[:, 3] + amp[:, 4])
+            h_diff.fill(amp[:, 3] - amp[:, 4])
+            h_chi2.fill(chi2)
             #if event.i_evt % 500 == 0:
             #self.drawTwoChannelTrace(event.time, event.channel, 3, 4, 0, event.i_evt)
         if barNum != 3:
-            arr.FindObject('h_{0}_b{1}_rightSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[5])
-            arr.FindObject('h_{0}_b{1}_leftSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[6])
-            arr.FindObject('h_{0}_b{1}_sumSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[5] + event.amp[6])
-            arr.FindObject('h_{0}_b{1}_diffSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[5] - event.amp[6])
-            arr.FindObject('h_{0}_b{1}_chi2'.format(trackIn, barNum)).Fill(event.chi2)
+            h_right.fill(amp[:, 5])
+            h_left.fill(amp[:, 6])
+            h_sum.fill(amp[:, 5] + amp[:, 6])
+            h_diff.fill(amp[:, 5] - amp[:, 6])
+            h_chi2.fill(chi2)
             #if event.i_evt % 500 == 0:
             #self.drawTwoChannelTrace(event.time, event.channel, 5, 6, 0, event.i_evt)
         if barNum != 4:
-            arr.FindObject('h_{0}_b{1}_rightSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[10])
-            arr.FindObject('h_{0}_b{1}_leftSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[11])
-            arr.FindObject('h_{0}_b{1}_sumSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[10] + event.amp[11])
-            arr.FindObject('h_{0}_b{1}_diffSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[10] - event.amp[11])
-            arr.FindObject('h_{0}_b{1}_chi2'.format(trackIn, barNum)).Fill(event.chi2)
+            h_right.fill(amp[:, 10])
+            h_left.fill(amp[:, 11])
+            h_sum.fill(amp[:, 10] + amp[:, 11])
+            h_diff.fill(amp[:, 10] - amp[:, 11])
+            h_chi2.fill(chi2)
             #if event.i_evt % 500 == 0:
             #self.drawTwoChannelTrace(event.time, event.channel, 10, 11, 1, event.i_evt)
         if barNum != 5:
-            arr.FindObject('h_{0}_b{1}_rightSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[12])
-            arr.FindObject('h_{0}_b{1}_leftSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[13])
-            arr.FindObject('h_{0}_b{1}_sumSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[12] + event.amp[13])
-            arr.FindObject('h_{0}_b{1}_diffSignalInOtherBars'.format(trackIn, barNum)).Fill(event.amp[12] - event.amp[13])
-            arr.FindObject('h_{0}_b{1}_chi2'.format(trackIn, barNum)).Fill(event.chi2)
+            h_right.fill(amp[:, 12])
+            h_left.fill(amp[:, 13])
+            h_sum.fill(amp[:, 12] + amp[:, 13])
+            h_diff.fill(amp[:, 12] - amp[:, 13])
+            h_chi2.fill(chi2)
             #if event.i_evt % 500 == 0:
             #self.drawTwoChannelTrace(event.time, event.channel, 12, 13, 1, event.i_evt)
 
@@ -1737,11 +2218,14 @@ class barClass:
         c0.SetBottomMargin(0.10);
         c0.SetTopMargin(0.05);
 
-        h1 = self.histArray.FindObject(hname.replace('_b_', '_b1_'))
-        h2 = self.histArray.FindObject(hname.replace('_b_', '_b2_'))        
-        h3 = self.histArray.FindObject(hname.replace('_b_', '_b3_'))
-        h4 = self.histArray.FindObject(hname.replace('_b_', '_b4_'))        
-        h5 = self.histArray.FindObject(hname.replace('_b_', '_b5_'))
+        # hname = h_<trackIn/trackOut>_b_<quantity>
+        trackIn = hname.split('_')[1]
+        quantity = hname.split('_b_')[1]
+        h1 = self.histArray.get((1, trackIn, quantity))
+        h2 = self.histArray.get((2, trackIn, quantity))
+        h3 = self.histArray.get((3, trackIn, quantity))
+        h4 = self.histArray.get((4, trackIn, quantity))
+        h5 = self.histArray.get((5, trackIn, quantity))
         
         # kBlack == 1, kRed == 632, kBlue == 600, kGreen == 416, kMagenta == 616
         h1.SetLineColor(1) # kBlack
@@ -1782,31 +2266,32 @@ class barClass:
     def returnWaveformGraph(self, time, channel, drs_time, drs_channel, vetoClipping=False):
         """ function to produce and return graph of waveform """
 
-        l_time = []
-        l_channel = []
-        i=0
+        # *** 1. Trace of requested channel from (nGroups, 1024) time and (nChannels, 1024) channel views
+        l_time = time[drs_time].astype(np.float64)
+        l_channel = -1*channel[drs_channel].astype(np.float64)
 
-        # *** 1. Make arrays of trace information
-        while i < 1024:
-            l_time.append(time[drs_time*1024 + i])
-            l_channel.append(-1*channel[drs_channel*1024 + i])
-            i+=1            
-        
-        # *** 2. Then store a TGraph --> why not in same step? because it doesn't work for unknown reasons
-        i=0
-        g = TGraph()       
-        i_peakFit=0
-        g_peakFit = TGraph()       
-        voltageVeto = self.peakFitVoltageVeto
+        return self.returnTraceGraph(l_time, l_channel, vetoClipping)
+
+    # =============================
+
+    def returnVoltageVeto(self, l_channel):
+        """ function to return voltage above which points of trace (pulse positive) are left out of the peak fit"""
         if '66V' in self.runType:
-            voltageVeto = 0.875*max(l_channel)
-
-        while i < 1024:
-            g.SetPoint(i, l_time[i], l_channel[i])        
-            if l_channel[i] < voltageVeto:
-                g_peakFit.SetPoint(i_peakFit, l_time[i], l_channel[i])        
-                i_peakFit += 1
-            i=i+1
+            return 0.875*l_channel.max()
+
+        return self.peakFitVoltageVeto
+
+    # =============================
+
+    def returnTraceGraph(self, l_time, l_channel, vetoClipping=False):
+        """ function to produce and return graph of trace (float64 arrays, pulse positive) and optionally graph without points above voltage veto"""
+        
+        # *** 2. Then store a TGraph, clipped graph keeps only points below voltage veto
+        g = TGraph(len(l_time), l_time, l_channel)
+        voltageVeto = self.returnVoltageVeto(l_channel)
+
+        belowVeto = l_channel < voltageVeto
+        g_peakFit = TGraph(int(np.count_nonzero(belowVeto)), np.ascontiguousarray(l_time[belowVeto]), np.ascontiguousarray(l_channel[belowVeto]))
 
         
         if not vetoClipping:
@@ -5,6 +5,7 @@
 #Purpose: Script to combine executables for 1) converting testbeam .dat files to .root, and 2) analyzing root file and producing timing-relevant information by channel
 
 from barClass import barClass
+from thresholdScan import thresholdScan
 from ROOT import TFile, TTree
 import sys, argparse
 
@@ -14,18 +15,37 @@ parser = argparse.ArgumentParser()
 parser.add_argument("--test", help="flag for running over only 10k events",  nargs='?', default=False)
 parser.add_argument("--batch", help="flag for running in batch mode",  nargs='?', default=False)
 parser.add_argument("--noTiming", help="flag for running over only 10k events",  nargs='?', default=True)
-parser.add_argument("--vetoOpt", help="veto decision logic option: none/singleAdj/doubleAdj/allAdj/all")
+parser.add_argument("--vetoOpt", help="veto decision logic option: none/singleAdj/doubleAdj/allAdj/all. comma-separated list fills all options in one pass, e.g. none,singleAdj,doubleAdj,allAdj,all")
+parser.add_argument("--chunkSize", help="number of tree entries read per chunk", type=int, default=10000)
+parser.add_argument("--nWorkers", help="number of worker processes filling separate entry ranges (merged before drawing)", type=int, default=1)
+parser.add_argument("--partialFile", help="also write filled histograms + config to this partial-result file ('{0}' = vetoOpt), merge with mergePartials.py")
+parser.add_argument("--mergedFile", help="draw plots from this merged partial-result file ('{0}' = vetoOpt) instead of reading the tree")
+parser.add_argument("--checkpoint", help="checkpoint file (.npz) with histogram state + last processed entry")
+parser.add_argument("--checkpointEvents", help="write checkpoint every N events", type=int, default=0)
+parser.add_argument("--checkpointSeconds", help="write checkpoint every T seconds", type=float, default=0)
+parser.add_argument("--resume", help="continue from --checkpoint instead of starting over, same histograms as an uninterrupted run. trace dumps written before are kept (one traceDumps_partNNN.npz per checkpoint) and count towards --maxDumps", action='store_true')
+parser.add_argument("--skimDir", help="directory of per-event timing skims, reused when timing config + input match, default: no skim")
+parser.add_argument("--histFile", help="fill stage output with all histograms, redraw with renderPlots.py, default: none written")
+parser.add_argument("--noDraw", help="fill stage only: write --histFile, no plots", action='store_true')
+parser.add_argument("--maxDumps", help="cap on waveform trace dumps per vetoOpt (archive traceDumps.npz next to the plots, draw with drawTraceDumps.py), 0 = none", type=int, default=1000)
+parser.add_argument("--waveformStore", help="waveform store directory exported from the input with exportWaveforms.py, waveforms read memory-mapped from it instead of the tree")
+parser.add_argument("--renderWorkers", help="number of processes drawing the plot list, each with its own canvases", type=int, default=1)
+parser.add_argument("--scanVoltages", help="comma-separated fitVoltageForTiming grid [mV] for threshold scan, e.g. 30,40,50,60,80,100")
+parser.add_argument("--scanMCPVoltages", help="comma-separated fitMCPVoltageForTiming grid [mV] for threshold scan")
+parser.add_argument("--cfdFractions", help="comma-separated constant fractions for interpolated CFD timing plots, e.g. 0.05,0.10,0.20, default: none")
+parser.add_argument("--scanFractions", help="comma-separated fitPercentForTiming grid for threshold scan, e.g. 0.05,0.10,0.20")
 args = parser.parse_args()
 
 if(args.vetoOpt is None):
     print "#### Seting --vetoOpt singlAdj by default ####"
-    args.vetoOpt = 'singleAdj'
+    args.vetoOpt = ['singleAdj']
 else:
-    if( not(args.vetoOpt == "none" or args.vetoOpt == "singleAdj" or args.vetoOpt == "doubleAdj" or args.vetoOpt == "allAdj" or args.vetoOpt == "all") ):
-        print "#### Please use none/singleAdj/doubleAdj/allAdj/all when setting --vetoOpt <option>. Supplied value ({0}) does not match ####\nEXITING".format(args.vetoOpt)
-        quit()
-    else:
-        print '-- Setting vetoOpt = {0}'.format(args.vetoOpt)
+    args.vetoOpt = args.vetoOpt.split(',')
+    for vetoOpt in args.vetoOpt:
+        if( not(vetoOpt == "none" or vetoOpt == "singleAdj" or vetoOpt == "doubleAdj" or vetoOpt == "allAdj" or vetoOpt == "all") ):
+            print "#### Please use none/singleAdj/doubleAdj/allAdj/all (or a comma-separated list) when setting --vetoOpt <option>. Supplied value ({0}) does not match ####\nEXITING".format(vetoOpt)
+            quit()
+    print '-- Setting vetoOpt = {0}'.format(', '.join(args.vetoOpt))
 
 if(args.test is None):
     args.test = True
@@ -45,7 +65,33 @@ if(args.noTiming is None):
 else:
     args.noTiming = True
 
-topDir = '09-04-18_plots_{0}'.format(args.vetoOpt)
+if(args.checkpoint is not None and args.checkpointEvents <= 0 and args.checkpointSeconds <= 0):
+    print "#### --checkpoint given without --checkpointEvents/--checkpointSeconds, writing checkpoint every 100k events ####"
+    args.checkpointEvents = 100000
+if(args.resume and args.checkpoint is None):
+    print "#### --resume needs --checkpoint <file> ####\nEXITING"
+    quit()
+if(args.noDraw and args.histFile is None):
+    print "#### --noDraw needs --histFile <file>, otherwise nothing is kept ####\nEXITING"
+    quit()
+
+scan = None
+if(args.scanVoltages is not None or args.scanMCPVoltages is not None or args.scanFractions is not None):
+    toGrid = lambda opt: [float(x) for x in opt.split(',')] if opt is not None else []
+    scan = thresholdScan(toGrid(args.scanVoltages), toGrid(args.scanMCPVoltages), toGrid(args.scanFractions))
+    print '-- Threshold scan: fitVoltageForTiming = {0}, fitMCPVoltageForTiming = {1}, fitPercentForTiming = {2}'.format(scan.voltages, scan.mcpVoltages, scan.fractions)
+    if not args.noTiming:
+        print "#### Threshold scan needs timing analysis, ignoring --noTiming ####"
+        args.noTiming = True
+
+cfdFractions = []
+if(args.cfdFractions is not None):
+    cfdFractions = [float(x) for x in args.cfdFractions.split(',')]
+    if any(fraction <= 0 or fraction >= 1 for fraction in cfdFractions):
+        print "#### --cfdFractions have to be between 0 and 1. Supplied value ({0}) does not match ####\nEXITING".format(args.cfdFractions)
+        quit()
+
+topDir = '09-04-18_plots_{0}' # one directory per vetoOpt, filled in by barClass
 
 
 # Ben Local
@@ -58,16 +104,21 @@ topDir = '09-04-18_plots_{0}'.format(args.vetoOpt)
 #f1 = TFile('/eos/uscms/store/user/mjoyce/BTL/FNAL_TB_Mar2018/combined/bottombars_66V.root', 'READ') # low bias (66 V) bars 1 and 2
 #f2 = TFile('/eos/uscms/store/user/mjoyce/BTL/FNAL_TB_Mar2018/combined/topbars_66V.root', 'READ') # low bias (66 V) bars 3, 4, and 5
 
-# LPC, May 2018 TB data
-f0 = TFile('/eos/uscms/store/user/barria/TB_Fnal_June2018_data/XYScan_Bias69V/Run1111-1132_Bias69_X-8500_Y-10400.root', 'READ')
-f1 = TFile('/eos/uscms/store/user/barria/TB_Fnal_June2018_data/XYScan_Bias68V/Run1217-1230_Bias68_X-8500_Y-10400.root', 'READ')
+# LPC, May 2018 TB data. several runs/groups at once: processManifest.py manifests/june2018_XYScan.json
+t0 = None # no tree needed when drawing from merged partials
+if(args.mergedFile is None):
+    f0 = TFile('/eos/uscms/store/user/barria/TB_Fnal_June2018_data/XYScan_Bias69V/Run1111-1132_Bias69_X-8500_Y-10400.root', 'READ')
+    f1 = TFile('/eos/uscms/store/user/barria/TB_Fnal_June2018_data/XYScan_Bias68V/Run1217-1230_Bias68_X-8500_Y-10400.root', 'READ')
 
-t0 = f0.pulse
-t1 = f1.pulse
-#t2 = f2.pulse
+    t0 = f0.pulse
+    t1 = f1.pulse
+    #t2 = f2.pulse
 
 
-barClass(t0, 'may2018TB', topDir, args.vetoOpt, args.noTiming, args.test, args.batch)
-#barClass(t1, 'bottomBars_66V', topDir, args.vetoOpt, args.noTiming, args.test, args.batch)
-#barClass(t2, 'topBars_66V', topDir, args.vetoOpt, args.noTiming, args.test, args.batch)
+barClass(t0, 'may2018TB', topDir, args.vetoOpt, args.noTiming, args.test, args.batch, args.chunkSize, scan, args.nWorkers, partialFile=args.partialFile, mergedFile=args.mergedFile,
+         checkpointFile=args.checkpoint, checkpointEvents=args.checkpointEvents, checkpointSeconds=args.checkpointSeconds, resume=args.resume,
+         skimDir=args.skimDir, histFile=args.histFile, render=not args.noDraw, renderWorkers=args.renderWorkers,
+         maxDumps=args.maxDumps, waveformStoreDir=args.waveformStore, cfdFractions=cfdFractions)
+#barClass(t1, 'bottomBars_66V', topDir, args.vetoOpt, args.noTiming, args.test, args.batch, args.chunkSize)
+#barClass(t2, 'topBars_66V', topDir, args.vetoOpt, args.noTiming, args.test, args.batch, args.chunkSize)
 
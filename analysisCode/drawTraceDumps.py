@@ -0,0 +1,148 @@
+# /usr/bin/python
+
+#Purpose: Script to draw trace dump archives (traceDumps*.npz written by barClass during the event loop) into one multi-page PDF, one page per track-out event, two per fit dump
+
+from traceDumps import readTraceDumps
+import os, sys, argparse
+import numpy as np
+import ROOT
+from ROOT import TCanvas, TGraph, TF1, TPad, TLatex, TLine, gStyle
+
+# *** 0. setup parser for command line
+parser = argparse.ArgumentParser()
+parser.add_argument("archives", help="trace dump archives, e.g. 09-04-18_plots_none/may2018TB/traceDumps*.npz", nargs='+')
+parser.add_argument("--output", "-o", help="output PDF, default: first archive with .pdf")
+parser.add_argument("--kind", help="draw only dumps of this kind: trackOut/fitInfo")
+parser.add_argument("--maxDumps", help="draw at most this many dumps", type=int, default=-1)
+args = parser.parse_args()
+
+# =============================
+
+def returnTitle(info):
+    """ function to return page title of track-out dump, same naming as the former per-event png files"""
+    ch = info['channels']
+    if len(ch) == 6:
+        return 'waveformTrackOut_6channel_sig_ch{0}_ch{1}_track_ch{2}_ch{3}_middle_ch{4}_ch{5}_Evt{6}'.format(ch[0], ch[1], ch[2], ch[3], ch[4], ch[5], info['i_evt'])
+    return 'waveformTrackOut_4channel_sig_ch{0}_ch{1}_track_ch{2}_ch{3}_Evt{4}'.format(ch[0], ch[1], ch[2], ch[3], info['i_evt'])
+
+# =============================
+
+def drawTrackOut(c0, info, arrays):
+    """ function to draw signal bar, track bar (+ middle bar) traces of one track-out event"""
+    c0.cd()
+    c0.SetLeftMargin(0.15);
+    c0.SetRightMargin(0.05);
+    c0.SetBottomMargin(0.10);
+    c0.SetTopMargin(0.05);
+
+    # kBlack, kGreen+2 = signal bar, kBlue, kRed = track bar, kMagenta-3, kCyan-3 = bar in between
+    colors = [1, 416+2, 600, 632, 616-3, 432-3]
+    graphs = []
+    for k in range(len(info['channels'])):
+        g = TGraph(len(arrays['time'][k]), arrays['time'][k].astype(np.float64), arrays['channel'][k].astype(np.float64))
+        g.SetLineColor(colors[k])
+        g.SetTitle(returnTitle(info))
+        g.Draw("AL" if k == 0 else "L same")
+        graphs.append(g)
+
+    return graphs
+
+# =============================
+
+def drawFitInfo(c0, info, arrays, pdfName):
+    """ function to draw trace with leading-edge inset, then trace without saturated points + peak fit (two pages)"""
+    time = arrays['time'].astype(np.float64)
+    channel = arrays['channel'].astype(np.float64)
+    timeStep = info['timeStep']
+    fit = TF1("fn1", info['fitFunction'], info['fitRange'][0], info['fitRange'][1])
+    fit.SetParameters(np.array(info['params'], dtype=np.float64))
+    fit.SetChisquare(info['chi2'])
+    fit.SetNDF(int(info['ndf']))
+    fitPeak = TF1("fnPeak", info['peakFitFunction'], info['peakFitRange'][0], info['peakFitRange'][1])
+    fitPeak.SetParameters(np.array(info['peakParams'], dtype=np.float64))
+
+    # ** A. Whole trace + inset for leading edge
+    c0.Clear()
+    p1 = TPad("p1", "p1", 0.0, 0.0, 1.0, 1.0)
+    p1.Draw()
+    p1.cd()
+    graph = TGraph(len(time), time, channel)
+    graph.SetTitle('waveformPlusPol1Fit_Ch{0}_Evt{1}'.format(info['drs_channel'], info['i_evt']))
+    graph.Draw("AL")
+
+    ltxIn = TLatex()
+    ltxIn.SetTextAlign(9)
+    ltxIn.SetTextFont(62)
+    ltxIn.SetTextSize(0.021)
+    ltxIn.SetNDC()
+    ltxIn.DrawLatex(0.66, 0.81, "Leading Edge Inset")
+    ltxIn.DrawLatex(0.15, 0.20, 'Fit Result = {0:0.3f}, Fit Slope = {1:0.1f}, Lin Result = {2:0.3f}'.format(info['fitRes'], info['fitSlope'], info['slopeRes']))
+    ltxIn.DrawLatex(0.15, 0.175, 'Lin Amp = {0:0.1f}, Fit Amp = {1:0.1f}, Chi2 / NDF = {2:0.1f} / {3:0.1f}'.format(fit.Eval(info['slopeRes']), fit.Eval(info['fitRes']), info['chi2'], info['ndf']))
+    p2 =  TPad("p2", "p2", 0.6, 0.5, 0.9, 0.8)
+    p2.Draw()
+    p2.cd()
+    inInset = (time > timeStep - 2) & (time < timeStep + 0.3)
+    inset = TGraph(int(np.count_nonzero(inInset)), time[inInset], channel[inInset])
+    inset.Draw("AL")
+    fit.DrawF1(timeStep - 2.3, timeStep + 0.2, "same")
+
+    l1= TLine(inset.GetXaxis().GetXmin(),0,inset.GetXaxis().GetXmax(),0);
+    l1.SetLineStyle(2);
+    l1.SetLineWidth(3);
+    l1.SetLineColor(600+2);
+    l1.Draw("same");
+
+    c0.Update()
+    c0.Print(pdfName, "Title:waveformPlusPol1Fit_Ch{0}_Evt{1}".format(info['drs_channel'], info['i_evt']))
+
+    # ** B. Trace without saturated peak
+    c0.Clear()
+    c0.cd()
+    belowVeto = channel < info['voltageVeto']
+    graphPeak = TGraph(int(np.count_nonzero(belowVeto)), np.ascontiguousarray(time[belowVeto]), np.ascontiguousarray(channel[belowVeto]))
+    graphPeak.SetTitle('waveformWithoutSaturation_Ch{0}_Evt{1}'.format(info['drs_channel'], info['i_evt']))
+    graphPeak.Draw("AL")
+    graphPeak.GetYaxis().SetRangeUser(1.4*channel.min(), 1.2*fitPeak.Eval(fitPeak.GetParameter(1)))
+    fitPeak.Draw("same")
+    ltxIn = TLatex()
+    ltxIn.SetTextAlign(9)
+    ltxIn.SetTextFont(62)
+    ltxIn.SetTextSize(0.021)
+    ltxIn.SetNDC()
+    ltxIn.DrawLatex(0.66, 0.81, "t(max): {0:0.3f} [Fit]".format(fitPeak.GetParameter(1)))
+    ltxIn.DrawLatex(0.66, 0.785, "A(max): {0:0.1f} [Fit]".format(fitPeak.Eval(fitPeak.GetParameter(1))))
+    ltxIn.DrawLatex(0.66, 0.76, "A(max): {0:0.1f} [Real]".format(channel.max()))
+    c0.Print(pdfName, "Title:waveformWithoutSaturation_Ch{0}_Evt{1}".format(info['drs_channel'], info['i_evt']))
+
+# =============================
+
+# *** 1. Collect dumps of all archives
+dumps = []
+for archive in args.archives:
+    if not os.path.isfile(archive):
+        print "#### {0} does not exist ####\nEXITING".format(archive)
+        sys.exit(1)
+    dumps += [ dump for dump in readTraceDumps(archive) if args.kind is None or dump[0]['kind'] == args.kind ]
+if args.maxDumps >= 0:
+    dumps = dumps[:args.maxDumps]
+if len(dumps) == 0:
+    print "#### No trace dumps to draw ####\nEXITING"
+    sys.exit(1)
+
+pdfName = args.output if args.output is not None else '{0}.pdf'.format(os.path.splitext(args.archives[0])[0])
+
+# *** 2. One multi-page PDF, batch mode
+ROOT.gROOT.SetBatch(True)
+gStyle.SetOptStat(0000)
+c0 = TCanvas("c0", "c0", 800, 800)
+c0.Print('{0}['.format(pdfName))
+for info, arrays in dumps:
+    if info['kind'] == 'fitInfo':
+        drawFitInfo(c0, info, arrays, pdfName)
+    else:
+        c0.Clear()
+        graphs = drawTrackOut(c0, info, arrays)
+        c0.Print(pdfName, "Title:{0}".format(returnTitle(info)))
+c0.Print('{0}]'.format(pdfName))
+
+print '-- Drew {0} trace dumps into {1}'.format(len(dumps), pdfName)
@@ -0,0 +1,126 @@
+# !/usr/bin/python
+
+#Purpose: Reader of DRS4 evaluation board binary files (.dat) without converting them to ROOT first (DRS-UVa/convert_tool.cpp). The file is memory-mapped with structured dtypes
+#         of its layout, events are decoded in vectorized form, chunks have the eventReader interface so waveform code written for the testbeam trees runs on them directly (drsTiming.py)
+
+import os
+import numpy as np
+from eventReader import eventChunk
+
+nSamples = 1024
+timeWindow = (100, 140) # ns, samples inside are left out of pedestal mean + RMS as in convert_tool
+
+# =============================
+
+def returnHeaderDtype(chCount):
+    """ function to return dtype of file header: 'DRS2', 'TIME', board serial, then per channel 'C00x' + 1024 time bin widths [ns]"""
+    return np.dtype([('tag', 'S4'), ('timeTag', 'S4'), ('boardTag', 'S2'), ('boardSerial', '<u2'),
+                     ('timeBins', [('tag', 'S4'), ('widths', '<f4', (nSamples,))], (chCount,))])
+
+# =============================
+
+def returnEventDtype(chCount):
+    """ function to return dtype of one event: 'EHDR', serial number, date (year, month, day, hour, minute, second, ms, range), board serial, trigger cell,
+        then per channel 'C00x', scaler + 1024 raw samples"""
+    return np.dtype([('tag', 'S4'), ('serial', '<u4'), ('date', '<u2', (8,)), ('boardTag', 'S2'), ('boardSerial', '<u2'), ('triggerTag', 'S2'), ('triggerCell', '<u2'),
+                     ('channels', [('tag', 'S4'), ('scaler', '<i4'), ('samples', '<u2', (nSamples,))], (chCount,))])
+
+# =============================
+
+def returnChannelCount(raw):
+    """ function to return number of channels with time bins in file header, counted up to the first event header"""
+    chCount = 0
+    offset = 12
+    while raw[offset:offset+1].tostring() == 'C':
+        chCount += 1
+        offset += 4 + 4*nSamples
+
+    return chCount
+
+# =============================
+
+class drsReader:
+    def __init__(self, fileName, chCount=None, chunkSize=10000):
+        # *** 0. Top-level options and objects, chCount = None counts channels in the file header
+        self.fileName = fileName
+        self.chunkSize = chunkSize
+        raw = np.memmap(fileName, dtype=np.uint8, mode='r')
+        self.chCount = chCount if chCount is not None else returnChannelCount(raw)
+        headerDtype = returnHeaderDtype(self.chCount)
+        eventDtype = returnEventDtype(self.chCount)
+        if self.chCount == 0 or len(raw) < headerDtype.itemsize + 4 or raw[headerDtype.itemsize:headerDtype.itemsize+4].tostring() != 'EHDR':
+            raise ValueError('{0} is not a DRS4 binary file with {1} channels (no event header after time bins)'.format(fileName, self.chCount))
+
+        # *** 1. Header + events memory-mapped, only complete events (convert_tool also fills the partial last read)
+        self.header = np.memmap(fileName, dtype=headerDtype, mode='r', shape=(1,))[0]
+        self.nEntries = (len(raw) - headerDtype.itemsize)/eventDtype.itemsize
+        if (len(raw) - headerDtype.itemsize) % eventDtype.itemsize != 0:
+            print '-- {0}: ignoring {1} bytes of incomplete last event'.format(os.path.basename(fileName), (len(raw) - headerDtype.itemsize) % eventDtype.itemsize)
+        self.events = np.memmap(fileName, dtype=eventDtype, mode='r', offset=headerDtype.itemsize, shape=(self.nEntries,))
+        del raw
+
+        # *** 2. Sample times [ns] per channel: cumulative bin widths, summed in float32 like convert_tool
+        self.time = np.cumsum(self.header['timeBins']['widths'], axis=1, dtype=np.float32)
+
+    # =============================
+
+    def returnChannel(self, firstEntry, lastEntry):
+        """ function to return waveforms [mV] of entries [firstEntry, lastEntry), (n, chCount, 1024), before convert_tool's sign flip (pulses negative)"""
+        return (self.events['channels']['samples'][firstEntry:lastEntry]/65535. - 0.5)*1000
+
+    # =============================
+
+    def decode(self, firstEntry=0, lastEntry=-1):
+        """ function to return entries [firstEntry, lastEntry) as structured array with the branches of convert_tool's pulse tree: event, chmV (pulses positive), time, RMS, mean, amp"""
+        if lastEntry < 0 or lastEntry > self.nEntries:
+            lastEntry = self.nEntries
+        n = max(0, lastEntry - firstEntry)
+        arr = np.zeros(n, dtype=[('event', 'i4'), ('chmV', 'f8', (self.chCount, nSamples)), ('time', 'f4', (self.chCount, nSamples)),
+                                 ('RMS', 'f8', (self.chCount,)), ('mean', 'f8', (self.chCount,)), ('amp', 'f8', (self.chCount,))])
+        if n == 0:
+            return arr
+
+        chmV = self.returnChannel(firstEntry, lastEntry)
+        # pedestal outside timeWindow, normalized to (samples + 1) as in convert_tool
+        outside = (self.time < timeWindow[0]) | (self.time > timeWindow[1])
+        nOutside = np.count_nonzero(outside, axis=1) + 1
+        arr['mean'] = np.where(outside, chmV, 0).sum(axis=2)/nOutside
+        arr['RMS'] = np.sqrt(np.where(outside, chmV*chmV, 0).sum(axis=2)/nOutside)
+        arr['chmV'] = -chmV
+        arr['amp'] = arr['chmV'].max(axis=2)
+        arr['time'] = self.time
+        arr['event'] = np.arange(firstEntry, lastEntry)
+
+        return arr
+
+    # =============================
+
+    def readChunk(self, firstEntry, lastEntry):
+        """ function to read entries [firstEntry, lastEntry) into an eventChunk with testbeam tree names: i_evt, channel (float32, pulses negative), time (one row per channel), amp"""
+        n = lastEntry - firstEntry
+        arr = np.zeros(n, dtype=[('i_evt', 'i4'), ('channel', 'f4', (self.chCount, nSamples)), ('time', 'f4', (self.chCount, nSamples)), ('amp', 'f4', (self.chCount,))])
+        arr['channel'] = self.returnChannel(firstEntry, lastEntry)
+        arr['time'] = self.time
+        arr['amp'] = -arr['channel'].min(axis=2)
+        arr['i_evt'] = np.arange(firstEntry, lastEntry)
+
+        return eventChunk(arr, firstEntry, self)
+
+    # =============================
+
+    def readWaveforms(self, entry):
+        """ function to return (time, channel) waveforms of a single entry"""
+        return self.time, self.returnChannel(entry, entry + 1)[0].astype(np.float32)
+
+    # =============================
+
+    def iterChunks(self, start=0, stop=-1):
+        """ generator returning consecutive eventChunks of chunkSize entries between start and stop"""
+        if stop < 0 or stop > self.nEntries:
+            stop = self.nEntries
+
+        firstEntry = start
+        while firstEntry < stop:
+            lastEntry = min(firstEntry + self.chunkSize, stop)
+            yield self.readChunk(firstEntry, lastEntry)
+            firstEntry = lastEntry
@@ -0,0 +1,127 @@
+# /usr/bin/python
+
+#Purpose: Script to run the barClass waveform timing (leading-edge fit, constant-fraction fit, CFD) straight on DRS4 evaluation board .dat files read with drsReader,
+#         no convert_tool ROOT file in between. Fills per-channel amplitude/time and per-pair resolution histograms into one ROOT file
+
+from barClass import barClass
+from drsReader import drsReader
+from histRegistry import histRegistry
+import partialFiles
+import os, sys, argparse
+import numpy as np
+from ROOT import TH1D
+
+# *** 0. setup parser for command line
+parser = argparse.ArgumentParser()
+parser.add_argument("input", help="DRS4 binary file (.dat)")
+parser.add_argument("--chCount", help="number of channels in file, default: from file header", type=int)
+parser.add_argument("--pairs", help="comma-separated channel pairs (DRS channel numbers, 1 = C001) for resolution plots, e.g. 1:2,3:4", default='1:2')
+parser.add_argument("--runType", help="barClass runType whose timing settings are used", default='may2018TB')
+parser.add_argument("--cfdFractions", help="comma-separated constant fractions for interpolated CFD times, default: none")
+parser.add_argument("--chunkSize", help="number of events decoded per chunk", type=int, default=10000)
+parser.add_argument("--test", help="only first 10k events", action='store_true')
+parser.add_argument("--output", "-o", help="output ROOT file, default: input with _timing.root")
+parser.add_argument("--topDir", help="output directory for barClass bookkeeping, '{0}' = vetoOpt", default='drs_plots_{0}')
+args = parser.parse_args()
+
+if(not os.path.isfile(args.input)):
+    print "#### {0} does not exist ####\nEXITING".format(args.input)
+    sys.exit(1)
+try:
+    reader = drsReader(args.input, args.chCount, args.chunkSize)
+except ValueError as e:
+    print "#### {0} ####\nEXITING".format(e)
+    sys.exit(1)
+
+pairs = []
+for pair in args.pairs.split(','):
+    channels = [int(ch) for ch in pair.split(':')]
+    if len(channels) != 2 or min(channels) < 1 or max(channels) > reader.chCount:
+        print "#### Please use pairs of channels 1 to {0} like 1:2 for --pairs. Supplied value ({1}) does not match ####\nEXITING".format(reader.chCount, pair)
+        sys.exit(1)
+    pairs.append(tuple(channels))
+
+cfdFractions = []
+if(args.cfdFractions is not None):
+    cfdFractions = [float(x) for x in args.cfdFractions.split(',')]
+    if any(fraction <= 0 or fraction >= 1 for fraction in cfdFractions):
+        print "#### --cfdFractions have to be between 0 and 1. Supplied value ({0}) does not match ####\nEXITING".format(args.cfdFractions)
+        sys.exit(1)
+
+outputFile = args.output if args.output is not None else '{0}_timing.root'.format(os.path.splitext(args.input)[0])
+
+# =============================
+
+def returnMipTime(timing, fitVoltageForTiming):
+    """ function to return leading-edge time at fitVoltageForTiming from getTimingForChannels rows, 0 = no time (as in barClass.fillTimingPlots)"""
+    fitStartTime, fitStartVoltage, fitSlope = timing[:, 0], timing[:, 1], timing[:, 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(fitSlope == 0, 0, fitStartTime + (fitVoltageForTiming - fitStartVoltage)/fitSlope)
+
+# =============================
+
+def bookHistograms(chCount, pairs, cfdFractions):
+    """ function to book per-channel amplitude + time and per-pair resolution histograms"""
+    arr = histRegistry()
+    for ch in range(1, chCount + 1):
+        arr.book((ch, 'amp'), TH1D("h_ch{0}_amp".format(ch), "h_ch{0}_amp".format(ch), 100, 0, 1000))
+        arr.book((ch, 'timing'), TH1D("h_ch{0}_timing".format(ch), "h_ch{0}_timing".format(ch), 200, 0, 200))
+        arr.book((ch, 'fracFit_timing'), TH1D("h_ch{0}_fracFit_timing".format(ch), "h_ch{0}_fracFit_timing".format(ch), 200, 0, 200))
+    for a, b in pairs:
+        name = "h_ch{0}_ch{1}".format(a, b)
+        arr.book((a, b, 'timingRes'), TH1D("{0}_timingRes".format(name), "{0}_timingRes".format(name), 300, -1500, 1500))
+        arr.book((a, b, 'fracFit_timingRes'), TH1D("{0}_fracFit_timingRes".format(name), "{0}_fracFit_timingRes".format(name), 300, -1500, 1500))
+        for iFrac, fraction in enumerate(cfdFractions):
+            cfdName = '{0}_cfd{1:02d}_timingRes'.format(name, int(round(100*fraction)))
+            arr.book((a, b, 'cfd_timingRes', iFrac), TH1D(cfdName, cfdName, 300, -1500, 1500))
+
+    return arr
+
+# =============================
+
+# *** 1. barClass only for its timing settings + getTimingForChannels, no tree and no event loop
+analysis = barClass(None, args.runType, args.topDir, 'none', True, args.test, True, args.chunkSize, maxDumps=0, cfdFractions=cfdFractions, runNow=False)
+arr = bookHistograms(reader.chCount, pairs, cfdFractions)
+nCFD = len(cfdFractions)
+
+# *** 2. Timing of every channel per chunk, pairs from the same rows
+print '-- {0}: {1} events, {2} channels'.format(args.input, reader.nEntries, reader.chCount)
+nTotal = 0
+for chunk in reader.iterChunks(0, 10000 if args.test else -1):
+    mipTime = {}
+    fracFitTime = {}
+    cfdTime = {}
+    for ch in range(1, reader.chCount + 1):
+        timing = analysis.getTimingForChannels(chunk.time[:, ch-1], chunk.channel[:, ch-1], ch, chunk.i_evt)
+        mipTime[ch] = returnMipTime(timing, analysis.fitVoltageForTiming)
+        fracFitTime[ch] = timing[:, 4]
+        cfdTime[ch] = timing[:, 5:5 + nCFD]
+        arr.fill((ch, 'amp'), chunk.amp[:, ch-1])
+        arr.fill((ch, 'timing'), mipTime[ch][mipTime[ch] != 0])
+        arr.fill((ch, 'fracFit_timing'), fracFitTime[ch][fracFitTime[ch] != 0])
+
+    for a, b in pairs:
+        both = (mipTime[a] != 0) & (mipTime[b] != 0)
+        arr.fill((a, b, 'timingRes'), 1000*(mipTime[a][both] - mipTime[b][both])) # ns to ps
+        both = (fracFitTime[a] != 0) & (fracFitTime[b] != 0)
+        arr.fill((a, b, 'fracFit_timingRes'), 1000*(fracFitTime[a][both] - fracFitTime[b][both]))
+        for iFrac in range(nCFD):
+            tA = cfdTime[a][:, iFrac]
+            tB = cfdTime[b][:, iFrac]
+            both = (tA != 0) & (tB != 0)
+            arr.fill((a, b, 'cfd_timingRes', iFrac), 1000*(tA[both] - tB[both]))
+
+    nTotal += chunk.nEvents
+    print '-- {0} processed'.format(nTotal)
+
+# *** 3. Write, one directory + config as in fill stage histogram files
+arr.flush()
+config = analysis.returnConfig('none')
+config['inputFiles'] = [os.path.abspath(args.input)]
+config['entryRanges'] = [[0, nTotal]]
+config['pairs'] = pairs
+partialFiles.writeHistFile(outputFile, [ ('none', arr, config) ])
+for a, b in pairs:
+    h = arr.get((a, b, 'timingRes'))
+    print '-- ch{0} - ch{1}: {2:0.0f} entries, RMS = {3:0.1f} ps'.format(a, b, h.GetEntries(), h.GetRMS())
+print '-- Wrote histograms to {0}'.format(outputFile)
@@ -0,0 +1,142 @@
+# !/usr/bin/python
+
+#Purpose: Columnar reader pulling testbeam tree branches in chunks of entries as numpy arrays, waveforms optionally from a memory-mapped waveformStore instead of the tree
+
+import numpy as np
+from root_numpy import tree2array
+
+# branches needed by barClass: leakage (amp incl. MCP channels, tracks), + timing (36x1024 waveforms + DRS reco times)
+leakageBranches = ['i_evt', 'amp', 'x_dut', 'y_dut', 'xSlope', 'ySlope', 'ntracks', 'chi2']
+timingBranches = ['LP1_5', 'gaus_mean', 't_peak', 'channel', 'time']
+waveformBranches = ['channel', 'time']
+analysisBranches = leakageBranches + timingBranches
+testEntries = 10001 # entries read with --test, as the event loop before chunking (stopped after entry 10000)
+
+# =============================
+
+def returnBranches(doTiming):
+    """ function to return branches needed by the enabled analysis stages"""
+    return leakageBranches + timingBranches if doTiming else list(leakageBranches)
+
+# =============================
+
+class eventReader:
+    def __init__(self, tree, branches=analysisBranches, chunkSize=10000, store=None):
+        # *** 0. Top-level options and objects. with a store (waveformStore) channel + time come from it, never from the tree
+        self.tree = tree
+        self.store = store
+        self.storeBranches = [name for name in branches if store is not None and name in waveformBranches]
+        self.branches = [name for name in branches if name not in self.storeBranches]
+        self.chunkSize = chunkSize
+        self.nEntries = tree.GetEntries()
+
+        # *** 1. Read cache sized for one chunk of the requested branches, tree2array reads only those
+        self.cacheSize = self.returnCacheSize()
+        self.setupCache()
+
+    # =============================
+
+    def returnCacheSize(self, minSize=1<<20, maxSize=1<<28):
+        """ function to return TTreeCache size [bytes] holding the compressed baskets of requested branches for one chunk"""
+        if self.nEntries == 0:
+            return minSize
+        zipBytes = 0
+        for name in self.branches:
+            branch = self.tree.GetBranch(name)
+            if branch:
+                zipBytes += branch.GetZipBytes('*')
+
+        return int(min(maxSize, max(minSize, 1.2*zipBytes*self.chunkSize/self.nEntries)))
+
+    # =============================
+
+    def setupCache(self):
+        """ function to cache only the requested branches. branch status of the tree is left alone, it may be read elsewhere in the same process"""
+        self.tree.SetCacheSize(self.cacheSize)
+        for name in self.branches:
+            self.tree.AddBranchToCache(name, True)
+        self.tree.StopCacheLearningPhase()
+
+    # =============================
+
+    def readChunk(self, firstEntry, lastEntry):
+        """ function to read entries [firstEntry, lastEntry) of all requested branches into an eventChunk"""
+        arr = tree2array(self.tree, branches=self.branches, start=firstEntry, stop=lastEntry, cache_size=self.cacheSize)
+        chunk = eventChunk(arr, firstEntry, self)
+        if len(self.storeBranches) > 0:
+            chunk.time, chunk.channel = self.store.read(firstEntry, lastEntry)
+            chunk.branches += tuple(waveformBranches)
+
+        return chunk
+
+    # =============================
+
+    def readWaveforms(self, entry):
+        """ function to return (time, channel) waveforms of a single entry, from the store if there is one"""
+        if self.store is not None:
+            time, channel = self.store.readEntries([entry])
+            return time[0], channel[0]
+        row = self.readEntry(entry, waveformBranches)
+
+        return row['time'], row['channel']
+
+    # =============================
+
+    def readEntry(self, entry, branches):
+        """ function to return single entry (record) of branches that were pruned from the chunks, e.g. waveforms of one event to dump"""
+        return tree2array(self.tree, branches=branches, start=entry, stop=entry+1, cache_size=0)[0]
+
+    # =============================
+
+    def iterChunks(self, start=0, stop=-1):
+        """ generator returning consecutive eventChunks of chunkSize entries between start and stop"""
+        if stop < 0 or stop > self.nEntries:
+            stop = self.nEntries
+
+        firstEntry = start
+        while firstEntry < stop:
+            lastEntry = min(firstEntry + self.chunkSize, stop)
+            yield self.readChunk(firstEntry, lastEntry)
+            firstEntry = lastEntry
+
+# =============================
+
+class eventChunk:
+    def __init__(self, arr, firstEntry, reader=None):
+        # *** 0. Store each branch as a plain ndarray, first axis = event in chunk
+        self.firstEntry = firstEntry
+        self.reader = reader
+        self.nEvents = len(arr)
+        self.branches = arr.dtype.names
+        for name in self.branches:
+            setattr(self, name, np.ascontiguousarray(arr[name]))
+
+    # =============================
+
+    def event(self, i):
+        """ function to return per-event view of entry i in chunk, mimicking attribute access of a tree entry"""
+        return eventView(self, i)
+
+    # =============================
+
+    def waveforms(self, i):
+        """ function to return (time, channel) waveforms of entry i in chunk, read for this entry alone if waveform branches were pruned"""
+        if 'channel' in self.branches:
+            return self.time[i], self.channel[i]
+
+        return self.reader.readWaveforms(self.firstEntry + i)
+
+    # =============================
+
+    def entries(self):
+        """ function to return tree entry numbers of all events in chunk"""
+        return np.arange(self.firstEntry, self.firstEntry + self.nEvents)
+
+# =============================
+
+class eventView:
+    def __init__(self, chunk, i):
+        # *** 0. Rows of each branch as views into the chunk, waveforms keep their shape: channel = (nChannels, 1024), time = (nGroups, 1024)
+        self.entry = chunk.firstEntry + i
+        for name in chunk.branches:
+            setattr(self, name, getattr(chunk, name)[i])
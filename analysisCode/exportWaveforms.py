@@ -0,0 +1,46 @@
+# /usr/bin/python
+
+#Purpose: Script to export the channel + time waveform branches of a run (one file or several chained) once into a memory-mapped waveform store (waveformStore.py),
+#         afterwards barStudies.py --waveformStore <dir> reads waveforms from it instead of decompressing them from the tree on every pass
+
+import waveformStore
+from eventReader import testEntries
+import os, sys, argparse
+from ROOT import TFile, TChain
+
+# *** 0. setup parser for command line
+parser = argparse.ArgumentParser()
+parser.add_argument("input", help="ROOT file(s) of the run, several files are chained in the given order", nargs='+')
+parser.add_argument("--output", "-o", help="store directory to write", required=True)
+parser.add_argument("--treeName", help="name of tree in input files", default='pulse')
+parser.add_argument("--dtype", help="sample type of channel waveforms: float32 (exact) or int16 (half the size, {0} mV steps)".format(waveformStore.int16Scale), default='float32')
+parser.add_argument("--chunkSize", help="number of tree entries read per chunk", type=int, default=10000)
+parser.add_argument("--test", help="only first {0} entries, as barStudies.py --test".format(testEntries), action='store_true')
+args = parser.parse_args()
+
+if(args.dtype not in waveformStore.storeDtypes):
+    print "#### Please use {0} for --dtype. Supplied value ({1}) does not match ####\nEXITING".format('/'.join(waveformStore.storeDtypes), args.dtype)
+    sys.exit(1)
+for fileName in args.input:
+    if(not os.path.isfile(fileName)):
+        print "#### {0} does not exist ####\nEXITING".format(fileName)
+        sys.exit(1)
+
+# *** 1. Same input naming as barClass.returnInputFiles, so the store is recognized as exported from it
+if len(args.input) == 1:
+    f = TFile(args.input[0], 'READ')
+    tree = f.Get(args.treeName)
+    inputFiles = [f.GetName()]
+else:
+    tree = TChain(args.treeName)
+    for fileName in args.input:
+        tree.Add(fileName)
+    inputFiles = [element.GetTitle() for element in tree.GetListOfFiles()]
+if not tree:
+    print "#### No tree {0} in {1} ####\nEXITING".format(args.treeName, ', '.join(args.input))
+    sys.exit(1)
+
+# *** 2. Export
+waveformStore.exportStore(tree, args.output, inputFiles, args.chunkSize, 0, testEntries if args.test else -1, args.dtype)
+store = waveformStore.waveformStore(args.output)
+print '-- Wrote {0} entries to {1}: channel {2} {3}, time {4} {5}'.format(len(store.entries), args.output, store.channel.dtype, store.channel.shape, store.time.dtype, store.time.shape)
@@ -0,0 +1,129 @@
+# !/usr/bin/python
+
+#Purpose: Least-squares fits of many short waveform windows at once (rows = waveforms), same chi2 as an unweighted TGraph fit. Rows with status != 0 should be refit with ROOT
+
+import numpy as np
+
+fitFunctions = ['gaus', 'pol1']
+
+# =============================
+
+def fitWindows(funcName, x, y, maxIter=500, edmMax=2e-5):
+    """ function to fit funcName to each row of x, y (n, nPoints). returns params (n, nPar), chi2 (n), status (n, 0 = converged)"""
+    if funcName == 'gaus':
+        return fitGaus(x, y, maxIter, edmMax)
+    if funcName == 'pol1':
+        return fitPol1(x, y)
+
+    # no batched version --> everything goes to ROOT
+    n = len(x)
+    return np.zeros((n, 0)), np.zeros(n), np.ones(n, dtype=np.int64)
+
+# =============================
+
+def fitPol1(x, y):
+    """ function to return closed-form straight line fit p0 + p1*x for each row"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    nPoints = x.shape[1]
+
+    xMean = x.mean(axis=1)
+    yMean = y.mean(axis=1)
+    sxx = ((x - xMean[:, np.newaxis])**2).sum(axis=1)
+    sxy = ((x - xMean[:, np.newaxis])*(y - yMean[:, np.newaxis])).sum(axis=1)
+
+    status = np.zeros(len(x), dtype=np.int64)
+    status[~(sxx > 0) | (nPoints < 2)] = 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p1 = np.where(status == 0, sxy/sxx, 0)
+    p0 = yMean - p1*xMean
+    params = np.column_stack([p0, p1])
+    chi2 = ((y - p0[:, np.newaxis] - p1[:, np.newaxis]*x)**2).sum(axis=1)
+
+    return params, chi2, status
+
+# =============================
+
+def fitGaus(x, y, maxIter=500, edmMax=2e-5):
+    """ function to return gaus fit [0]*exp(-0.5*((x-[1])/[2])^2) for each row. fitted as exp(a + b*x + c*x^2) (same curves for c < 0, much better conditioned):
+        weighted log-parabola as start, then Levenberg-Marquardt on the unweighted chi2. converged once the estimated distance to minimum is below edmMax (Minuit default: 0.002*tolerance*errorDef)"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+
+    # ** A. Work in coordinates centered and scaled on each window for conditioning
+    x0 = x.mean(axis=1)
+    scale = np.where(x.max(axis=1) > x.min(axis=1), x.max(axis=1) - x.min(axis=1), 1)
+    xc = (x - x0[:, np.newaxis])/scale[:, np.newaxis]
+    design = np.stack([np.ones_like(xc), xc, xc**2], axis=2) # (n, nPoints, 3)
+
+    # ** B. First estimate: ln(y) = a + b*x + c*x^2, weights y^2 (var of ln(y) ~ 1/y^2). non-positive samples get no weight
+    logY = np.log(np.where(y > 0, y, 1))
+    w = np.where(y > 0, y**2, 0)
+    lhs = np.einsum('nki,nk,nkj->nij', design, w, design)
+    rhs = np.einsum('nki,nk,nk->ni', design, w, logY)
+    invertible = np.abs(np.linalg.det(lhs)) > 0
+    lhs[~invertible] = np.eye(3)
+    params = np.linalg.solve(lhs, rhs[:, :, np.newaxis])[:, :, 0]
+    params[~invertible] = [np.log(max(np.max(y), 1)), 0, -1] # rough bump over the window
+
+    # ** C. Levenberg-Marquardt iterations on sum (y - f)^2
+    chi2 = expParabolaChi2(params, design, y)
+    damping = np.full(n, 1e-3)
+    converged = ~np.isfinite(chi2)
+    stuck = converged.copy()
+    for iteration in range(maxIter):
+        active = np.flatnonzero(~converged)
+        if len(active) == 0:
+            break
+
+        d = design[active]
+        f = np.exp(np.einsum('nki,ni->nk', d, params[active]))
+        jac = d*f[:, :, np.newaxis]
+        r = y[active] - f
+        jtj = np.einsum('nki,nkj->nij', jac, jac)
+        jtr = np.einsum('nki,nk->ni', jac, r)
+
+        # EDM = 0.5 g^T H^-1 g with g = -2 J^T r, H = 2 J^T J
+        singular = ~(np.abs(np.linalg.det(jtj)) > 0)
+        jtj[singular] = np.eye(3)
+        edm = np.einsum('ni,ni->n', jtr, np.linalg.solve(jtj, jtr[:, :, np.newaxis])[:, :, 0])
+        atMinimum = ~singular & (edm < edmMax)
+        converged[active[atMinimum]] = True
+
+        lhs = jtj + damping[active, np.newaxis, np.newaxis]*jtj*np.eye(3)
+        step = np.linalg.solve(lhs, jtr[:, :, np.newaxis])[:, :, 0]
+        trial = params[active] + step
+        with np.errstate(over='ignore', invalid='ignore'):
+            trialChi2 = expParabolaChi2(trial, d, y[active])
+        better = (trialChi2 <= chi2[active]) & ~atMinimum & ~singular
+
+        params[active[better]] = trial[better]
+        chi2[active[better]] = trialChi2[better]
+        damping[active[better]] *= 0.1
+        damping[active[~better]] *= 10
+        giveUp = singular | (damping[active] > 1e10)
+        converged[active[giveUp]] = True
+        stuck[active[giveUp]] = True
+
+    # ** D. Back to gaus parameters in original coordinates, needs a maximum (c < 0)
+    a, b, c = params.T
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        sigma = scale*np.sqrt(-0.5/c)
+        mean = x0 - scale*b/(2*c)
+        amp = np.exp(a - b**2/(4*c))
+    gausParams = np.column_stack([amp, mean, sigma])
+
+    status = np.zeros(n, dtype=np.int64)
+    status[~converged | stuck | ~(c < 0) | ~np.isfinite(chi2) | ~np.isfinite(gausParams).all(axis=1)] = 1
+
+    return gausParams, chi2, status
+
+# =============================
+
+def expParabolaChi2(params, design, y):
+    """ function to return sum of squared residuals of exp(a + b*x + c*x^2) for each row"""
+    with np.errstate(over='ignore'):
+        f = np.exp(np.einsum('nki,ni->nk', design, params))
+
+    return ((y - f)**2).sum(axis=1)
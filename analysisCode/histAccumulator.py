@@ -0,0 +1,159 @@
+# !/usr/bin/python
+
+#Purpose: Numpy bin accumulator for booked TH1D/TH2D/TProfile. Bins whole arrays with bincount and writes the sums into the ROOT object only when filling is done
+
+import numpy as np
+
+class histAccumulator:
+    def __init__(self, h):
+        # *** 0. Copy binning of booked histogram (fixed-width bins only, as booked in barClass)
+        self.hist = h
+        self.isProfile = h.InheritsFrom('TProfile')
+        self.is2D = (h.GetDimension() == 2)
+        self.nx = h.GetNbinsX()
+        self.xmin = h.GetXaxis().GetXmin()
+        self.xmax = h.GetXaxis().GetXmax()
+        self.ny = 0
+        self.ymin = 0
+        self.ymax = 0
+        if self.is2D:
+            self.ny = h.GetNbinsY()
+            self.ymin = h.GetYaxis().GetXmin()
+            self.ymax = h.GetYaxis().GetXmax()
+        if self.isProfile:
+            self.ymin = h.GetYmin()
+            self.ymax = h.GetYmax()
+
+        # *** 1. Per-bin sums, global bin numbering as in ROOT (under/overflow included)
+        self.nCells = (self.nx + 2) * (self.ny + 2 if self.is2D else 1)
+        self.reset()
+
+    # =============================
+
+    def reset(self):
+        """ function to zero all sums"""
+        self.sumw = np.zeros(self.nCells)
+        self.sumw2 = np.zeros(self.nCells)
+        self.sumwy = np.zeros(self.nCells) # profiles only
+        self.sumwy2 = np.zeros(self.nCells) # profiles only
+        self.stats = np.zeros(7) # tsumw, tsumw2, tsumwx, tsumwx2, tsumwy, tsumwy2, tsumwxy
+        self.entries = 0
+
+    # =============================
+
+    def getState(self, prefix):
+        """ function to return accumulated sums as dict of arrays named prefix_*, e.g. for checkpoints"""
+        return { prefix + '_sumw' : self.sumw, prefix + '_sumw2' : self.sumw2, prefix + '_sumwy' : self.sumwy, prefix + '_sumwy2' : self.sumwy2,
+                 prefix + '_stats' : self.stats, prefix + '_entries' : np.array([self.entries], dtype=np.int64) }
+
+    # =============================
+
+    def setState(self, state, prefix):
+        """ function to restore accumulated sums saved with getState"""
+        if len(state[prefix + '_sumw']) != self.nCells:
+            raise ValueError('stored state {0} has {1} cells, {2} has {3}'.format(prefix, len(state[prefix + '_sumw']), self.hist.GetName(), self.nCells))
+        self.sumw = np.array(state[prefix + '_sumw'], dtype=np.float64)
+        self.sumw2 = np.array(state[prefix + '_sumw2'], dtype=np.float64)
+        self.sumwy = np.array(state[prefix + '_sumwy'], dtype=np.float64)
+        self.sumwy2 = np.array(state[prefix + '_sumwy2'], dtype=np.float64)
+        self.stats = np.array(state[prefix + '_stats'], dtype=np.float64)
+        self.entries = int(state[prefix + '_entries'][0])
+
+    # =============================
+
+    def findBin(self, x, nBins, xMin, xMax):
+        """ function to return ROOT bin numbers (0 = underflow, nBins+1 = overflow) for array x"""
+        with np.errstate(invalid='ignore'): # NaN ends up in overflow like in TAxis::FindBin
+            inRange = (x >= xMin) & (x < xMax)
+            bins = np.where(x < xMin, 0, nBins + 1)
+        bins[inRange] = 1 + (nBins * (x[inRange] - xMin) / (xMax - xMin)).astype(np.int64)
+
+        return bins
+
+    # =============================
+
+    def fill(self, x, y=None, w=None):
+        """ function to fill arrays x (and y for 2D/profiles) with optional weights w, following TH1::Fill conventions"""
+        x = np.asarray(x, dtype=np.float64).ravel()
+        if y is not None:
+            y = np.asarray(y, dtype=np.float64).ravel()
+        if w is None:
+            w = np.ones(len(x))
+        else:
+            w = np.asarray(w, dtype=np.float64).ravel()
+
+        # ** A. Profiles reject entries outside of [ymin, ymax] before anything else
+        if self.isProfile and self.ymin != self.ymax:
+            with np.errstate(invalid='ignore'):
+                keep = (y >= self.ymin) & (y <= self.ymax)
+            x = x[keep]
+            y = y[keep]
+            w = w[keep]
+
+        if len(x) == 0:
+            return
+
+        # ** B. Bin contents
+        binx = self.findBin(x, self.nx, self.xmin, self.xmax)
+        cells = binx
+        inRange = (binx > 0) & (binx <= self.nx)
+        if self.is2D:
+            biny = self.findBin(y, self.ny, self.ymin, self.ymax)
+            cells = biny*(self.nx + 2) + binx
+            inRange &= (biny > 0) & (biny <= self.ny)
+
+        self.sumw += np.bincount(cells, weights=w, minlength=self.nCells)
+        self.sumw2 += np.bincount(cells, weights=w*w, minlength=self.nCells)
+        if self.isProfile:
+            self.sumwy += np.bincount(cells, weights=w*y, minlength=self.nCells)
+            self.sumwy2 += np.bincount(cells, weights=w*y*y, minlength=self.nCells)
+        self.entries += len(x)
+
+        # ** C. Statistics only from in-range entries (ROOT default, no StatOverflows)
+        x = x[inRange]
+        w = w[inRange]
+        self.stats[0] += np.sum(w)
+        self.stats[1] += np.sum(w*w)
+        self.stats[2] += np.sum(w*x)
+        self.stats[3] += np.sum(w*x*x)
+        if y is not None:
+            y = y[inRange]
+            self.stats[4] += np.sum(w*y)
+            self.stats[5] += np.sum(w*y*y)
+            self.stats[6] += np.sum(w*x*y)
+
+    # =============================
+
+    def flush(self):
+        """ function to add accumulated sums to the ROOT histogram (contents, sumw2, stats, entries) and reset"""
+        if self.entries == 0:
+            return self.hist
+
+        h = self.hist
+        nStats = 6 if self.isProfile else (7 if self.is2D else 4)
+        stats = np.zeros(13)
+        h.GetStats(stats)
+        stats[:nStats] += self.stats[:nStats]
+        entries = h.GetEntries() + self.entries
+
+        hasSumw2 = h.GetSumw2N() > 0
+        if self.isProfile:
+            hasBinSumw2 = h.GetBinSumw2().GetSize() > 0
+            for i in np.flatnonzero(self.sumw):
+                h.SetBinEntries(int(i), h.GetBinEntries(int(i)) + self.sumw[i])
+                h.SetBinContent(int(i), h.GetArray()[int(i)] + self.sumwy[i]) # TProfile array holds sum(w*y)
+                h.GetSumw2().AddAt(h.GetSumw2().At(int(i)) + self.sumwy2[i], int(i))
+                if hasBinSumw2:
+                    h.GetBinSumw2().AddAt(h.GetBinSumw2().At(int(i)) + self.sumw2[i], int(i))
+        else:
+            for i in np.flatnonzero(self.sumw):
+                h.SetBinContent(int(i), h.GetBinContent(int(i)) + self.sumw[i])
+                if hasSumw2:
+                    h.GetSumw2().AddAt(h.GetSumw2().At(int(i)) + self.sumw2[i], int(i))
+
+        # SetBinContent touches entries and stats --> restore both at the end
+        h.PutStats(stats)
+        h.SetEntries(entries)
+        self.reset()
+
+        return h
@@ -0,0 +1,133 @@
+# !/usr/bin/python
+
+#Purpose: Registry of booked histograms, resolved once at booking time and indexed by structured keys like (barNum, quantity, slicedBy, sliceIndex)
+
+import numpy as np
+from ROOT import TObjArray, TList
+from histAccumulator import histAccumulator
+
+class histRegistry:
+    def __init__(self):
+        # *** 0. TObjArray keeps booking order + original names for output, dicts give direct handles
+        self.array = TObjArray()
+        self.byKey = {}
+        self.byName = {}
+        self.keyOrder = []
+        self.accumulators = {} # numpy bin sums per key, written into the histograms by flush()
+
+    # =============================
+
+    def book(self, key, h):
+        """ function to add histogram (h) to registry under structured key (key) and return it"""
+        if key in self.byKey:
+            raise KeyError('histogram key {0} already booked as {1}'.format(key, self.byKey[key].GetName()))
+
+        self.array.AddLast(h)
+        self.byKey[key] = h
+        self.keyOrder.append(key)
+        self.byName[h.GetName()] = h
+        self.accumulators[key] = histAccumulator(h)
+
+        return h
+
+    # =============================
+
+    def get(self, key):
+        """ function to return histogram booked under structured key (key)"""
+        return self.byKey[key]
+
+    def __getitem__(self, key):
+        return self.byKey[key]
+
+    def __contains__(self, key):
+        return key in self.byKey
+
+    def accumulator(self, key):
+        """ function to return numpy accumulator of histogram booked under structured key (key)"""
+        return self.accumulators[key]
+
+    # =============================
+
+    def fill(self, key, x, y=None, w=None):
+        """ function to fill arrays x (and y for 2D plots/profiles) into accumulator of histogram under key (key)"""
+        self.accumulators[key].fill(x, y, w)
+
+    # =============================
+
+    def flush(self):
+        """ function to write all accumulated sums into the booked ROOT histograms, to be called once filling is done"""
+        for key in self.keyOrder:
+            self.accumulators[key].flush()
+
+    # =============================
+
+    def getState(self, prefix):
+        """ function to return state of all histograms (not yet flushed accumulator sums + directly filled labelled histograms) as dict of numpy arrays named prefix_*"""
+        state = { prefix + '_names' : np.array([self.byKey[key].GetName() for key in self.keyOrder]) }
+        for i, key in enumerate(self.keyOrder):
+            state.update(self.accumulators[key].getState('{0}_{1}'.format(prefix, i)))
+
+            # labelled bins are filled on the ROOT histogram itself (see timingLogic), keep labels in order of appearance + bin contents
+            h = self.byKey[key]
+            labels = h.GetXaxis().GetLabels()
+            if labels and labels.GetSize() > 0:
+                state['{0}_{1}_labels'.format(prefix, i)] = np.array([labels.At(j).GetName() for j in range(labels.GetSize())])
+                state['{0}_{1}_labelBins'.format(prefix, i)] = np.array([labels.At(j).GetUniqueID() for j in range(labels.GetSize())], dtype=np.int64)
+                state['{0}_{1}_contents'.format(prefix, i)] = np.array([h.GetBinContent(j) for j in range(h.GetNbinsX() + 2)])
+                state['{0}_{1}_rootEntries'.format(prefix, i)] = np.array([h.GetEntries()])
+
+        return state
+
+    # =============================
+
+    def setState(self, state, prefix):
+        """ function to restore state saved with getState into freshly booked histograms"""
+        names = [self.byKey[key].GetName() for key in self.keyOrder]
+        if list(state[prefix + '_names']) != names:
+            raise ValueError('stored state {0} was written with different histograms'.format(prefix))
+
+        for i, key in enumerate(self.keyOrder):
+            self.accumulators[key].setState(state, '{0}_{1}'.format(prefix, i))
+
+            labelKey = '{0}_{1}_labels'.format(prefix, i)
+            if labelKey in state:
+                h = self.byKey[key]
+                for label, labelBin in zip(state[labelKey], state['{0}_{1}_labelBins'.format(prefix, i)]):
+                    h.GetXaxis().SetBinLabel(int(labelBin), str(label))
+                for j, content in enumerate(state['{0}_{1}_contents'.format(prefix, i)]):
+                    if content != 0:
+                        h.SetBinContent(j, content)
+                h.SetEntries(float(state['{0}_{1}_rootEntries'.format(prefix, i)][0]))
+
+    # =============================
+
+    def write(self, tdir):
+        """ function to write all histograms under their own names into ROOT directory (tdir), e.g. a partial output file"""
+        tdir.cd()
+        for key in self.keyOrder:
+            self.byKey[key].Write()
+
+    # =============================
+
+    def merge(self, tdir):
+        """ function to add histograms of the same names from ROOT directory (tdir) bin by bin (TH1::Merge, keeps labels, profiles and stats)"""
+        for key in self.keyOrder:
+            h = self.byKey[key]
+            other = tdir.Get(h.GetName())
+            if not other:
+                raise KeyError('histogram {0} not found in {1}'.format(h.GetName(), tdir.GetName()))
+            others = TList()
+            others.Add(other)
+            h.Merge(others)
+
+    # =============================
+
+    def FindObject(self, name):
+        """ function to return histogram by name, mirroring TObjArray::FindObject without the linear search"""
+        return self.byName.get(name)
+
+    # =============================
+
+    def keys(self):
+        """ function to return all structured keys in booking order"""
+        return list(self.keyOrder)
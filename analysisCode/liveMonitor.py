@@ -0,0 +1,89 @@
+# /usr/bin/python
+
+#Purpose: Script to follow a run while it is being taken: watches a ROOT file or a directory of ROOT files, fills only entries appended (or files added) since the last look
+#         into the same histograms, and redraws a chosen subset of barClass plots every --interval seconds. Old entries are never filled twice, also across restarts with --stateFile
+
+from barClass import barClass
+from ROOT import TFile
+import os, sys, glob, time, argparse
+import partialFiles
+
+# *** 0. setup parser for command line
+parser = argparse.ArgumentParser()
+parser.add_argument("input", help="ROOT file being written, or directory of run files")
+parser.add_argument("--pattern", help="file name pattern when watching a directory", default='*.root')
+parser.add_argument("--treeName", help="name of tree in input files", default='pulse')
+parser.add_argument("--runType", help="barClass runType of the run", default='may2018TB')
+parser.add_argument("--vetoOpt", help="veto decision logic option(s), comma-separated", default='singleAdj')
+parser.add_argument("--noTiming", help="leakage plots only, no waveform fits", action='store_true')
+parser.add_argument("--plots", help="comma-separated shell-style patterns of plots to redraw (histogram or output names)", default='h_b[1-5],h_allChannel_timingRes,mcp_amplitudes')
+parser.add_argument("--interval", help="seconds between looks at the input", type=float, default=60)
+parser.add_argument("--chunkSize", help="number of tree entries read per chunk", type=int, default=10000)
+parser.add_argument("--topDir", help="output directory, '{0}' replaced by vetoOpt", default='live_plots_{0}')
+parser.add_argument("--stateFile", help="histogram state + entries filled per file (.npz), picked up again after a restart")
+parser.add_argument("--histFile", help="also write all histograms here after each update, full plot set with renderPlots.py")
+parser.add_argument("--once", help="look once and exit, e.g. from cron", action='store_true')
+args = parser.parse_args()
+
+if(not os.path.exists(args.input)):
+    print "#### {0} does not exist ####\nEXITING".format(args.input)
+    sys.exit(1)
+vetoOpts = args.vetoOpt.split(',')
+for vetoOpt in vetoOpts:
+    if( not(vetoOpt == "none" or vetoOpt == "singleAdj" or vetoOpt == "doubleAdj" or vetoOpt == "allAdj" or vetoOpt == "all") ):
+        print "#### Please use none/singleAdj/doubleAdj/allAdj/all (or a comma-separated list) when setting --vetoOpt <option>. Supplied value ({0}) does not match ####\nEXITING".format(vetoOpt)
+        sys.exit(1)
+plotPatterns = args.plots.split(',')
+
+# =============================
+
+def returnInputFiles(path, pattern):
+    """ function to return input files in order: the file itself, or matching files of directory sorted by name"""
+    if os.path.isdir(path):
+        return sorted(os.path.abspath(fileName) for fileName in glob.glob(os.path.join(path, pattern)))
+
+    return [os.path.abspath(path)]
+
+# =============================
+
+def fillNew(analysis, fileNames, treeName):
+    """ function to fill entries appended to each file since the last look, files still without a readable tree are tried again next time. returns number of new entries"""
+    nNew = 0
+    for fileName in fileNames:
+        f = TFile.Open(fileName, 'READ')
+        if not f or f.IsZombie():
+            continue
+        tree = f.Get(treeName)
+        if tree:
+            n = analysis.fillNewEntries(tree, fileName)
+            if n > 0:
+                print '-- {0}: {1} new entries (up to {2})'.format(os.path.basename(fileName), n, analysis.liveProgress[fileName])
+            nNew += n
+        f.Close()
+
+    return nNew
+
+# =============================
+
+# *** 1. Book histograms, no event loop yet
+analysis = barClass(None, args.runType, args.topDir, vetoOpts, not args.noTiming, False, True, args.chunkSize, checkpointFile=args.stateFile, maxDumps=0, runNow=False)
+if(args.stateFile is not None and os.path.isfile(args.stateFile)):
+    analysis.readCheckpoint()
+    print '-- Continuing after {0} entries in {1} files'.format(sum(analysis.liveProgress.values()), len(analysis.liveProgress))
+
+# *** 2. Look for new entries, redraw if there were any
+print '-- Watching {0} every {1:g} s, drawing {2}'.format(args.input, args.interval, ', '.join(plotPatterns))
+while True:
+    tLook = time.time()
+    nNew = fillNew(analysis, returnInputFiles(args.input, args.pattern), args.treeName)
+    if nNew > 0:
+        analysis.drawSelected(plotPatterns)
+        if args.stateFile is not None:
+            analysis.writeCheckpoint(sum(analysis.liveProgress.values()))
+        if args.histFile is not None:
+            partialFiles.writeHistFile(args.histFile, [ (opt, analysis.histSets[opt], analysis.returnConfig(opt)) for opt in vetoOpts ])
+        print '-- {0} entries in total, plots updated in {1:0.1f} s'.format(sum(analysis.liveProgress.values()), time.time() - tLook)
+
+    if args.once:
+        break
+    time.sleep(max(0, args.interval - (time.time() - tLook)))
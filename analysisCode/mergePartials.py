@@ -0,0 +1,22 @@
+# /usr/bin/python
+
+#Purpose: Script to merge partial-result files of split barClass jobs (same runType, vetoOpt and thresholds) into one histogram file for drawing
+
+from partialFiles import mergePartials
+import sys, argparse
+
+# *** 0. setup parser for command line
+parser = argparse.ArgumentParser()
+parser.add_argument("partials", help="partial-result files written with barStudies.py --partialFile", nargs='+')
+parser.add_argument("--output", "-o", help="merged output file", required=True)
+parser.add_argument("--nProc", help="number of processes merging groups of partials in parallel", type=int, default=4)
+args = parser.parse_args()
+
+# *** 1. Merge, incompatible configs are refused
+try:
+    mergePartials(args.partials, args.output, args.nProc)
+except ValueError as e:
+    print "#### Refusing to merge: {0} ####\nEXITING".format(e)
+    sys.exit(1)
+
+print '-- Merged {0} partial files into {1}'.format(len(args.partials), args.output)
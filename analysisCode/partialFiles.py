@@ -0,0 +1,127 @@
+# !/usr/bin/python
+
+#Purpose: Partial-result files = complete filled histogram set of one job + one vetoOpt, tagged with the analysis config (TNamed 'config', json). Compatible partials can be merged in parallel.
+#         Histogram files of the fill stage hold the same content for every vetoOpt, one directory each
+
+import os, json, multiprocessing
+from ROOT import TFile, TNamed, TFileMerger
+
+configName = 'config'
+jobKeys = ['entryRanges', 'inputFiles', 'jobNames'] # differ between jobs of the same campaign, combined when merging
+
+# =============================
+
+def writePartial(fileName, registry, config):
+    """ function to write all histograms of registry (histRegistry) plus config (dict) to fileName"""
+    f = TFile(fileName, 'RECREATE')
+    registry.write(f)
+    f.cd()
+    TNamed(configName, json.dumps(config, sort_keys=True)).Write()
+    f.Close()
+
+# =============================
+
+def writeHistFile(fileName, items):
+    """ function to write one directory per (dirName, registry, config) in items, e.g. all vetoOpts of a fill stage, to fileName"""
+    f = TFile(fileName, 'RECREATE')
+    for dirName, registry, config in items:
+        d = f.mkdir(dirName)
+        registry.write(d)
+        d.cd()
+        TNamed(configName, json.dumps(config, sort_keys=True)).Write()
+    f.Close()
+
+# =============================
+
+def readConfig(fileName, dirName=''):
+    """ function to return config (dict) stored in partial or merged file, or in directory dirName of a histogram file"""
+    f = TFile.Open(fileName, 'READ')
+    if not f or f.IsZombie():
+        raise IOError('cannot open {0}'.format(fileName))
+    named = f.Get('{0}/{1}'.format(dirName, configName) if dirName else configName)
+    if not named:
+        f.Close()
+        raise KeyError('{0} has no {1}, not a partial-result file'.format(fileName, configName))
+    config = json.loads(named.GetTitle())
+    f.Close()
+
+    return config
+
+# =============================
+
+def returnDirectories(fileName):
+    """ function to return names of directories (= vetoOpts) in a histogram file, in order of writing"""
+    f = TFile.Open(fileName, 'READ')
+    if not f or f.IsZombie():
+        raise IOError('cannot open {0}'.format(fileName))
+    dirNames = [key.GetName() for key in f.GetListOfKeys() if key.GetClassName() == 'TDirectoryFile']
+    f.Close()
+
+    return dirNames
+
+# =============================
+
+def returnIncompatibilities(config, reference):
+    """ function to return list of (key, value, reference value) for analysis settings that differ between two configs (job bookkeeping keys ignored)"""
+    keys = sorted(set(config.keys()) | set(reference.keys()))
+    return [ (key, config.get(key), reference.get(key)) for key in keys if key not in jobKeys and config.get(key) != reference.get(key) ]
+
+# =============================
+
+def combineConfigs(configs):
+    """ function to return config of merged file: common settings + job bookkeeping of all inputs in order"""
+    merged = dict( (key, value) for key, value in configs[0].items() if key not in jobKeys )
+    for key in jobKeys:
+        merged[key] = [ item for config in configs for item in config.get(key, []) ]
+
+    return merged
+
+# =============================
+
+def mergeGroup(job):
+    """ function to merge input files into output file with TFileMerger (TH1::Merge per histogram), run in worker process"""
+    inputFiles, outputFile = job
+    merger = TFileMerger(False)
+    merger.SetPrintLevel(0)
+    for inputFile in inputFiles:
+        if not merger.AddFile(inputFile):
+            raise IOError('cannot add {0} to merge'.format(inputFile))
+    merger.OutputFile(outputFile, 'RECREATE')
+    if not merger.Merge():
+        raise IOError('merging into {0} failed'.format(outputFile))
+
+    return outputFile
+
+# =============================
+
+def mergePartials(inputFiles, outputFile, nProc=1):
+    """ function to merge partial files into outputFile after checking all configs agree. nProc > 1: contiguous groups merged in parallel, then merged together"""
+    # *** 1. Refuse to mix incompatible settings
+    configs = [readConfig(fileName) for fileName in inputFiles]
+    for fileName, config in zip(inputFiles, configs):
+        differences = returnIncompatibilities(config, configs[0])
+        if len(differences) > 0:
+            raise ValueError( 'config of {0} does not match {1}:\n{2}'.format(fileName, inputFiles[0], '\n'.join('  {0}: {1} vs {2}'.format(*d) for d in differences)) )
+
+    # *** 2. Merge, groups keep input order so labelled bins come out in the same order as a single merge
+    nGroups = max(1, min(nProc, len(inputFiles)/2))
+    if nGroups == 1:
+        mergeGroup( (inputFiles, outputFile) )
+    else:
+        edges = [len(inputFiles)*k/nGroups for k in range(nGroups + 1)]
+        jobs = [ (inputFiles[edges[k]:edges[k+1]], '{0}.group{1:03d}.root'.format(outputFile, k)) for k in range(nGroups) ]
+        pool = multiprocessing.Pool(nGroups)
+        groupFiles = pool.map(mergeGroup, jobs)
+        pool.close()
+        pool.join()
+        mergeGroup( (groupFiles, outputFile) )
+        for groupFile in groupFiles:
+            os.remove(groupFile)
+
+    # *** 3. Config of merged file lists all inputs
+    f = TFile(outputFile, 'UPDATE')
+    f.Delete('{0};*'.format(configName)) # TFileMerger copies non-mergeable objects as they are
+    TNamed(configName, json.dumps(combineConfigs(configs), sort_keys=True)).Write()
+    f.Close()
+
+    return outputFile
@@ -0,0 +1,120 @@
+# /usr/bin/python
+
+#Purpose: Script to analyze all runs of a dataset manifest (runManifest.py) in one command: one TChain + barClass per group (e.g. XYScan_Bias68V vs Bias69V),
+#         groups run concurrently and split the available cores between their fill workers. With --skimDir, fits are stored per run file + timing settings (timingSkim.py),
+#         so groups sharing runs of a runType and later passes over the same runs reuse them instead of fitting the waveforms again (a group waits while another one fits its runs)
+
+from barClass import barClass, makeDirs
+from thresholdScan import thresholdScan
+import runManifest
+import os, sys, time, argparse, multiprocessing
+from collections import OrderedDict
+
+# *** 0. setup parser for command line
+parser = argparse.ArgumentParser()
+parser.add_argument("manifest", help="json manifest of runs, see runManifest.readManifest")
+parser.add_argument("--groups", help="comma-separated subset of groups to process, default: all")
+parser.add_argument("--vetoOpt", help="veto decision logic option(s), comma-separated", default='singleAdj')
+parser.add_argument("--noTiming", help="leakage plots only, no waveform fits", action='store_true')
+parser.add_argument("--test", help="only first 10k entries of each group", action='store_true')
+parser.add_argument("--nProc", help="total number of processes, default: all cores", type=int, default=multiprocessing.cpu_count())
+parser.add_argument("--nParallel", help="number of groups processed at the same time, default: all groups up to --nProc", type=int, default=0)
+parser.add_argument("--chunkSize", help="number of tree entries read per chunk", type=int, default=10000)
+parser.add_argument("--topDir", help="output directory per group, '{group}' = group name, '{0}' = vetoOpt", default='manifestPlots/{group}/plots_{0}')
+parser.add_argument("--histFile", help="fill stage output per group, '{group}' = group name", default='manifestPlots/{group}/histograms.root')
+parser.add_argument("--skimDir", help="directory of per-event timing skims, one per run file + timing settings shared by all groups containing the run, default: no skim")
+parser.add_argument("--noDraw", help="fill stage only: write --histFile, no plots", action='store_true')
+parser.add_argument("--maxDumps", help="cap on waveform trace dumps per group + vetoOpt, 0 = none", type=int, default=0)
+parser.add_argument("--scanVoltages", help="comma-separated fitVoltageForTiming grid [mV] for threshold scan")
+parser.add_argument("--scanMCPVoltages", help="comma-separated fitMCPVoltageForTiming grid [mV] for threshold scan")
+parser.add_argument("--cfdFractions", help="comma-separated constant fractions for interpolated CFD timing plots, e.g. 0.05,0.10,0.20, default: none")
+parser.add_argument("--scanFractions", help="comma-separated fitPercentForTiming grid for threshold scan")
+args = parser.parse_args()
+
+try:
+    manifest = runManifest.readManifest(args.manifest)
+    groups = runManifest.returnGroups(manifest)
+except (IOError, ValueError) as e:
+    print "#### Bad manifest {0}: {1} ####\nEXITING".format(args.manifest, e)
+    sys.exit(1)
+
+if(args.groups is not None):
+    for group in args.groups.split(','):
+        if group not in groups:
+            print "#### Group {0} not in manifest (has {1}) ####\nEXITING".format(group, ', '.join(groups.keys()))
+            sys.exit(1)
+    groups = OrderedDict( (group, groups[group]) for group in args.groups.split(',') )
+
+vetoOpts = args.vetoOpt.split(',')
+for vetoOpt in vetoOpts:
+    if( not(vetoOpt == "none" or vetoOpt == "singleAdj" or vetoOpt == "doubleAdj" or vetoOpt == "allAdj" or vetoOpt == "all") ):
+        print "#### Please use none/singleAdj/doubleAdj/allAdj/all (or a comma-separated list) when setting --vetoOpt <option>. Supplied value ({0}) does not match ####\nEXITING".format(vetoOpt)
+        sys.exit(1)
+
+scan = None
+if(args.scanVoltages is not None or args.scanMCPVoltages is not None or args.scanFractions is not None):
+    toGrid = lambda opt: [float(x) for x in opt.split(',')] if opt is not None else []
+    scan = thresholdScan(toGrid(args.scanVoltages), toGrid(args.scanMCPVoltages), toGrid(args.scanFractions))
+    args.noTiming = False
+
+cfdFractions = []
+if(args.cfdFractions is not None):
+    cfdFractions = [float(x) for x in args.cfdFractions.split(',')]
+    if any(fraction <= 0 or fraction >= 1 for fraction in cfdFractions):
+        print "#### --cfdFractions have to be between 0 and 1. Supplied value ({0}) does not match ####\nEXITING".format(args.cfdFractions)
+        sys.exit(1)
+
+# *** 1. Split cores: nParallel groups at a time, the rest of the cores go to fill workers of each group
+nParallel = min(len(groups), args.nParallel if args.nParallel > 0 else args.nProc)
+nWorkers = max(1, args.nProc/nParallel)
+
+# =============================
+
+def processGroup(group, runs):
+    """ function run in own process: chain runs of group and fill + draw them with barClass"""
+    chain = runManifest.makeChain(runs, manifest['treeName'])
+    histFile = args.histFile.format(group=group)
+    if os.path.dirname(histFile) != '':
+        makeDirs(os.path.dirname(histFile))
+    print '-- Group {0}: {1} runs, {2} entries, {3} fill workers'.format(group, len(runs), chain.GetEntries(), nWorkers)
+    barClass(chain, runs[0]['runType'], args.topDir.format('{0}', group=group), vetoOpts, not args.noTiming, args.test, True, args.chunkSize, scan, nWorkers,
+             skimDir=args.skimDir, histFile=histFile, render=not args.noDraw, maxDumps=args.maxDumps, cfdFractions=cfdFractions)
+
+# =============================
+
+def returnNextGroup(pending, running):
+    """ function to return index of next pending group to start, -1 = wait. with skims a group sharing run files with a running one waits for its fits"""
+    if args.skimDir is None:
+        return 0
+    busyFiles = set(run['file'] for group in running for run in groups[group])
+    for k, (group, runs) in enumerate(pending):
+        if not any(run['file'] in busyFiles for run in runs):
+            return k
+
+    return -1
+
+# =============================
+
+# *** 2. Keep nParallel group processes running (plain processes, their fill workers are children of their own)
+print '-- Processing {0} groups of {1}, {2} at a time with {3} fill workers each'.format(len(groups), args.manifest, nParallel, nWorkers)
+pending = list(groups.items())
+running = {}
+failed = []
+while pending or running:
+    while pending and len(running) < nParallel and returnNextGroup(pending, running) >= 0:
+        group, runs = pending.pop(returnNextGroup(pending, running))
+        p = multiprocessing.Process(target=processGroup, args=(group, runs), name=group)
+        p.start()
+        running[group] = p
+    time.sleep(1)
+    for group, p in running.items():
+        if not p.is_alive():
+            p.join()
+            if p.exitcode != 0:
+                failed.append(group)
+            del running[group]
+
+if len(failed) > 0:
+    print "#### Groups failed: {0} ####".format(', '.join(failed))
+    sys.exit(1)
+print '-- Done with {0} groups'.format(len(groups))
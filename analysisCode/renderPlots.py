@@ -0,0 +1,35 @@
+# /usr/bin/python
+
+#Purpose: Script to draw all barClass plots from a fill stage histogram file (barStudies.py --histFile) without reading the tree again
+
+from barClass import barClass
+from thresholdScan import thresholdScan
+import partialFiles
+import sys, argparse
+
+# *** 0. setup parser for command line
+parser = argparse.ArgumentParser()
+parser.add_argument("histFile", help="histogram file written by the fill stage")
+parser.add_argument("--vetoOpt", help="comma-separated subset of veto options to draw, default: all in file")
+parser.add_argument("--topDir", help="output directory, '{0}' replaced by vetoOpt", default='09-04-18_plots_{0}')
+parser.add_argument("--renderWorkers", help="number of processes drawing the plot list, each with its own canvases", type=int, default=1)
+args = parser.parse_args()
+
+# *** 1. Veto options + settings as filled
+vetoOpts = partialFiles.returnDirectories(args.histFile)
+if(args.vetoOpt is not None):
+    for vetoOpt in args.vetoOpt.split(','):
+        if vetoOpt not in vetoOpts:
+            print "#### vetoOpt {0} not in {1} (has {2}) ####\nEXITING".format(vetoOpt, args.histFile, ', '.join(vetoOpts))
+            sys.exit(1)
+    vetoOpts = args.vetoOpt.split(',')
+config = partialFiles.readConfig(args.histFile, vetoOpts[0])
+
+scan = None
+if(config['scan'] is not None):
+    scan = thresholdScan(config['scan']['voltages'], config['scan']['mcpVoltages'], config['scan']['fractions'])
+
+print '-- Drawing {0} ({1}) from {2}'.format(config['runType'], ', '.join(vetoOpts), args.histFile)
+
+# *** 2. Draw only, batch mode
+barClass(None, config['runType'], args.topDir, vetoOpts, config['doTiming'], False, True, scan=scan, inputHistFile=args.histFile, renderWorkers=args.renderWorkers)
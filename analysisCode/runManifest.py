@@ -0,0 +1,65 @@
+# !/usr/bin/python
+
+#Purpose: Dataset manifest (json) listing testbeam runs with runType, bias and position. Runs are grouped (default: same runType + bias) and each group is read as one TChain
+
+import json
+from collections import OrderedDict
+from ROOT import TChain
+
+knownRunTypes = ['all5exposure', 'bottomBars_66V', 'topBars_66V', 'may2018TB'] # runTypes with settings in barClass.setVarsByRunType
+defaultGroupBy = ['runType', 'bias']
+
+# =============================
+
+def readManifest(fileName):
+    """ function to return manifest (dict with treeName, groupBy, runs) after checking every run has a file + known runType.
+        format: {"treeName": "pulse", "groupBy": ["runType", "bias"], "runs": [{"file": ..., "runType": ..., "bias": ..., "x": ..., "y": ..., "group": optional name}, ...]}"""
+    with open(fileName) as f:
+        manifest = json.load(f)
+
+    manifest.setdefault('treeName', 'pulse')
+    manifest.setdefault('groupBy', defaultGroupBy)
+    if len(manifest.get('runs', [])) == 0:
+        raise ValueError('manifest {0} lists no runs'.format(fileName))
+    for iRun, run in enumerate(manifest['runs']):
+        if 'file' not in run or 'runType' not in run:
+            raise ValueError('run {0} of manifest {1} needs at least "file" and "runType": {2}'.format(iRun, fileName, run))
+        if run['runType'] not in knownRunTypes:
+            raise ValueError('run {0} of manifest {1} has unknown runType {2}, known: {3}'.format(iRun, fileName, run['runType'], ', '.join(knownRunTypes)))
+
+    return manifest
+
+# =============================
+
+def returnGroupName(run, groupBy):
+    """ function to return name of group of run: its "group" entry, else built from the groupBy values, e.g. may2018TB_bias69"""
+    if 'group' in run:
+        return run['group']
+
+    return '_'.join( str(run.get(key)) if key == 'runType' else '{0}{1}'.format(key, run.get(key)) for key in groupBy )
+
+# =============================
+
+def returnGroups(manifest):
+    """ function to return runs of manifest grouped by returnGroupName, groups + runs in manifest order. a group must have a single runType"""
+    groups = OrderedDict()
+    for run in manifest['runs']:
+        groups.setdefault(returnGroupName(run, manifest['groupBy']), []).append(run)
+
+    for name, runs in groups.items():
+        runTypes = sorted(set(run['runType'] for run in runs))
+        if len(runTypes) > 1:
+            raise ValueError('group {0} mixes runTypes {1}, add runType to groupBy'.format(name, ', '.join(runTypes)))
+
+    return groups
+
+# =============================
+
+def makeChain(runs, treeName):
+    """ function to return TChain of treeName over the files of runs, in order"""
+    chain = TChain(treeName)
+    for run in runs:
+        if chain.Add(run['file'], 0) == 0: # 0 = check file + tree now
+            raise IOError('cannot add {0} ({1}) to chain'.format(run['file'], treeName))
+
+    return chain
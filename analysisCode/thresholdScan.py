@@ -0,0 +1,147 @@
+# !/usr/bin/python
+
+#Purpose: Scan of timing thresholds (fitVoltageForTiming, fitMCPVoltageForTiming, fitPercentForTiming) in one pass. Leading-edge fits are done once per waveform, only the threshold solve is repeated per grid point. One resolution histogram per grid point + summary of fitted sigma vs threshold
+
+import numpy as np
+from ROOT import TH1D, TF1, TGraph
+
+class thresholdScan:
+    def __init__(self, voltages=[], mcpVoltages=[], fractions=[]):
+        # *** 0. Grids, an empty grid is not scanned
+        self.voltages = list(voltages)       # in mV, SiPM channels
+        self.mcpVoltages = list(mcpVoltages) # in mV, MCP channel
+        self.fractions = list(fractions)     # of fitted peak amplitude, all channels
+
+    # =============================
+
+    def returnVoltageGrid(self, isMCP):
+        """ function to return voltage grid used for MCP or SiPM channels"""
+        return self.mcpVoltages if isMCP else self.voltages
+
+    # =============================
+
+    def nColumns(self, isMCP):
+        """ function to return number of scan timing columns per waveform"""
+        return len(self.returnVoltageGrid(isMCP)) + len(self.fractions)
+
+    # =============================
+
+    def solveGrid(self, solveCrossings, params, evalFit, fitVoltage, fracParams, evalFracFit, fracRows, fracAmp, isMCP):
+        """ function to return (n, nColumns) times for all grid points from one set of leading-edge fits, 0 = no time.
+            voltage columns: evalFit + (V - fitVoltage)/fitSlope as in fillTimingPlots, fraction columns: crossing of fraction*fracAmp for rows fracRows"""
+        voltages = self.returnVoltageGrid(isMCP)
+        times = np.zeros((len(params), self.nColumns(isMCP)))
+
+        for iV, voltage in enumerate(voltages):
+            fitRes, fitSlope = solveCrossings(params, evalFit, voltage)
+            isGood = (fitRes > evalFit) & (fitRes < evalFit + 35) & (fitSlope != 0) # something wonky otherwise
+            times[isGood, iV] = evalFit[isGood] + (voltage - fitVoltage[isGood])/fitSlope[isGood]
+
+        if len(fracRows) > 0:
+            for iFrac, fraction in enumerate(self.fractions):
+                times[fracRows, len(voltages) + iFrac] = solveCrossings(fracParams, evalFracFit, fraction*fracAmp)[0]
+
+        return times
+
+    # =============================
+
+    def bookHistograms(self, arr):
+        """ function to book R-L and MCP-referenced resolution histograms for every grid point into histRegistry arr"""
+        for iV, voltage in enumerate(self.voltages):
+            name = "h_scan_V{0:03.0f}_timingRes".format(voltage)
+            arr.book(('scan', 'timingRes', iV), TH1D(name, name, 300, -1500, 1500))
+            for iM, mcpVoltage in enumerate(self.mcpVoltages):
+                name = "h_scan_V{0:03.0f}_MCP{1:03.0f}_mcpRef_timingRes".format(voltage, mcpVoltage)
+                arr.book(('scan', 'mcpRef_timingRes', iV, iM), TH1D(name, name, 350, -3500, 0))
+
+        for iFrac, fraction in enumerate(self.fractions):
+            name = "h_scan_frac{0:02.0f}_fracFit_timingRes".format(100*fraction)
+            arr.book(('scan', 'fracFit_timingRes', iFrac), TH1D(name, name, 300, -1500, 1500))
+            name = "h_scan_frac{0:02.0f}_mcpRef_fracFit_timingRes".format(100*fraction)
+            arr.book(('scan', 'mcpRef_fracFit_timingRes', iFrac), TH1D(name, name, 350, -3500, 0))
+
+        return arr
+
+    # =============================
+
+    def fill(self, arr, scan_R, scan_L, scan_MCP, mcpOK):
+        """ function to fill scan histograms from scan columns of right/left SiPM and MCP (n, nColumns), mcpOK = events with usable MCP"""
+        nV = len(self.voltages)
+        nM = len(self.mcpVoltages)
+
+        for iV in range(nV):
+            tR = scan_R[:, iV]
+            tL = scan_L[:, iV]
+            both = (tR != 0) & (tL != 0)
+            arr.fill(('scan', 'timingRes', iV), 1000*(tL[both] - tR[both])) # multiple by 1000 to transfer from ns to ps
+            for iM in range(nM):
+                tMCP = scan_MCP[:, iM]
+                withMCP = both & mcpOK & (tMCP != 0)
+                arr.fill(('scan', 'mcpRef_timingRes', iV, iM), 1000*(((tR[withMCP] + tL[withMCP])/2) - tMCP[withMCP]))
+
+        for iFrac in range(len(self.fractions)):
+            tR = scan_R[:, nV + iFrac]
+            tL = scan_L[:, nV + iFrac]
+            tMCP = scan_MCP[:, nM + iFrac]
+            both = (tR != 0) & (tL != 0)
+            arr.fill(('scan', 'fracFit_timingRes', iFrac), 1000*(tL[both] - tR[both]))
+            withMCP = both & mcpOK & (tMCP != 0)
+            arr.fill(('scan', 'mcpRef_fracFit_timingRes', iFrac), 1000*(((tR[withMCP] + tL[withMCP])/2) - tMCP[withMCP]))
+
+        return arr
+
+    # =============================
+
+    def fitSigma(self, h, halfWidth=200):
+        """ function to fit gaussian within +-halfWidth [ps] of histogram peak, returns (sigma, sigma error), zeros for (nearly) empty histograms"""
+        if h.GetEntries() < 10:
+            return 0., 0.
+
+        xPeak = h.GetBinCenter(h.GetMaximumBin())
+        f_res = TF1("f_scan", "gaus", xPeak - halfWidth, xPeak + halfWidth)
+        h.Fit("f_scan", "QR0") # should be "R" to impose range
+
+        return abs(f_res.GetParameter(2)), f_res.GetParError(2)
+
+    # =============================
+
+    def writeSummary(self, arr, outDir, c0=None):
+        """ function to fit every scan histogram and write sigma vs threshold to outDir/thresholdScan.txt (+ one curve per scan if canvas c0 given)"""
+        rows = [] # (scan name, threshold label, threshold, sigma, sigma error)
+        curves = []
+
+        # ** A. SiPM voltage, R-L and vs MCP at each MCP voltage
+        if len(self.voltages) > 0:
+            curves.append( ('timingRes', 'fitVoltageForTiming [mV]', self.voltages, [arr.get(('scan', 'timingRes', iV)) for iV in range(len(self.voltages))]) )
+            for iM, mcpVoltage in enumerate(self.mcpVoltages):
+                curves.append( ('mcpRef_timingRes_MCP{0:03.0f}'.format(mcpVoltage), 'fitVoltageForTiming [mV]', self.voltages, [arr.get(('scan', 'mcpRef_timingRes', iV, iM)) for iV in range(len(self.voltages))]) )
+        # ** B. MCP voltage at each SiPM voltage
+        if len(self.mcpVoltages) > 0:
+            for iV, voltage in enumerate(self.voltages):
+                curves.append( ('mcpRef_timingRes_V{0:03.0f}'.format(voltage), 'fitMCPVoltageForTiming [mV]', self.mcpVoltages, [arr.get(('scan', 'mcpRef_timingRes', iV, iM)) for iM in range(len(self.mcpVoltages))]) )
+        # ** C. Fraction
+        if len(self.fractions) > 0:
+            curves.append( ('fracFit_timingRes', 'fitPercentForTiming', self.fractions, [arr.get(('scan', 'fracFit_timingRes', iFrac)) for iFrac in range(len(self.fractions))]) )
+            curves.append( ('mcpRef_fracFit_timingRes', 'fitPercentForTiming', self.fractions, [arr.get(('scan', 'mcpRef_fracFit_timingRes', iFrac)) for iFrac in range(len(self.fractions))]) )
+
+        for scanName, xTitle, grid, hists in curves:
+            sigmas = [self.fitSigma(h) for h in hists]
+            for threshold, h, (sigma, sigmaErr) in zip(grid, hists, sigmas):
+                rows.append( (scanName, threshold, sigma, sigmaErr, int(h.GetEntries())) )
+
+            if c0 is not None:
+                c0.cd()
+                g = TGraph(len(grid), np.array(grid, dtype=np.float64), np.array([s[0] for s in sigmas], dtype=np.float64))
+                g.SetTitle(scanName)
+                g.SetMarkerStyle(20)
+                g.Draw("APL")
+                g.GetXaxis().SetTitle(xTitle)
+                g.GetYaxis().SetTitle("#sigma_{t} [ps]")
+                c0.Print( "{0}/thresholdScan_{1}.png".format(outDir, scanName) )
+
+        with open('{0}/thresholdScan.txt'.format(outDir), 'w') as f:
+            f.write('# scan\tthreshold\tsigma [ps]\tsigma error [ps]\tentries\n')
+            for row in rows:
+                f.write('{0}\t{1:g}\t{2:0.2f}\t{3:0.2f}\t{4}\n'.format(*row))
+
+        print '-- Threshold scan summary written to {0}/thresholdScan.txt'.format(outDir)
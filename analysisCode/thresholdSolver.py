@@ -0,0 +1,198 @@
+# !/usr/bin/python
+
+#Purpose: Threshold-crossing solver for fitted leading edges. Closed-form inversion for gaus/pol1 (vectorized over many fits), bracketing + bisection for any other function. By default answers are snapped to the x_step grid of the original stepping loops in barClass so results do not change
+
+import numpy as np
+
+analyticFunctions = ['gaus', 'pol1']
+
+# =============================
+
+def evalFunction(funcName, params, x):
+    """ function to evaluate ROOT built-in function funcName with parameters params (n, nPar) at x (n)"""
+    params = np.atleast_2d(params)
+    if funcName == 'gaus':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return params[:, 0]*np.exp(-0.5*((x - params[:, 1])/params[:, 2])**2)
+    if funcName == 'pol1':
+        return params[:, 0] + params[:, 1]*x
+
+    raise ValueError('no closed form for function {0}, use solveCrossingGeneric'.format(funcName))
+
+# =============================
+
+def levelCrossings(funcName, params, y):
+    """ function to return (n, 2) array of x where function equals y (NaN if no crossing)"""
+    params = np.atleast_2d(params)
+    y = np.broadcast_to(np.asarray(y, dtype=np.float64), (len(params),))
+    roots = np.full((len(params), 2), np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if funcName == 'gaus':
+            ratio = params[:, 0]/y
+            ok = ratio > 1 # same sign and |y| < |amplitude|, tangent point at ratio = 1 ignored
+            d = np.abs(params[ok, 2])*np.sqrt(2*np.log(ratio[ok]))
+            roots[ok, 0] = params[ok, 1] - d
+            roots[ok, 1] = params[ok, 1] + d
+        elif funcName == 'pol1':
+            ok = params[:, 1] != 0
+            roots[ok, 0] = (y[ok] - params[ok, 0])/params[ok, 1]
+        else:
+            raise ValueError('no closed form for function {0}, use solveCrossingGeneric'.format(funcName))
+
+    return roots
+
+# =============================
+
+def solveCrossing(funcName, params, xStart, yEnd, x_step=0.001, window=35., legacyStep=True):
+    """ function to return first x from xStart on where abs(f) >= abs(yEnd) plus fit slope (f(x) - f(xStart))/(x - xStart), for n fits at once.
+        legacyStep = True reproduces the former per-waveform stepping of barClass: first x_step grid point passing the threshold + one step, xStart + window + x_step if none"""
+    params = np.atleast_2d(params)
+    n = len(params)
+    xStart = np.broadcast_to(np.asarray(xStart, dtype=np.float64), (n,))
+    yAbs = np.abs(np.broadcast_to(np.asarray(yEnd, dtype=np.float64), (n,)))
+    kMax = int(round(window/x_step)) # last grid point evaluated by the stepping loop
+
+    # ** A. Already above threshold at start, else nearest crossing of +-yEnd after start
+    atStart = np.abs(evalFunction(funcName, params, xStart)) >= yAbs
+    roots = np.hstack([levelCrossings(funcName, params, yAbs), levelCrossings(funcName, params, -yAbs)])
+    with np.errstate(invalid='ignore'):
+        roots[~(roots > xStart[:, np.newaxis])] = np.inf
+    xCross = np.where(atStart, xStart, roots.min(axis=1))
+    found = np.isfinite(xCross)
+
+    if not legacyStep:
+        xEval = np.where(found, xCross, xStart + window + x_step)
+    else:
+        # ** B. Snap to grid of stepping loop, re-check grid point (crossing intervals shorter than one step)
+        k = np.full(n, kMax, dtype=np.int64)
+        k[found] = np.minimum(np.ceil((xCross[found] - xStart[found])/x_step - 1e-9), kMax)
+        xGrid = xStart + k*x_step
+        missed = found & (k < kMax) & (np.abs(evalFunction(funcName, params, xGrid)) < yAbs)
+        for i in np.flatnonzero(missed):
+            k[i] = legacyStepIndex(lambda x: evalFunction(funcName, params[i:i+1], np.array([x]))[0], xStart[i], yAbs[i], x_step, kMax, k[i])
+        xEval = xStart + (k + 1)*x_step
+
+    fitSlope = (evalFunction(funcName, params, xEval) - evalFunction(funcName, params, xStart))/(xEval - xStart)
+
+    return xEval, fitSlope
+
+# =============================
+
+def legacyStepIndex(func, xStart, yAbs, x_step, kMax, k=0):
+    """ function to walk the x_step grid from index k like the former per-waveform stepping and return first index with abs(func) >= yAbs (kMax if none)"""
+    while k < kMax and abs(func(xStart + k*x_step)) < yAbs:
+        k += 1
+
+    return k
+
+# =============================
+
+def solveCrossingGeneric(func, xStart, yEnd, x_step=0.001, window=35., legacyStep=True, bracketStep=0.05):
+    """ function to return crossing + fit slope like solveCrossing for any scalar callable (e.g. TF1.Eval): coarse scan in bracketStep, then bisection.
+        crossings narrower than bracketStep can be missed"""
+    yAbs = abs(yEnd)
+    kMax = int(round(window/x_step))
+    xCross = None
+
+    if abs(func(xStart)) >= yAbs:
+        xCross = xStart
+    else:
+        # ** A. Bracket
+        xLow = xStart
+        xHigh = xStart + bracketStep
+        while xLow < xStart + window:
+            if abs(func(xHigh)) >= yAbs:
+                break
+            xLow = xHigh
+            xHigh += bracketStep
+        else:
+            xHigh = None
+
+        # ** B. Bisect to well below one step
+        if xHigh is not None:
+            while xHigh - xLow > 1e-3*x_step:
+                xMid = 0.5*(xLow + xHigh)
+                if abs(func(xMid)) >= yAbs:
+                    xHigh = xMid
+                else:
+                    xLow = xMid
+            xCross = xHigh
+
+    if not legacyStep:
+        xEval = xCross if xCross is not None else xStart + window + x_step
+    else:
+        k = kMax
+        if xCross is not None:
+            k = legacyStepIndex(func, xStart, yAbs, x_step, kMax, min(int(np.ceil((xCross - xStart)/x_step - 1e-9)), kMax))
+        xEval = xStart + (k + 1)*x_step
+
+    fitSlope = (func(xEval) - func(xStart))/(xEval - xStart)
+
+    return xEval, fitSlope
+
+# =============================
+
+def pushBackStart(funcName, params, timeStart, threshold, x_step=0.001):
+    """ function to return start time moved back in x_step steps until f <= threshold or time < 0 (the 'push back start' loops), for n fits at once"""
+    params = np.atleast_2d(params)
+    n = len(params)
+    timeStart = np.broadcast_to(np.asarray(timeStart, dtype=np.float64), (n,))
+    threshold = np.broadcast_to(np.asarray(threshold, dtype=np.float64), (n,))
+
+    above = evalFunction(funcName, params, timeStart) > threshold
+    kNeg = np.maximum(np.floor(timeStart/x_step).astype(np.int64) + 1, 1) # first step with time < 0
+
+    roots = levelCrossings(funcName, params, threshold)
+    with np.errstate(invalid='ignore'):
+        roots[~(roots < timeStart[:, np.newaxis])] = -np.inf
+    xCross = roots.max(axis=1)
+
+    k = kNeg.copy()
+    hasCross = np.isfinite(xCross)
+    k[hasCross] = np.minimum(np.ceil((timeStart[hasCross] - xCross[hasCross])/x_step - 1e-9).astype(np.int64), kNeg[hasCross])
+    k[~above] = 0
+
+    # re-check grid point, walk on for intervals shorter than one step
+    missed = above & (k < kNeg) & (evalFunction(funcName, params, timeStart - k*x_step) > threshold)
+    for i in np.flatnonzero(missed):
+        k[i] = pushBackStepIndex(lambda x: evalFunction(funcName, params[i:i+1], np.array([x]))[0], timeStart[i], threshold[i], x_step, k[i])
+
+    return timeStart - k*x_step
+
+# =============================
+
+def pushBackStepIndex(func, timeStart, threshold, x_step, k=0):
+    """ function to walk back on the x_step grid from index k and return number of steps like the 'push back start' loops"""
+    while not (k > 0 and timeStart - k*x_step < 0) and func(timeStart - k*x_step) > threshold:
+        k += 1
+
+    return k
+
+# =============================
+
+def pushBackStartGeneric(func, timeStart, threshold, x_step=0.001, bracketStep=0.05):
+    """ function to return pushed back start time like pushBackStart for any scalar callable: coarse backward scan, then bisection"""
+    if not func(timeStart) > threshold:
+        return timeStart
+
+    # ** A. Bracket going backwards, stop at negative times like the stepping loop
+    xHigh = timeStart
+    xLow = timeStart - bracketStep
+    while func(xLow) > threshold and xLow >= 0:
+        xHigh = xLow
+        xLow -= bracketStep
+
+    # ** B. Bisect, then snap to grid
+    while xHigh - xLow > 1e-3*x_step:
+        xMid = 0.5*(xLow + xHigh)
+        if func(xMid) > threshold:
+            xHigh = xMid
+        else:
+            xLow = xMid
+
+    k = max(int(np.ceil((timeStart - xHigh)/x_step - 1e-9)), 1)
+    if timeStart - k*x_step < 0:
+        k = max(int(np.floor(timeStart/x_step)) + 1, 1)
+
+    return timeStart - pushBackStepIndex(func, timeStart, threshold, x_step, k)*x_step
@@ -0,0 +1,291 @@
+# !/usr/bin/python
+
+#Purpose: Columnar skim of per-event timing products (getTimingForChannels rows of R + L SiPM per bar, deltaT, deltaT_mcp, MCP scan fits), one skim file per input file
+#         with rows keyed by entry in that file. File name carries a hash of the timing config + input file, so every chain (group) containing the file reuses its rows
+
+import os, json, hashlib, glob, fcntl
+import numpy as np
+
+# =============================
+
+def returnConfigHash(config):
+    """ function to return short hash of timing config (dict, json-serializable)"""
+    return hashlib.sha1(json.dumps(config, sort_keys=True)).hexdigest()[:16]
+
+# =============================
+
+class skimFile:
+    def __init__(self, skimDir, config, jobTag):
+        # *** 0. One file per config hash (timing settings + input file). new rows go to numbered part files of this job (one per save), folded into the skim file by mergeParts
+        self.config = json.dumps(config, sort_keys=True)
+        self.hash = returnConfigHash(config)
+        self.fileName = '{0}/timingSkim_{1}.npz'.format(skimDir, self.hash)
+        self.partPrefix = '{0}/timingSkim_{1}_{2}'.format(skimDir, self.hash, jobTag)
+        self.nNew = 0
+
+        # *** 1. Rows sorted by key for searchsorted lookups. bars: key = 8*entry + barNum, MCP: key = 64*entry + mcpChannel
+        self.emptyColumns = { 'key' : np.zeros(0, dtype=np.int64), 'timing_R' : None, 'timing_L' : None, 'deltaT' : np.zeros(0), 'deltaT_mcp' : np.zeros(0),
+                              'mcp_key' : np.zeros(0, dtype=np.int64), 'mcp_timing' : None }
+        self.columns = dict(self.emptyColumns)
+        self.newRows = dict( (name, []) for name in self.columns )
+        # parts not yet merged (interrupted run of this job, or other chains with this file still running / interrupted) are reused as well
+        columnSets = [self.columns]
+        if os.path.isfile(self.fileName):
+            columnSets.append(self.load(self.fileName))
+        for partFile in self.returnPartFiles('{0}_*'.format(os.path.splitext(self.fileName)[0])):
+            columnSets.append(self.load(partFile))
+        self.columns = self.combine(columnSets)
+        self.partFiles = self.returnPartFiles(self.partPrefix)
+
+    # =============================
+
+    def load(self, fileName):
+        """ function to return columns of skim file, refused if it was written with a different config"""
+        f = np.load(fileName)
+        if str(f['config']) != self.config:
+            f.close()
+            raise ValueError('timing skim {0} does not belong to this config (hash collision?)'.format(fileName))
+        columns = dict( (name, np.array(f[name]) if name in f.files else self.emptyColumns[name]) for name in self.emptyColumns )
+        f.close()
+        print '-- Timing skim {0}: {1} bar rows, {2} MCP rows reused'.format(fileName, len(columns['key']), len(columns['mcp_key']))
+
+        return columns
+
+    # =============================
+
+    def lookup(self, keys, keyName='key'):
+        """ function to return row in skim for each key, -1 if not stored"""
+        stored = self.columns[keyName]
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(stored) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(stored, keys), len(stored) - 1)
+
+        return np.where(stored[rows] == keys, rows, -1)
+
+    # =============================
+
+    def returnBarKeys(self, entries, barNum):
+        """ function to return skim keys of file entries for bar barNum"""
+        return 8*np.asarray(entries, dtype=np.int64) + barNum
+
+    # =============================
+
+    def returnMCPKeys(self, entries, mcpChannel):
+        """ function to return skim keys of file entries for MCP channel"""
+        return 64*np.asarray(entries, dtype=np.int64) + mcpChannel
+
+    # =============================
+
+    def add(self, keys, timing_R, timing_L, deltaT, deltaT_mcp):
+        """ function to add newly computed bar rows (NaN deltaT/deltaT_mcp if not defined for event)"""
+        if len(keys) == 0:
+            return
+        self.newRows['key'].append(np.asarray(keys, dtype=np.int64))
+        self.newRows['timing_R'].append(np.asarray(timing_R, dtype=np.float64))
+        self.newRows['timing_L'].append(np.asarray(timing_L, dtype=np.float64))
+        self.newRows['deltaT'].append(np.asarray(deltaT, dtype=np.float64))
+        self.newRows['deltaT_mcp'].append(np.asarray(deltaT_mcp, dtype=np.float64))
+        self.nNew += len(keys)
+
+    # =============================
+
+    def addMCP(self, keys, timing):
+        """ function to add newly computed MCP rows"""
+        if len(keys) == 0:
+            return
+        self.newRows['mcp_key'].append(np.asarray(keys, dtype=np.int64))
+        self.newRows['mcp_timing'].append(np.asarray(timing, dtype=np.float64))
+        self.nNew += len(keys)
+
+    # =============================
+
+    def combine(self, columnSets):
+        """ function to return one set of sorted columns from several (later sets win for duplicate keys)"""
+        combined = {}
+        for keyName, rowNames in [('key', ['timing_R', 'timing_L', 'deltaT', 'deltaT_mcp']), ('mcp_key', ['mcp_timing'])]:
+            sets = [c for c in columnSets if c[keyName] is not None and len(c[keyName]) > 0]
+            if len(sets) == 0:
+                for name in [keyName] + rowNames:
+                    combined[name] = columnSets[0][name]
+                continue
+            keys = np.concatenate([c[keyName] for c in sets])
+            order = np.argsort(keys, kind='mergesort')
+            keep = np.ones(len(order), dtype=bool)
+            keep[:-1] = keys[order][1:] != keys[order][:-1] # last occurrence of each key
+            combined[keyName] = keys[order][keep]
+            for name in rowNames:
+                combined[name] = np.concatenate([c[name] for c in sets])[order][keep]
+
+        return combined
+
+    # =============================
+
+    def returnNewColumns(self):
+        """ function to return rows added in this job as columns"""
+        return dict( (name, np.concatenate(parts) if len(parts) > 0 else None) for name, parts in self.newRows.items() )
+
+    # =============================
+
+    def writeColumns(self, fileName, columns):
+        """ function to write columns + config to fileName via temporary file (unique per process) + rename"""
+        skimDir = os.path.dirname(fileName)
+        if skimDir != '' and not os.path.isdir(skimDir):
+            try:
+                os.makedirs(skimDir)
+            except OSError:
+                if not os.path.isdir(skimDir):
+                    raise
+        arrays = dict( (name, value) for name, value in columns.items() if value is not None )
+        arrays['config'] = np.array(self.config)
+        tmpFile = '{0}.{1}.tmp'.format(fileName, os.getpid())
+        with open(tmpFile, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.rename(tmpFile, fileName)
+
+    # =============================
+
+    def returnPartFiles(self, prefix):
+        """ function to return part files starting with prefix, in order of writing"""
+        return sorted(glob.glob('{0}_[0-9][0-9][0-9][0-9].npz'.format(prefix)))
+
+    # =============================
+
+    def saveNew(self):
+        """ function to write rows added since the last save as the next part file of this job, e.g. at a checkpoint. earlier rows are never rewritten"""
+        if self.nNew == 0:
+            return
+        partFile = '{0}_{1:04d}.npz'.format(self.partPrefix, len(self.partFiles))
+        self.writeColumns(partFile, self.returnNewColumns())
+        self.partFiles.append(partFile)
+        self.newRows = dict( (name, []) for name in self.columns )
+        self.nNew = 0
+
+    # =============================
+
+    def mergeParts(self, partPattern):
+        """ function to fold part files matching partPattern (this job + its workers) into the skim file and remove them.
+            locked, as chains of other groups may merge into the same skim file at the same time"""
+        if len(self.returnPartFiles(partPattern)) == 0:
+            return
+
+        with open('{0}.lock'.format(self.fileName), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # skim file as written by others meanwhile + parts
+            columnSets = [self.columns]
+            if os.path.isfile(self.fileName):
+                columnSets.append(self.load(self.fileName))
+            usedFiles = []
+            for partFile in self.returnPartFiles(partPattern):
+                try:
+                    columnSets.append(self.load(partFile))
+                    usedFiles.append(partFile)
+                except ValueError:
+                    print '#### {0} has a different config, left alone ####'.format(partFile)
+            self.columns = self.combine(columnSets)
+            self.writeColumns(self.fileName, self.columns)
+            for partFile in usedFiles:
+                os.remove(partFile)
+            fcntl.flock(lock, fcntl.LOCK_UN)
+        self.partFiles = [partFile for partFile in self.partFiles if partFile not in usedFiles]
+        print '-- Timing skim written to {0}: {1} bar rows, {2} MCP rows'.format(self.fileName, len(self.columns['key']), len(self.columns['mcp_key']))
+
+# =============================
+
+class timingSkim:
+    def __init__(self, skimDir, config, inputFiles, fileEntries, jobName=''):
+        # *** 0. One skimFile per input file (config + file name + its entries), entries of the chain run through the files one after the other
+        self.inputFiles = inputFiles
+        self.offsets = np.cumsum([0] + list(fileEntries))
+        self.isWorker = jobName != ''
+        # part files named per chain + job, so groups running at the same time never write the same part
+        self.chainTag = returnConfigHash(inputFiles)[:8]
+        jobTag = '{0}_{1}'.format(self.chainTag, jobName if jobName else 'serial')
+        self.files = [ skimFile(skimDir, dict(config, inputFile=fileName, nEntries=int(nEntries)), jobTag) for fileName, nEntries in zip(inputFiles, fileEntries) ]
+
+    # =============================
+
+    def returnFileEntries(self, entries):
+        """ function to return index of input file + entry in that file for each chain entry"""
+        entries = np.asarray(entries, dtype=np.int64)
+        fileIdx = np.searchsorted(self.offsets, entries, side='right') - 1
+
+        return fileIdx, entries - self.offsets[fileIdx]
+
+    # =============================
+
+    def returnBarTiming(self, entries, barNum):
+        """ function to return mask of chain entries stored for bar barNum + their timing_R, timing_L rows (None if not stored)"""
+        fileIdx, fileEntries = self.returnFileEntries(entries)
+        found = np.zeros(len(fileIdx), dtype=bool)
+        timing_R = [None]*len(fileIdx)
+        timing_L = [None]*len(fileIdx)
+        for k in np.unique(fileIdx):
+            skim = self.files[k]
+            sel = np.nonzero(fileIdx == k)[0]
+            rows = skim.lookup(skim.returnBarKeys(fileEntries[sel], barNum))
+            for i, row in zip(sel[rows >= 0], rows[rows >= 0]):
+                found[i] = True
+                timing_R[i] = skim.columns['timing_R'][row]
+                timing_L[i] = skim.columns['timing_L'][row]
+
+        return found, timing_R, timing_L
+
+    # =============================
+
+    def returnMCPTiming(self, entries, mcpChannel):
+        """ function to return mask of chain entries stored for MCP channel + their timing rows (None if not stored)"""
+        fileIdx, fileEntries = self.returnFileEntries(entries)
+        found = np.zeros(len(fileIdx), dtype=bool)
+        timing = [None]*len(fileIdx)
+        for k in np.unique(fileIdx):
+            skim = self.files[k]
+            sel = np.nonzero(fileIdx == k)[0]
+            rows = skim.lookup(skim.returnMCPKeys(fileEntries[sel], mcpChannel), 'mcp_key')
+            for i, row in zip(sel[rows >= 0], rows[rows >= 0]):
+                found[i] = True
+                timing[i] = skim.columns['mcp_timing'][row]
+
+        return found, timing
+
+    # =============================
+
+    def add(self, entries, barNum, timing_R, timing_L, deltaT, deltaT_mcp):
+        """ function to add newly computed bar rows of chain entries, each to the skim of its input file"""
+        fileIdx, fileEntries = self.returnFileEntries(entries)
+        for k in np.unique(fileIdx):
+            skim = self.files[k]
+            sel = fileIdx == k
+            skim.add(skim.returnBarKeys(fileEntries[sel], barNum), timing_R[sel], timing_L[sel], deltaT[sel], deltaT_mcp[sel])
+
+    # =============================
+
+    def addMCP(self, entries, mcpChannel, timing):
+        """ function to add newly computed MCP rows of chain entries, each to the skim of its input file"""
+        fileIdx, fileEntries = self.returnFileEntries(entries)
+        for k in np.unique(fileIdx):
+            skim = self.files[k]
+            sel = fileIdx == k
+            skim.addMCP(skim.returnMCPKeys(fileEntries[sel], mcpChannel), timing[sel])
+
+    # =============================
+
+    def saveNew(self):
+        """ function to write rows added since the last save as next part file of every input file, e.g. at a checkpoint"""
+        for skim in self.files:
+            skim.saveNew()
+
+    # =============================
+
+    def save(self):
+        """ function to write skims at the end of a job: new rows as part files, a serial job also folds all parts into the skim files (workers: parent calls mergeParts)"""
+        self.saveNew()
+        if not self.isWorker:
+            self.mergeParts()
+
+    # =============================
+
+    def mergeParts(self):
+        """ function to fold part files of this chain's job + workers into the skim file of every input file"""
+        for skim in self.files:
+            skim.mergeParts('{0}_{1}_*'.format(os.path.splitext(skim.fileName)[0], self.chainTag))
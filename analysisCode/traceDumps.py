@@ -0,0 +1,145 @@
+# !/usr/bin/python
+
+#Purpose: Trace dumps for visual inspection of waveforms + fits. The event loop only queues arrays, a background thread writes them to one compressed archive (.npz) per run.
+#         Capped in number, full queue = dump dropped instead of waiting. Drawn offline into a multi-page PDF with drawTraceDumps.py
+#         Jobs with checkpoints write one part archive per checkpoint interval (rollover), a resumed job keeps the parts written before + continues numbering and cap
+
+import os, json, glob, threading, zipfile, Queue, io
+import numpy as np
+
+indexName = 'index' # json list of dump infos, written last
+
+# =============================
+
+def returnMemberName(iDump, arrayName):
+    """ function to return archive member (without .npy) of array arrayName of dump number iDump"""
+    return 'dump{0:05d}_{1}'.format(iDump, arrayName)
+
+# =============================
+
+def readTraceDumps(fileName):
+    """ function to return list of (info dict, {array name: array}) of all dumps in archive, in order of writing"""
+    f = np.load(fileName)
+    index = json.loads(str(f[indexName]))
+    dumps = [ (info, dict( (name, f[returnMemberName(info['dump'], name)]) for name in info['arrays'] )) for info in index ]
+    f.close()
+
+    return dumps
+
+# =============================
+
+def returnPartName(fileName, iPart):
+    """ function to return name of part archive iPart of archive fileName, e.g. traceDumps_part002.npz"""
+    return '{0}_part{2:03d}{1}'.format(os.path.splitext(fileName)[0], os.path.splitext(fileName)[1], iPart)
+
+# =============================
+
+def returnPartFiles(fileName):
+    """ function to return existing part archives of archive fileName, in order"""
+    return sorted(glob.glob('{0}_part[0-9][0-9][0-9]{1}'.format(os.path.splitext(fileName)[0], os.path.splitext(fileName)[1])))
+
+# =============================
+
+class traceDumper:
+    def __init__(self, fileName, maxDumps=1000, queueSize=200, nQueued=0, iPart=None):
+        # *** 0. Writer thread + archive are only created with the first dump. iPart = None: one archive fileName, else part archives from number iPart on
+        self.baseName = fileName
+        self.iPart = iPart
+        self.fileName = fileName if iPart is None else returnPartName(fileName, iPart)
+        self.maxDumps = maxDumps
+        self.queue = Queue.Queue(queueSize)
+        self.thread = None
+        self.nQueued = nQueued # dumps before a resume count towards the cap + numbering
+        self.nDropped = 0
+        self.nWritten = 0
+
+        # *** 1. Parts from where this job continues on (and unfinished archives) belong to events that are filled again
+        if iPart is not None:
+            stale = [name for name in returnPartFiles(fileName) if name >= returnPartName(fileName, iPart)] # zero-padded numbers sort as strings
+            for name in stale + glob.glob('{0}_part[0-9][0-9][0-9]{1}.tmp'.format(os.path.splitext(fileName)[0], os.path.splitext(fileName)[1])):
+                os.remove(name)
+
+    # =============================
+
+    def isFull(self):
+        """ function to tell if cap on dumps is reached, check before collecting arrays"""
+        return self.nQueued >= self.maxDumps
+
+    # =============================
+
+    def dump(self, info, **arrays):
+        """ function to queue one dump (info = json-serializable dict, arrays = float32 copies stored). never blocks, returns False if capped or queue full"""
+        if self.isFull():
+            return False
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.writeLoop, name='traceDumper')
+            self.thread.daemon = True
+            self.thread.start()
+
+        info = dict(info, dump=self.nQueued, arrays=sorted(arrays.keys()))
+        try:
+            self.queue.put_nowait( (info, dict( (name, np.array(value, dtype=np.float32)) for name, value in arrays.items() )) )
+        except Queue.Full:
+            self.nDropped += 1
+            return False
+        self.nQueued += 1
+
+        return True
+
+    # =============================
+
+    def writeLoop(self):
+        """ function run in writer thread: compress each dump into the archive as it arrives, index + rename once closed"""
+        tmpFile = '{0}.tmp'.format(self.fileName)
+        index = []
+        archive = zipfile.ZipFile(tmpFile, 'w', zipfile.ZIP_DEFLATED, allowZip64=True)
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            info, arrays = item
+            for name, value in arrays.items():
+                self.writeArray(archive, returnMemberName(info['dump'], name), value)
+            index.append(info)
+            self.nWritten += 1
+
+        self.writeArray(archive, indexName, np.array(json.dumps(index)))
+        archive.close()
+        os.rename(tmpFile, self.fileName)
+
+    # =============================
+
+    def writeArray(self, archive, name, value):
+        """ function to add array as .npy member to open zip archive (= what np.load reads from a .npz)"""
+        buf = io.BytesIO()
+        np.lib.format.write_array(buf, np.asanyarray(value), allow_pickle=False)
+        archive.writestr('{0}.npy'.format(name), buf.getvalue())
+
+    # =============================
+
+    def close(self, logPrefix=''):
+        """ function to wait for queued dumps to be written and finish the archive"""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+        print logPrefix + '-- Wrote {0} trace dumps to {1} ({2} dropped, writer busy)'.format(self.nWritten, self.fileName, self.nDropped)
+
+    # =============================
+
+    def rollover(self, logPrefix=''):
+        """ function to finish the current part archive (if it got dumps) so it survives a crash, later dumps go to the next part. parts only"""
+        if self.iPart is None or self.thread is None:
+            return
+        self.close(logPrefix)
+        self.iPart += 1
+        self.fileName = returnPartName(self.baseName, self.iPart)
+        self.nWritten = 0
+        self.nDropped = 0
+
+    # =============================
+
+    def returnState(self):
+        """ function to return [dumps queued so far, next part number] to store with a checkpoint"""
+        return [self.nQueued, self.iPart]
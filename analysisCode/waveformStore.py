@@ -0,0 +1,141 @@
+# !/usr/bin/python
+
+#Purpose: Flat on-disk copy of the DRS waveform branches (channel = (events, 36, 1024), time = (events, 4, 1024)) as .npy files read memory-mapped.
+#         Exported once from the tree (exportWaveforms.py), afterwards any entry range or subset is read without decompressing ROOT baskets, processes share the page cache
+
+import os, json, shutil
+import numpy as np
+from numpy.lib.format import open_memmap
+from root_numpy import tree2array
+
+infoName = 'info.json'
+storeDtypes = ['float32', 'int16']
+int16Scale = 0.05 # mV per count for int16 samples, covers +-1638 mV
+
+# =============================
+
+def exportStore(tree, storeDir, inputFiles, chunkSize=10000, start=0, stop=-1, dtype='float32'):
+    """ function to copy channel + time branches of entries [start, stop) of tree into a waveform store at storeDir, written to storeDir.tmp + renamed when complete.
+        dtype int16 stores channel samples as counts of int16Scale mV (half the size), time always float32"""
+    if dtype not in storeDtypes:
+        raise ValueError('waveform store dtype {0} not in {1}'.format(dtype, ', '.join(storeDtypes)))
+    nEntries = tree.GetEntries()
+    if stop < 0 or stop > nEntries:
+        stop = nEntries
+    if stop <= start:
+        raise ValueError('nothing to export in entries [{0}, {1})'.format(start, stop))
+
+    # ** A. Shapes from first entry, then fill the memory-mapped arrays chunk by chunk
+    tmpDir = '{0}.tmp'.format(storeDir.rstrip('/'))
+    if os.path.isdir(tmpDir):
+        shutil.rmtree(tmpDir)
+    os.makedirs(tmpDir)
+    first = tree2array(tree, branches=['channel', 'time'], start=start, stop=start+1)
+    channel = open_memmap('{0}/channel.npy'.format(tmpDir), mode='w+', dtype=dtype, shape=(stop - start,) + first['channel'].shape[1:])
+    time = open_memmap('{0}/time.npy'.format(tmpDir), mode='w+', dtype='float32', shape=(stop - start,) + first['time'].shape[1:])
+
+    for firstEntry in range(start, stop, chunkSize):
+        lastEntry = min(firstEntry + chunkSize, stop)
+        arr = tree2array(tree, branches=['channel', 'time'], start=firstEntry, stop=lastEntry)
+        if dtype == 'int16':
+            channel[firstEntry - start:lastEntry - start] = np.clip(np.round(arr['channel']/int16Scale), -32768, 32767)
+        else:
+            channel[firstEntry - start:lastEntry - start] = arr['channel']
+        time[firstEntry - start:lastEntry - start] = arr['time']
+        print '-- Exported entries {0} to {1} of {2}'.format(firstEntry, lastEntry, stop)
+    channel.flush()
+    time.flush()
+    del channel, time
+
+    # ** B. Index tree entry -> row, input bookkeeping
+    np.save('{0}/entries.npy'.format(tmpDir), np.arange(start, stop, dtype=np.int64))
+    info = {'inputFiles': [os.path.abspath(fileName) for fileName in inputFiles], 'treeName': tree.GetName(), 'nEntries': nEntries, 'dtype': dtype, 'scale': int16Scale if dtype == 'int16' else 1.0}
+    with open('{0}/{1}'.format(tmpDir, infoName), 'w') as f:
+        json.dump(info, f, sort_keys=True, indent=1)
+
+    if os.path.isdir(storeDir):
+        shutil.rmtree(storeDir)
+    os.rename(tmpDir, storeDir)
+
+    return storeDir
+
+# =============================
+
+class waveformStore:
+    def __init__(self, storeDir):
+        # *** 0. Arrays stay on disk, only pages touched are read
+        self.storeDir = storeDir
+        with open('{0}/{1}'.format(storeDir, infoName)) as f:
+            self.info = json.load(f)
+        self.channel = np.load('{0}/channel.npy'.format(storeDir), mmap_mode='r')
+        self.time = np.load('{0}/time.npy'.format(storeDir), mmap_mode='r')
+        self.entries = np.load('{0}/entries.npy'.format(storeDir)) # tree entry of each row, increasing
+        self.scale = self.info['scale']
+
+    # =============================
+
+    def checkInput(self, inputFiles, nEntries):
+        """ function to refuse a store exported from different input files or a tree of different length"""
+        inputFiles = [os.path.abspath(fileName) for fileName in inputFiles]
+        if inputFiles != self.info['inputFiles'] or nEntries != self.info['nEntries']:
+            raise ValueError('waveform store {0} was exported from {1} ({2} entries), not {3} ({4} entries)'.format(self.storeDir, ', '.join(self.info['inputFiles']), self.info['nEntries'], ', '.join(inputFiles), nEntries))
+
+    # =============================
+
+    def checkRange(self, firstEntry, lastEntry):
+        """ function to refuse a store whose rows do not cover every entry of [firstEntry, lastEntry), checked before filling instead of failing at the first missing chunk"""
+        if lastEntry <= firstEntry:
+            return
+        first, last = np.searchsorted(self.entries, [firstEntry, lastEntry])
+        if last - first != lastEntry - firstEntry:
+            raise ValueError('waveform store {0} has {1} of entries {2} to {3} (exported: {4})'.format(self.storeDir, last - first, firstEntry, lastEntry, self.returnExportedRanges()))
+
+    # =============================
+
+    def returnExportedRanges(self):
+        """ function to return exported entries as 'first-last' ranges for messages"""
+        if len(self.entries) == 0:
+            return 'none'
+        breaks = np.nonzero(np.diff(self.entries) != 1)[0]
+        starts = np.concatenate([[0], breaks + 1])
+        stops = np.concatenate([breaks, [len(self.entries) - 1]])
+
+        return ', '.join('{0}-{1}'.format(self.entries[a], self.entries[b] + 1) for a, b in zip(starts, stops))
+
+    # =============================
+
+    def returnRows(self, entries):
+        """ function to return store rows of tree entries, KeyError if an entry was not exported"""
+        entries = np.asarray(entries, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.entries, entries), len(self.entries) - 1)
+        if len(entries) > 0 and not np.array_equal(self.entries[rows], entries):
+            raise KeyError('entries missing in waveform store {0}'.format(self.storeDir))
+
+        return rows
+
+    # =============================
+
+    def returnChannel(self, channel):
+        """ function to return samples in mV (float32 store: memory-mapped view itself, int16 store: scaled copy)"""
+        if self.info['dtype'] == 'int16':
+            return channel.astype(np.float32)*np.float32(self.scale)
+
+        return channel
+
+    # =============================
+
+    def read(self, firstEntry, lastEntry):
+        """ function to return (time, channel) waveforms of entries [firstEntry, lastEntry) as memory-mapped views (no copy for float32 stores)"""
+        rows = self.returnRows([firstEntry, lastEntry - 1])
+        if rows[1] - rows[0] != lastEntry - 1 - firstEntry:
+            raise KeyError('entries {0} to {1} not contiguous in waveform store {2}'.format(firstEntry, lastEntry, self.storeDir))
+
+        return self.time[rows[0]:rows[1]+1], self.returnChannel(self.channel[rows[0]:rows[1]+1])
+
+    # =============================
+
+    def readEntries(self, entries):
+        """ function to return (time, channel) waveforms of arbitrary tree entries, e.g. a selected subset"""
+        rows = self.returnRows(entries)
+
+        return self.time[rows], self.returnChannel(self.channel[rows])
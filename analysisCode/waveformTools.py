@@ -0,0 +1,109 @@
+# !/usr/bin/python
+
+#Purpose: Batched waveform scans on 2D (events x samples) arrays, matching the former per-waveform getWaveformInfo_* loops of barClass (-1 = not found)
+
+import numpy as np
+
+def firstTrue(mask):
+    """ function to return index of first True per row of 2D boolean mask, -1 for rows without any"""
+    mask = np.atleast_2d(mask)
+    idx = np.argmax(mask, axis=1)
+    idx[~mask[np.arange(len(mask)), idx]] = -1
+
+    return idx
+
+# =============================
+
+def firstCrossing(channel, threshold):
+    """ function to return first sample with abs(reading) > threshold per waveform, threshold may be scalar or per-waveform"""
+    channel = np.atleast_2d(channel)
+    threshold = np.reshape(threshold, (-1, 1)) if np.ndim(threshold) else threshold
+
+    return firstTrue(np.abs(channel) > threshold)
+
+# =============================
+
+def firstFractionCrossing(channel, maxAmp, fraction):
+    """ function to return first sample with abs(reading)/maxAmp > fraction per waveform, maxAmp may be scalar or per-waveform"""
+    channel = np.atleast_2d(channel)
+    maxAmp = np.reshape(maxAmp, (-1, 1)) if np.ndim(maxAmp) else maxAmp
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return firstTrue(np.abs(channel)/maxAmp > fraction)
+
+# =============================
+
+def peakIndex(channel):
+    """ function to return peak value and index of first maximum per waveform, like the 'reading > maxADC' scan starting from maxADC = -1"""
+    channel = np.atleast_2d(channel)
+    idx = np.argmax(channel, axis=1)
+    peak = channel[np.arange(len(channel)), idx]
+    noPeak = ~(peak > -1)
+    idx[noPeak] = -1
+    peak = np.where(noPeak, -1, peak)
+
+    return peak, idx
+
+# =============================
+
+def riseAndFall(time, channel, riseThreshold, fallThreshold):
+    """ function to return rise (first abs(reading) > riseThreshold) and fall index per waveform. fall = first sample from rise on with abs(reading) < fallThreshold after the first maximum, 0 if rise but no fall, -1 if no rise"""
+    time = np.atleast_2d(time)
+    channel = np.atleast_2d(channel)
+    riseThreshold = np.reshape(riseThreshold, (-1, 1)) if np.ndim(riseThreshold) else riseThreshold
+    fallThreshold = np.reshape(fallThreshold, (-1, 1)) if np.ndim(fallThreshold) else fallThreshold
+    nSamples = channel.shape[1]
+    rows = np.arange(len(channel))
+
+    rise = firstTrue(np.abs(channel) > riseThreshold)
+
+    tPeak = time[rows, np.argmax(channel, axis=1)]
+    afterRise = np.arange(nSamples)[np.newaxis, :] >= np.where(rise < 0, nSamples, rise)[:, np.newaxis]
+    fall = firstTrue(afterRise & (np.abs(channel) < fallThreshold) & (time > tPeak[:, np.newaxis]))
+    fall[(rise >= 0) & (fall < 0)] = 0 # looking for fall but never found
+    fall[rise < 0] = -1
+
+    return rise, fall
+
+# =============================
+
+def subtractBaseline(channel, nBaseline):
+    """ function to return waveforms minus mean of their first nBaseline samples"""
+    channel = np.atleast_2d(channel).astype(np.float64)
+
+    return channel - channel[:, :nBaseline].mean(axis=1)[:, np.newaxis]
+
+# =============================
+
+def cfdTimes(time, channel, peakAmp, fractions):
+    """ function to return (n, nFractions) leading-edge times where baseline-corrected, positive pulses first exceed fraction*peakAmp,
+        linearly interpolated between the two samples around the crossing. NaN if no crossing, already above at first sample or peakAmp <= 0"""
+    time = np.atleast_2d(time).astype(np.float64)
+    channel = np.atleast_2d(channel).astype(np.float64)
+    fractions = np.asarray(fractions, dtype=np.float64)
+    if np.any(fractions <= 0) or np.any(fractions >= 1):
+        raise ValueError('CFD fractions have to be in (0, 1), got {0}'.format(fractions))
+    n, nSamples = channel.shape
+    rows = np.arange(n)
+    peakAmp = np.broadcast_to(np.asarray(peakAmp, dtype=np.float64), (n,))
+    hasPeak = peakAmp > 0
+
+    # ** A. Running maximum of normalised pulse is sorted per row --> first crossings of all fractions from one searchsorted on offset rows
+    with np.errstate(divide='ignore', invalid='ignore'):
+        runningMax = np.maximum.accumulate(channel/np.where(hasPeak, peakAmp, 1)[:, np.newaxis], axis=1)
+    runningMax = np.clip(np.nan_to_num(runningMax), -1, 1) + 3*rows[:, np.newaxis] # rows end up in disjoint [3*row - 1, 3*row + 1]
+    idx = np.searchsorted(runningMax.ravel(), (fractions[np.newaxis, :] + 3*rows[:, np.newaxis]).ravel(), side='right').reshape(n, len(fractions))
+    idx -= nSamples*rows[:, np.newaxis] # first sample > fraction, nSamples if none
+
+    # ** B. Interpolate between sample before and first sample above
+    found = hasPeak[:, np.newaxis] & (idx > 0) & (idx < nSamples)
+    after = np.where(found, idx, 1)
+    before = after - 1
+    level = fractions[np.newaxis, :]*peakAmp[:, np.newaxis]
+    vBefore = channel[rows[:, np.newaxis], before]
+    vAfter = channel[rows[:, np.newaxis], after]
+    tBefore = time[rows[:, np.newaxis], before]
+    tAfter = time[rows[:, np.newaxis], after]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        times = tBefore + (level - vBefore)*(tAfter - tBefore)/(vAfter - vBefore)
+
+    return np.where(found, times, np.nan)